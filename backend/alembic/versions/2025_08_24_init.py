@@ -0,0 +1,81 @@
+"""Initial schema: documents, clauses, guidance, deadlines, policy fires
+
+Revision ID: 2025_08_24_init
+Revises:
+Create Date: 2025-08-24
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2025_08_24_init"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "documents",
+        sa.Column("doc_id", sa.String(), primary_key=True),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_table(
+        "clauses",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("doc_id", sa.String(), sa.ForeignKey("documents.doc_id"), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("page", sa.Integer(), nullable=False),
+        sa.Column("start", sa.Integer(), nullable=False),
+        sa.Column("end", sa.Integer(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=True),
+        sa.Column("confidence", sa.Float(), nullable=False),
+        sa.Column("normalized", sa.JSON(), nullable=False),
+    )
+    op.create_index("ix_clauses_type", "clauses", ["type"])
+    op.create_table(
+        "guidance",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("doc_id", sa.String(), sa.ForeignKey("documents.doc_id"), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("what", sa.Text(), nullable=False),
+        sa.Column("action", sa.Text(), nullable=True),
+        sa.Column("risk", sa.String(), nullable=False),
+        sa.Column("deadline", sa.String(), nullable=True),
+        sa.Column("evidence", sa.JSON(), nullable=False),
+        sa.Column("confidence", sa.Float(), nullable=False),
+    )
+    op.create_table(
+        "deadlines",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("doc_id", sa.String(), sa.ForeignKey("documents.doc_id"), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("due_at", sa.DateTime(), nullable=False),
+        sa.Column("source_clause_id", sa.String(), sa.ForeignKey("clauses.id"), nullable=True),
+    )
+    op.create_table(
+        "policy_fires",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("rule_id", sa.String(), nullable=False),
+        sa.Column("doc_id", sa.String(), sa.ForeignKey("documents.doc_id"), nullable=False),
+        sa.Column("clause_id", sa.String(), sa.ForeignKey("clauses.id"), nullable=False),
+        sa.Column("severity", sa.String(), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("policy_fires")
+    op.drop_table("deadlines")
+    op.drop_table("guidance")
+    op.drop_index("ix_clauses_type", table_name="clauses")
+    op.drop_table("clauses")
+    op.drop_table("documents")
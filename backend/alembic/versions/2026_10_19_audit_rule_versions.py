@@ -0,0 +1,86 @@
+"""Pipeline audit table, rule set versions and rule rollouts
+
+Revision ID: 2026_10_19_audit_rule_versions
+Revises: 2025_08_24_init
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2026_10_19_audit_rule_versions"
+down_revision: Union[str, Sequence[str], None] = "2025_08_24_init"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# JSONB on PostgreSQL, plain JSON elsewhere (as in app/models/audit.py)
+_JSON = sa.JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "audit",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("doc_id", sa.String(), nullable=False),
+        sa.Column("stage", sa.String(), nullable=False),
+        sa.Column("input", _JSON, nullable=False),
+        sa.Column("output", _JSON, nullable=False),
+        sa.Column("model", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("duration_ms", sa.Float(), nullable=True),
+        sa.Column("input_bytes", sa.Integer(), nullable=False),
+        sa.Column("output_bytes", sa.Integer(), nullable=False),
+        sa.Column("worker", sa.String(), nullable=True),
+    )
+    op.create_index("ix_audit_doc_id", "audit", ["doc_id"])
+    op.create_index("ix_audit_stage", "audit", ["stage"])
+
+    op.create_table(
+        "rule_set_versions",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("digest", sa.String(), nullable=False),
+        sa.Column("source", sa.String(), nullable=True),
+        sa.Column("spec", _JSON, nullable=False),
+        sa.Column("rule_hashes", _JSON, nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_rule_set_versions_digest", "rule_set_versions", ["digest"])
+
+    op.create_table(
+        "rule_rollouts",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("from_version", sa.Integer(), nullable=True),
+        sa.Column("to_version", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("added", _JSON, nullable=False),
+        sa.Column("changed", _JSON, nullable=False),
+        sa.Column("removed", _JSON, nullable=False),
+        sa.Column("total_docs", sa.Integer(), nullable=False),
+        sa.Column("done_docs", sa.Integer(), nullable=False),
+        sa.Column("clauses_evaluated", sa.Integer(), nullable=False),
+        sa.Column("fires_inserted", sa.Integer(), nullable=False),
+        sa.Column("fires_deleted", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_rule_rollouts_to_version", "rule_rollouts", ["to_version"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_rule_rollouts_to_version", table_name="rule_rollouts")
+    op.drop_table("rule_rollouts")
+    op.drop_index("ix_rule_set_versions_digest", table_name="rule_set_versions")
+    op.drop_table("rule_set_versions")
+    op.drop_index("ix_audit_stage", table_name="audit")
+    op.drop_index("ix_audit_doc_id", table_name="audit")
+    op.drop_table("audit")
@@ -0,0 +1,48 @@
+"""Composite and foreign-key indexes for the per-document lookup paths
+
+Every route filters by doc_id; the guidance route resolves evidence chips by
+(doc_id, page, start, end) and fires by (doc_id, clause_id); rule rollouts
+replace fires by (rule_id, doc_id). Foreign keys pointing at clauses get their
+own index so clause deletes don't scan the child tables.
+
+Databases created by Base.metadata.create_all() may already have some of
+these, hence IF NOT EXISTS.
+
+Revision ID: 2026_10_19_hot_path_indexes
+Revises: 2026_10_19_audit_rule_versions
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2026_10_19_hot_path_indexes"
+down_revision: Union[str, Sequence[str], None] = "2026_10_19_audit_rule_versions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns)
+INDEXES = [
+    ("ix_clauses_doc_span", "clauses", ["doc_id", "page", "start", "end"]),
+    ("ix_guidance_doc_id", "guidance", ["doc_id"]),
+    ("ix_deadlines_doc_due", "deadlines", ["doc_id", "due_at"]),
+    ("ix_deadlines_source_clause_id", "deadlines", ["source_clause_id"]),
+    ("ix_policy_fires_doc_clause", "policy_fires", ["doc_id", "clause_id"]),
+    ("ix_policy_fires_clause_id", "policy_fires", ["clause_id"]),
+    ("ix_policy_fires_rule_doc", "policy_fires", ["rule_id", "doc_id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,37 @@
+"""Rule rollout batches, so a redelivered batch isn't counted twice
+
+Databases created by Base.metadata.create_all() may already have the table,
+hence IF NOT EXISTS.
+
+Revision ID: 2026_10_19_rule_rollout_batches
+Revises: 2026_10_19_hot_path_indexes
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2026_10_19_rule_rollout_batches"
+down_revision: Union[str, Sequence[str], None] = "2026_10_19_hot_path_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "rule_rollout_batches",
+        sa.Column("rollout_id", sa.Integer(), primary_key=True),
+        sa.Column("batch_key", sa.String(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("rule_rollout_batches", if_exists=True)
@@ -1,13 +1,209 @@
+import logging
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+log = logging.getLogger("titan.db")
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./titan.db")
+# Read routes use an asyncio engine; derived from DATABASE_URL unless set
+# (e.g. postgresql+asyncpg://...)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# "api" (uvicorn: sync routes run on AnyIO's 40-thread pool) or "worker"
+# (Celery prefork: one task at a time per process). workers/celery_app.py
+# selects "worker" before anything imports this module.
+DB_PROFILE = os.getenv("DB_PROFILE", "api")
+
+# An API process holds two pools, the sync engine's and the async read
+# routes' ("<profile>_async"); together they stay within the 40 connections
+# a process is budgeted.
+_PROFILES: Dict[str, Dict[str, Any]] = {
+    "api": {"pool_size": 8, "max_overflow": 22, "pool_timeout": 10, "pool_recycle": 1800},
+    "api_async": {"pool_size": 4, "max_overflow": 6, "pool_timeout": 10, "pool_recycle": 1800},
+    "worker": {"pool_size": 2, "max_overflow": 2, "pool_timeout": 30, "pool_recycle": 1800},
+}
+
+# Running behind PgBouncer in transaction mode: let PgBouncer do the pooling
+# (NullPool) and don't use server-side prepared statements.
+PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+SQLITE_WAL = os.getenv("DB_SQLITE_WAL", "true").lower() == "true"
+SLOW_CHECKOUT_MS = float(os.getenv("DB_POOL_SLOW_CHECKOUT_MS", "100"))
+
 
 class Base(DeclarativeBase):
     pass
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+
+def pool_settings(profile: str = DB_PROFILE) -> Dict[str, Any]:
+    """Pool options for `profile`; DB_<PROFILE>_<OPTION> overrides DB_<OPTION> overrides the default."""
+    base = _PROFILES.get(profile) or _PROFILES.get(profile.removesuffix("_async")) or _PROFILES["api"]
+    settings = dict(base)
+    for key in list(settings):
+        raw = os.getenv(f"DB_{profile.upper()}_{key.upper()}") or os.getenv(f"DB_{key.upper()}")
+        if raw:
+            settings[key] = int(raw)
+    return settings
+
+
+# --- checkout wait instrumentation ------------------------------------------
+
+_WAIT_BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1_000, 5_000]
+
+
+class PoolWaitStats:
+    """Time spent in pool.connect(): waiting for a free connection or opening a new one."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+            self.buckets = [0] * (len(_WAIT_BUCKETS_MS) + 1)
+
+    def record(self, wait_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += int(timed_out)
+            self.total_ms += wait_ms
+            self.max_ms = max(self.max_ms, wait_ms)
+            self.buckets[bisect_left(_WAIT_BUCKETS_MS, wait_ms)] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            bounds: List[Optional[float]] = [float(b) for b in _WAIT_BUCKETS_MS] + [None]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": self.total_ms / self.checkouts if self.checkouts else 0.0,
+                "max_wait_ms": self.max_ms,
+                "buckets": [{"upper_ms": b, "count": c} for b, c in zip(bounds, self.buckets)],
+            }
+
+
+pool_waits = PoolWaitStats()        # sync engines
+async_pool_waits = PoolWaitStats()  # async engines
+
+
+class _TimedCheckout:
+    waits: PoolWaitStats
+
+    def connect(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super().connect()
+        except Exception:
+            self.waits.record((time.perf_counter() - t0) * 1000.0, timed_out=True)
+            raise
+        wait_ms = (time.perf_counter() - t0) * 1000.0
+        self.waits.record(wait_ms)
+        if wait_ms >= SLOW_CHECKOUT_MS:
+            log.warning("db pool: checkout took %.0fms (%s)", wait_ms, self.status())
+        return conn
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    waits = pool_waits
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    waits = async_pool_waits
+
+
+def _sqlite_pragmas(dbapi_conn, _record) -> None:
+    cur = dbapi_conn.cursor()
+    try:
+        # WAL: readers don't block the writer (API reads while a worker writes)
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute("PRAGMA busy_timeout=5000")
+    finally:
+        cur.close()
+
+
+def _engine_options(u: URL, profile: str, is_async: bool = False) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {"pool_pre_ping": True}
+    connect_args: Dict[str, Any] = {}
+    if u.get_backend_name() == "sqlite" and not _is_sqlite_file(u):
+        pass  # in-memory: SQLAlchemy's default single-connection pool
+    elif PGBOUNCER:
+        kwargs["poolclass"] = NullPool
+        if u.get_driver_name() == "psycopg":
+            connect_args["prepare_threshold"] = None
+        elif u.get_driver_name() == "asyncpg":
+            connect_args["statement_cache_size"] = 0
+    else:
+        kwargs.update(poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool, **pool_settings(profile))
+    if _is_sqlite_file(u):
+        connect_args["check_same_thread"] = False
+    if connect_args:
+        kwargs["connect_args"] = connect_args
+    return kwargs
+
+
+def _is_sqlite_file(u: URL) -> bool:
+    return u.get_backend_name() == "sqlite" and u.database not in (None, "", ":memory:")
+
+
+def make_engine(url: str = DATABASE_URL, profile: str = DB_PROFILE):
+    u = make_url(url)
+    eng = create_engine(url, **_engine_options(u, profile))
+    if _is_sqlite_file(u) and SQLITE_WAL:
+        event.listen(eng, "connect", _sqlite_pragmas)
+    return eng
+
+
+def async_url(url: str = DATABASE_URL) -> str:
+    """The asyncio driver for a sync URL: psycopg (async mode) or aiosqlite."""
+    u = make_url(url)
+    if u.get_backend_name() == "postgresql" and u.get_driver_name() in ("psycopg2", "psycopg"):
+        u = u.set(drivername="postgresql+psycopg")
+    elif u.get_backend_name() == "sqlite" and u.get_driver_name() == "pysqlite":
+        u = u.set(drivername="sqlite+aiosqlite")
+    return u.render_as_string(hide_password=False)
+
+
+def make_async_engine(url: Optional[str] = None, profile: str = DB_PROFILE):
+    """Async engine with the "<profile>_async" pool (DB_<PROFILE>_ASYNC_<OPTION> overrides)."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = url or ASYNC_DATABASE_URL or async_url(DATABASE_URL)
+    u = make_url(url)
+    eng = create_async_engine(url, **_engine_options(u, f"{profile}_async", is_async=True))
+    if _is_sqlite_file(u) and SQLITE_WAL:
+        event.listen(eng.sync_engine, "connect", _sqlite_pragmas)
+    return eng
+
+
+def _pool_report(pool: Any, waits: PoolWaitStats) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        out.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow(),
+                   checked_in=pool.checkedin())
+    return {**out, **waits.snapshot()}
+
+
+def pool_status() -> Dict[str, Any]:
+    """The sync pool, and the async one (`async_pool`) once the async routes created it."""
+    out = {"profile": DB_PROFILE, **_pool_report(engine.pool, pool_waits)}
+    if _async_engine is not None:
+        out["async_pool"] = _pool_report(_async_engine.sync_engine.pool, async_pool_waits)
+    return out
+
+
+engine = make_engine()
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 def get_db():
@@ -16,3 +212,28 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Created on first use: workers never need it, and the async driver is only
+# imported by processes that serve the async routes.
+_async_engine = None
+_async_sessionmaker = None
+_async_lock = threading.Lock()
+
+
+def get_async_sessionmaker():
+    global _async_engine, _async_sessionmaker
+    if _async_sessionmaker is None:
+        with _async_lock:
+            if _async_sessionmaker is None:
+                from sqlalchemy.ext.asyncio import async_sessionmaker
+
+                _async_engine = make_async_engine()
+                _async_sessionmaker = async_sessionmaker(bind=_async_engine, autoflush=False,
+                                                         expire_on_commit=False)
+    return _async_sessionmaker
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
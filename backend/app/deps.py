@@ -1,6 +1,10 @@
 from fastapi import Depends
-from .db import get_db
+from .db import get_db, get_async_db
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 def db_dep(db: Session = Depends(get_db)):
     return db
+
+async def async_db_dep(db: AsyncSession = Depends(get_async_db)):
+    return db
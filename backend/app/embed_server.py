@@ -0,0 +1,72 @@
+# backend/app/embed_server.py
+"""
+Local embedding server: holds the sentence-transformers model once per host
+and serves every API/worker process (services/qdrant.embed is the client).
+
+    uvicorn app.embed_server:app --host 0.0.0.0 --port 8100
+
+POST /embed  {"texts": [...]}  ->  raw little-endian vectors, row-major;
+             shape in the X-Embedding-Shape header ("rows,dim"), dtype in
+             X-Embedding-Dtype ("<f4", or "<f2" with EMBED_BACKEND=onnx).
+GET  /health                   ->  model name, dimension and batching stats.
+
+Concurrent requests are coalesced into micro-batches (services/embed_batcher.py).
+"""
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Response
+from pydantic import BaseModel
+
+from .services import qdrant
+from .services.embed_batcher import Encoder, MicroBatcher
+
+MAX_TEXTS = 1024
+
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+
+
+def _model_encode(texts: List[str]) -> np.ndarray:
+    return qdrant.get_model().encode(texts, normalize_embeddings=True, batch_size=len(texts) or 1)
+
+
+def create_app(encode: Optional[Encoder] = None) -> FastAPI:
+    batcher = MicroBatcher(encode or _model_encode)
+
+    @asynccontextmanager
+    async def lifespan(_app: FastAPI):
+        if encode is None:
+            qdrant.get_model()  # load before accepting traffic
+        batcher.start()
+        yield
+        await batcher.stop()
+
+    api = FastAPI(title="Titan embedding server", lifespan=lifespan)
+    api.state.batcher = batcher
+
+    @api.post("/embed")
+    async def embed(req: EmbedRequest) -> Response:
+        if len(req.texts) > MAX_TEXTS:
+            raise HTTPException(status_code=413, detail=f"at most {MAX_TEXTS} texts per request")
+        if not req.texts:
+            return Response(b"", media_type="application/octet-stream", headers={"X-Embedding-Shape": "0,0"})
+        vectors = await batcher.embed(req.texts)
+        vectors = np.ascontiguousarray(vectors, dtype="<f2" if vectors.dtype == np.float16 else "<f4")
+        rows, dim = vectors.shape
+        return Response(vectors.tobytes(), media_type="application/octet-stream",
+                        headers={"X-Embedding-Shape": f"{rows},{dim}", "X-Embedding-Dtype": vectors.dtype.str})
+
+    @api.get("/health")
+    def health():
+        return {"ok": True, "model": qdrant.MODEL_NAME, "backend": qdrant.EMBED_BACKEND,
+                "batching": batcher.stats.snapshot()}
+
+    return api
+
+
+app = create_app()
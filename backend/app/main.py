@@ -1,10 +1,20 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from .db import engine, Base
-from .routes import ingest as r_ingest, clauses as r_clauses, guidance as r_guidance, deadlines as r_deadlines, ask as r_ask, rules as r_rules
+from .services import warmup
+from .routes import ingest as r_ingest, clauses as r_clauses, guidance as r_guidance, deadlines as r_deadlines, ask as r_ask, rules as r_rules, status as r_status, pages as r_pages
 
-app = FastAPI(title="Titan-Guidance API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Models load in the background (see services/warmup.py): GET / answers
+    # right away, GET /ready once warm-up finished
+    warmup.start(os.getenv("API_WARMUP", "embedder,qdrant"), role="api")
+    yield
+
+app = FastAPI(title="Titan-Guidance API", version="0.1.0", lifespan=lifespan)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -24,7 +34,14 @@ app.include_router(r_guidance.router)
 app.include_router(r_deadlines.router)
 app.include_router(r_ask.router)
 app.include_router(r_rules.router)
+app.include_router(r_status.router)
+app.include_router(r_pages.router)
 
 @app.get("/")
 def health():
     return {"ok": True}
+
+@app.get("/ready")
+def ready():
+    body = {"ready": warmup.ready(), "components": warmup.status()}
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
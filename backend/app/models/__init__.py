@@ -1,8 +1,8 @@
-from sqlalchemy import Column, String, Integer, Float, DateTime, Text, JSON, ForeignKey
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text, JSON, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
 import uuid
-from .db import Base
+from ..db import Base
 
 def _id(prefix="id"): return f"{prefix}_{uuid.uuid4().hex[:10]}"
 
@@ -25,10 +25,13 @@ class Clause(Base):
     confidence: Mapped[float] = mapped_column(Float, default=0.8)
     normalized: Mapped[dict] = mapped_column(JSON, default={})
 
+    # Evidence chips ("D1:14:231-560") resolve to clauses by exact span
+    __table_args__ = (Index("ix_clauses_doc_span", "doc_id", "page", "start", "end"),)
+
 class Guidance(Base):
     __tablename__ = "guidance"
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: _id("gd"))
-    doc_id: Mapped[str] = mapped_column(String, ForeignKey("documents.doc_id"))
+    doc_id: Mapped[str] = mapped_column(String, ForeignKey("documents.doc_id"), index=True)
     title: Mapped[str] = mapped_column(String)
     what: Mapped[str] = mapped_column(Text)
     action: Mapped[str | None] = mapped_column(Text)
@@ -43,13 +46,25 @@ class Deadline(Base):
     doc_id: Mapped[str] = mapped_column(String, ForeignKey("documents.doc_id"))
     title: Mapped[str] = mapped_column(String)
     due_at: Mapped[datetime] = mapped_column(DateTime)
-    source_clause_id: Mapped[str | None] = mapped_column(String, ForeignKey("clauses.id"))
+    source_clause_id: Mapped[str | None] = mapped_column(String, ForeignKey("clauses.id"), index=True)
+
+    __table_args__ = (Index("ix_deadlines_doc_due", "doc_id", "due_at"),)
 
 class PolicyFire(Base):
     __tablename__ = "policy_fires"
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: _id("pf"))
     rule_id: Mapped[str] = mapped_column(String)
     doc_id: Mapped[str] = mapped_column(String, ForeignKey("documents.doc_id"))
-    clause_id: Mapped[str] = mapped_column(String, ForeignKey("clauses.id"))
+    clause_id: Mapped[str] = mapped_column(String, ForeignKey("clauses.id"), index=True)
     severity: Mapped[str] = mapped_column(String)
     message: Mapped[str] = mapped_column(Text)
+
+    __table_args__ = (
+        Index("ix_policy_fires_doc_clause", "doc_id", "clause_id"),
+        # Rule rollouts replace fires by rule id (services/rule_versions.py)
+        Index("ix_policy_fires_rule_doc", "rule_id", "doc_id"),
+    )
+
+# Registered here so Base.metadata.create_all() also creates these tables
+from .audit import Audit  # noqa: E402, F401
+from .rules import RuleSetVersion, RuleRollout, RuleRolloutBatch  # noqa: E402, F401
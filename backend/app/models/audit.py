@@ -1,15 +1,28 @@
+from sqlalchemy import JSON
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 from ..db import Base
 
+# JSONB on PostgreSQL, plain JSON elsewhere (SQLite in dev/tests)
+_JSON = JSON().with_variant(JSONB(), "postgresql")
+
 class Audit(Base):
     __tablename__ = "audit"
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    doc_id: Mapped[str]
-    stage: Mapped[str]          # e.g. "ocr", "clauses", "summarizer"
-    input: Mapped[dict] = mapped_column(JSONB)
-    output: Mapped[dict] = mapped_column(JSONB)
+    doc_id: Mapped[str] = mapped_column(index=True)
+    stage: Mapped[str] = mapped_column(index=True)  # e.g. "ocr", "clauses", "summarizer"
+    input: Mapped[dict] = mapped_column(_JSON, default=dict)
+    output: Mapped[dict] = mapped_column(_JSON, default=dict)
     model: Mapped[str | None]
-    created_at: Mapped[datetime]
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+    # Stage timing / sizing (filled by services.audit.stage)
+    status: Mapped[str] = mapped_column(default="ok")   # "ok" | "error"
+    started_at: Mapped[datetime | None]
+    finished_at: Mapped[datetime | None]
+    duration_ms: Mapped[float | None]
+    input_bytes: Mapped[int] = mapped_column(default=0)
+    output_bytes: Mapped[int] = mapped_column(default=0)
+    worker: Mapped[str | None]
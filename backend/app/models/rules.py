@@ -0,0 +1,47 @@
+from sqlalchemy import JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+from ..db import Base
+
+# JSONB on PostgreSQL, plain JSON elsewhere (SQLite in dev/tests)
+_JSON = JSON().with_variant(JSONB(), "postgresql")
+
+class RuleSetVersion(Base):
+    """One distinct rule spec, identified by the hash of its per-rule hashes."""
+    __tablename__ = "rule_set_versions"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    digest: Mapped[str] = mapped_column(index=True)
+    source: Mapped[str | None]                      # file the spec was loaded from
+    spec: Mapped[dict] = mapped_column(_JSON)       # workers compile rules from here
+    rule_hashes: Mapped[dict] = mapped_column(_JSON)  # {rule_id: content hash}
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+class RuleRollout(Base):
+    """Re-evaluation of the added/changed rules of a new version across all documents."""
+    __tablename__ = "rule_rollouts"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    from_version: Mapped[int | None]
+    to_version: Mapped[int] = mapped_column(index=True)
+    status: Mapped[str] = mapped_column(default="running")  # "running" | "done"
+    added: Mapped[list] = mapped_column(_JSON, default=list)
+    changed: Mapped[list] = mapped_column(_JSON, default=list)
+    removed: Mapped[list] = mapped_column(_JSON, default=list)
+
+    total_docs: Mapped[int] = mapped_column(default=0)
+    done_docs: Mapped[int] = mapped_column(default=0)
+    clauses_evaluated: Mapped[int] = mapped_column(default=0)
+    fires_inserted: Mapped[int] = mapped_column(default=0)
+    fires_deleted: Mapped[int] = mapped_column(default=0)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    finished_at: Mapped[datetime | None]
+
+class RuleRolloutBatch(Base):
+    """A rollout batch whose results are counted; redelivered batches find their row here."""
+    __tablename__ = "rule_rollout_batches"
+
+    rollout_id: Mapped[int] = mapped_column(primary_key=True)
+    batch_key: Mapped[str] = mapped_column(primary_key=True)  # hash of the batch's sorted doc ids
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
@@ -1,24 +1,27 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from ..deps import db_dep
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..deps import async_db_dep
 from ..models import Clause
 from ..schemas.clause import ClauseOut, ClauseTypeEnum
 from ..schemas.common import TextSpan
 
 router = APIRouter(prefix="/docs", tags=["clauses"])
 
-@router.get("/{doc_id}/clauses", response_model=list[ClauseOut])
-def get_clauses(doc_id: str, db: Session = Depends(db_dep)):
-    rows = db.query(Clause).filter(Clause.doc_id == doc_id).all()
-    out = []
-    for c in rows:
-        ctype = ClauseTypeEnum(c.type)
-        out.append(ClauseOut(
-    id=c.id, doc_id=c.doc_id, type=ctype, parties=[],
+def _clauses_query(doc_id: str):
+    return select(Clause).where(Clause.doc_id == doc_id)
+
+def _clause_out(c: Clause) -> ClauseOut:
+    return ClauseOut(
+    id=c.id, doc_id=c.doc_id, type=ClauseTypeEnum(c.type), parties=[],
     text_span=TextSpan(doc_id=c.doc_id, page=c.page, start=c.start, end=c.end),
     text=c.text, confidence=c.confidence, normalized=c.normalized
-        ))
-    return out
+    )
+
+@router.get("/{doc_id}/clauses", response_model=list[ClauseOut])
+async def get_clauses(doc_id: str, db: AsyncSession = Depends(async_db_dep)):
+    rows = (await db.scalars(_clauses_query(doc_id))).all()
+    return [_clause_out(c) for c in rows]
 from fastapi import Header, HTTPException
 import os
 _API = os.getenv("API_KEY")
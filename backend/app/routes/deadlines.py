@@ -1,16 +1,19 @@
 from fastapi import APIRouter, Depends
 from fastapi.responses import PlainTextResponse
-from sqlalchemy.orm import Session
-from datetime import datetime
-from ..deps import db_dep
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..deps import async_db_dep
 from ..models import Deadline
 from ..services.guidance import deadlines_to_ics
 
 router = APIRouter(prefix="/docs", tags=["deadlines"])
 
+def _deadlines_query(doc_id: str):
+    return select(Deadline.id, Deadline.title, Deadline.due_at).where(Deadline.doc_id==doc_id)
+
 @router.get("/{doc_id}/deadlines.ics", response_class=PlainTextResponse)
-def deadlines_ics(doc_id: str, db: Session = Depends(db_dep)):
-    dls = db.query(Deadline).filter(Deadline.doc_id==doc_id).all()
+async def deadlines_ics(doc_id: str, db: AsyncSession = Depends(async_db_dep)):
+    dls = (await db.execute(_deadlines_query(doc_id))).all()
     payload = [{"id":d.id,"title":d.title,"due_at":d.due_at} for d in dls]
     return PlainTextResponse(content=deadlines_to_ics(doc_id, payload), media_type="text/calendar")
 from fastapi import Header, HTTPException
@@ -2,12 +2,13 @@
 from __future__ import annotations
 
 import re
-from typing import Optional
+from typing import Optional, Sequence
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..deps import db_dep
+from ..deps import async_db_dep
 from ..models import Guidance as GModel, Clause, PolicyFire
 from ..schemas.guidance import GuidanceItemOut
 
@@ -17,61 +18,49 @@ router = APIRouter(prefix="/docs", tags=["guidance"])
 _CHIP_RX = re.compile(r"^(?P<doc>[^:]+):(?P<page>\d+):(?P<start>\d+)-(?P<end>\d+)$")
 
 
-def _policy_rule_for_first_chip(
-    db: Session, doc_id: str, evidence: list[str]
-) -> tuple[Optional[str], Optional[str]]:
-    """
-    Resolve (policy_rule_id, severity) for the first evidence chip, if possible.
-    Returns (None, None) if not resolvable.
-    """
+def _parse_chip(doc_id: str, evidence: list[str]) -> Optional[tuple[int, int, int]]:
+    """(page, start, end) of the first evidence chip if it points into this doc."""
     if not evidence:
-        return None, None
-
+        return None
     m = _CHIP_RX.match(evidence[0])
-    if not m:
-        return None, None
     # ensure same doc; otherwise ignore
-    if m.group("doc") != doc_id:
-        return None, None
+    if not m or m.group("doc") != doc_id:
+        return None
+    return int(m.group("page")), int(m.group("start")), int(m.group("end"))
 
-    page = int(m.group("page"))
-    start = int(m.group("start"))
-    end = int(m.group("end"))
 
-    clause = (
-        db.query(Clause)
-        .filter(
+def _spans_query(doc_id: str, spans: set[tuple[int, int, int]]):
+    """
+    Resolve (policy_rule_id, severity) for many chip spans with one query:
+    clauses matched by (doc_id, page, start, end) tuple-IN, left-joined to their
+    fires, ordered so that `_first_per_span` keeps the first clause per span and
+    then that clause's first fire, both by id.
+    """
+    return (
+        select(Clause.page, Clause.start, Clause.end, Clause.id, PolicyFire.rule_id, PolicyFire.severity)
+        .outerjoin(PolicyFire, and_(PolicyFire.doc_id == doc_id, PolicyFire.clause_id == Clause.id))
+        .where(
             Clause.doc_id == doc_id,
-            Clause.page == page,
-            Clause.start == start,
-            Clause.end == end,
-        )
-        .first()
-    )
-    if not clause:
-        return None, None
-
-    fire = (
-        db.query(PolicyFire)
-        .filter(
-            PolicyFire.doc_id == doc_id,
-            PolicyFire.clause_id == clause.id,
+            tuple_(Clause.page, Clause.start, Clause.end).in_(sorted(spans)),
         )
-        .first()
+        .order_by(Clause.id, PolicyFire.id)
     )
-    if not fire:
-        return None, None
 
-    return fire.rule_id, fire.severity
 
+def _first_per_span(rows) -> dict[tuple[int, int, int], tuple[Optional[str], Optional[str]]]:
+    # A span whose clause has no fire resolves to (None, None)
+    out: dict[tuple[int, int, int], tuple[Optional[str], Optional[str]]] = {}
+    for page, start, end, _clause_id, rule_id, severity in rows:
+        out.setdefault((page, start, end), (rule_id, severity))
+    return out
 
-@router.get("/{doc_id}/guidance", response_model=list[GuidanceItemOut])
-def get_guidance(doc_id: str, db: Session = Depends(db_dep)) -> list[GuidanceItemOut]:
-    rows = db.query(GModel).filter(GModel.doc_id == doc_id).all()
+
+def _guidance_items(doc_id: str, rows: Sequence[GModel], chips: dict, resolved: dict) -> list[GuidanceItemOut]:
     out: list[GuidanceItemOut] = []
 
     for g in rows:
-        policy_rule, severity = _policy_rule_for_first_chip(db, doc_id, g.evidence or [])
+        chip = chips[g.id]
+        policy_rule, severity = resolved.get(chip, (None, None)) if chip else (None, None)
 
         # Prefer the stored risk (set by composer); if absent, fall back to severity or "low"
         risk_value = g.risk or severity or "low"
@@ -92,6 +81,15 @@ def get_guidance(doc_id: str, db: Session = Depends(db_dep)) -> list[GuidanceIte
         )
 
     return out
+
+
+@router.get("/{doc_id}/guidance", response_model=list[GuidanceItemOut])
+async def get_guidance(doc_id: str, db: AsyncSession = Depends(async_db_dep)) -> list[GuidanceItemOut]:
+    rows = (await db.scalars(select(GModel).where(GModel.doc_id == doc_id))).all()
+    chips = {g.id: _parse_chip(doc_id, g.evidence or []) for g in rows}
+    spans = {c for c in chips.values() if c is not None}
+    resolved = _first_per_span(await db.execute(_spans_query(doc_id, spans))) if spans else {}
+    return _guidance_items(doc_id, rows, chips, resolved)
 from fastapi import Header, HTTPException
 import os
 _API = os.getenv("API_KEY")
@@ -0,0 +1,36 @@
+# backend/app/routes/pages.py
+from __future__ import annotations
+
+from typing import Literal
+
+from fastapi import APIRouter, Header, HTTPException, Path, Response
+from starlette.concurrency import run_in_threadpool
+
+from ..services import page_images
+
+router = APIRouter(prefix="/docs", tags=["pages"])
+
+
+@router.get("/{doc_id}/pages/{n}", response_class=Response,
+            responses={200: {"content": {"image/jpeg": {}}}, 304: {"description": "Not modified"}})
+async def get_page(
+    doc_id: str,
+    n: int = Path(..., ge=1),
+    size: Literal["thumb", "preview", "full"] = "preview",
+    if_none_match: str | None = Header(None),
+) -> Response:
+    """
+    Page `n` (1-based) as JPEG, longest side 256 (thumb), 1024 (preview) or
+    2048 (full) pixels, rendered on first request (services/page_images.py).
+    """
+    tag = page_images.etag(doc_id, n, size)
+    headers = {"ETag": tag, "Cache-Control": page_images.CACHE_CONTROL}
+    try:
+        if if_none_match and page_images.matches(if_none_match, tag):
+            # the document or page may be gone since the client cached it
+            await run_in_threadpool(page_images.check_page, doc_id, n)
+            return Response(status_code=304, headers=headers)
+        body = await run_in_threadpool(page_images.get_page_image, doc_id, n, size)
+    except page_images.PageNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return Response(body, media_type="image/jpeg", headers=headers)
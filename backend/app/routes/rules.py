@@ -1,32 +1,56 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from ..deps import db_dep
-from ..services.rules import evaluate_rules_yaml
-from ..models import Clause, PolicyFire
-import os, yaml
+from ..services.rule_compiler import parse_spec_bytes
+from ..services.rule_sql import find_fires
+from ..services import rule_registry, rule_versions
+from ..services.bulk_write import replace_rows
+from ..models import PolicyFire, _id
+from ..models.rules import RuleRollout
+from ..schemas.rules import RolloutOut
 
 router = APIRouter(prefix="/rules", tags=["rules"])
 
 @router.post("/validate")
-def validate(doc_id: str, db: Session = Depends(db_dep)):
-    rules_path = os.getenv("RULES_PATH", "/configs/rules.yaml")
-    spec = yaml.safe_load(open(rules_path))
-    clauses = []
-    for c in db.query(Clause).filter(Clause.doc_id==doc_id).all():
-        clauses.append({
-            "id": c.id, "doc_id": c.doc_id, "type": c.type, "page": c.page,
-            "start": c.start, "end": c.end, "text": c.text,
-            "confidence": c.confidence, "normalized": c.normalized
-        })
-    fires = evaluate_rules_yaml(spec, clauses, doc_id)
-    for f in fires:
-        db.add(PolicyFire(**f))
+def validate(doc_id: str, tenant: str | None = None, db: Session = Depends(db_dep)):
+    ruleset = rule_registry.for_tenant(tenant)  # compiled once per process, hot-reloaded
+    fires = find_fires(db, ruleset, doc_id)  # matched in SQL where the rule translates exactly
+    # Re-validating replaces this rule set's fires for the document instead of duplicating them
+    rule_ids = sorted({str(r.rule_id) for r in ruleset.rules})
+    stats = replace_rows(db, PolicyFire, [PolicyFire.doc_id == doc_id, PolicyFire.rule_id.in_(rule_ids)],
+                         [{**f, "id": _id("pf")} for f in fires])
     db.commit()
-    return {"doc_id": doc_id, "fires": fires}
-from fastapi import Header, HTTPException
-import os
-_API = os.getenv("API_KEY")
+    return {"doc_id": doc_id, "fires": fires, "writes": [stats.report()]}
 
-def require_api_key(x_api_key: str = Header(None)):
-    if _API and x_api_key != _API:
-        raise HTTPException(status_code=401, detail="Unauthorized")
+@router.post("/rollouts", response_model=RolloutOut | None)
+def start_rollout(db: Session = Depends(db_dep)):
+    """
+    Register the current rules file as a new version and re-evaluate only the
+    added/changed rules across all documents (background batches).
+    Returns null when the file matches the active version.
+    """
+    path = rule_registry.registry.default_path
+    with open(path, "rb") as f:
+        spec = parse_spec_bytes(f.read(), path)
+    try:
+        rollout, batches = rule_versions.start_rollout(db, spec, source=path)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if rollout is None:
+        return None
+    if batches:
+        from ..services.pipeline import enqueue_rule_rollout
+        enqueue_rule_rollout(rollout.id, batches)
+    return RolloutOut(**rule_versions.progress(rollout))
+
+@router.get("/rollouts/{rollout_id}", response_model=RolloutOut)
+def get_rollout(rollout_id: int, db: Session = Depends(db_dep)):
+    rollout = db.get(RuleRollout, rollout_id)
+    if rollout is None:
+        raise HTTPException(status_code=404, detail="Rollout not found")
+    return RolloutOut(**rule_versions.progress(rollout))
+
+@router.get("/active")
+def active_rules():
+    """Rule files loaded in this process: version, digest, reload errors, tenants."""
+    return rule_registry.active()
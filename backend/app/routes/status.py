@@ -0,0 +1,108 @@
+# backend/app/routes/status.py
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from ..db import pool_status
+from ..deps import db_dep
+from ..models import Document, Audit
+from ..schemas.status import DocStatusOut, StageTimingOut, StageLatencyOut, HistogramBucket, DbPoolOut
+
+router = APIRouter(prefix="", tags=["status"])
+
+# Histogram upper bounds (ms); the last bucket is +Inf
+_BUCKETS_MS = [100, 250, 500, 1_000, 2_500, 5_000, 10_000, 30_000, 60_000, 120_000, 300_000, 600_000]
+
+
+@router.get("/docs/{doc_id}/status", response_model=DocStatusOut)
+def get_status(doc_id: str, db: Session = Depends(db_dep)) -> DocStatusOut:
+    doc = db.get(Document, doc_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    rows = (
+        db.query(Audit)
+        .filter(Audit.doc_id == doc_id)
+        .order_by(Audit.started_at, Audit.id)
+        .all()
+    )
+    stages = [
+        StageTimingOut(
+            stage=a.stage,
+            status=a.status,
+            started_at=a.started_at,
+            finished_at=a.finished_at,
+            duration_ms=a.duration_ms,
+            input_bytes=a.input_bytes or 0,
+            output_bytes=a.output_bytes or 0,
+            worker=a.worker,
+        )
+        for a in rows
+    ]
+    return DocStatusOut(
+        doc_id=doc.doc_id,
+        title=doc.title,
+        status=doc.status,
+        created_at=doc.created_at,
+        total_ms=sum(s.duration_ms or 0.0 for s in stages),
+        stages=stages,
+    )
+
+
+@router.get("/stats/stage-latency", response_model=list[StageLatencyOut])
+def stage_latency(
+    since: Optional[datetime] = None,
+    db: Session = Depends(db_dep),
+) -> list[StageLatencyOut]:
+    """
+    Per-stage latency histogram over successful stage runs (optionally since a timestamp).
+    Bucketing and counting happen in SQL so this stays cheap on large audit tables.
+    """
+    bucket = case(
+        *[(Audit.duration_ms <= b, i) for i, b in enumerate(_BUCKETS_MS)],
+        else_=len(_BUCKETS_MS),
+    ).label("bucket")
+
+    base = [Audit.status == "ok", Audit.duration_ms.is_not(None)]
+    if since is not None:
+        base.append(Audit.started_at >= since)
+
+    summary = db.execute(
+        select(Audit.stage, func.count(), func.avg(Audit.duration_ms), func.max(Audit.duration_ms))
+        .where(*base)
+        .group_by(Audit.stage)
+        .order_by(Audit.stage)
+    ).all()
+    counts = db.execute(
+        select(Audit.stage, bucket, func.count()).where(*base).group_by(Audit.stage, bucket)
+    ).all()
+
+    per_stage: dict[str, list[int]] = {}
+    for stage, b, n in counts:
+        per_stage.setdefault(stage, [0] * (len(_BUCKETS_MS) + 1))[int(b)] = n
+
+    bounds: list[Optional[float]] = [float(b) for b in _BUCKETS_MS] + [None]
+    return [
+        StageLatencyOut(
+            stage=stage,
+            count=n,
+            avg_ms=float(avg or 0.0),
+            max_ms=float(mx or 0.0),
+            buckets=[
+                HistogramBucket(upper_ms=le, count=c)
+                for le, c in zip(bounds, per_stage.get(stage, [0] * len(bounds)))
+            ],
+        )
+        for stage, n, avg, mx in summary
+    ]
+
+
+@router.get("/stats/db-pool", response_model=DbPoolOut)
+def db_pool() -> DbPoolOut:
+    """Connection pool state and checkout wait histogram for this process (see app/db.py)."""
+    return DbPoolOut(**pool_status())
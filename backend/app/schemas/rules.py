@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List
+
+class RolloutOut(BaseModel):
+    id: int
+    from_version: int | None = None
+    to_version: int
+    status: str
+    added: List[str] = []
+    changed: List[str] = []
+    removed: List[str] = []
+    total_docs: int = 0
+    done_docs: int = 0
+    percent: float = 0.0
+    clauses_evaluated: int = 0
+    fires_inserted: int = 0
+    fires_deleted: int = 0
+    elapsed_s: float = 0.0
+    docs_per_s: float = 0.0
+    clauses_per_s: float = 0.0
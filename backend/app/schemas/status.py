@@ -0,0 +1,48 @@
+from pydantic import BaseModel
+from typing import List
+from datetime import datetime
+
+class StageTimingOut(BaseModel):
+    stage: str
+    status: str
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    duration_ms: float | None = None
+    input_bytes: int = 0
+    output_bytes: int = 0
+    worker: str | None = None
+
+class DocStatusOut(BaseModel):
+    doc_id: str
+    title: str | None = None
+    status: str
+    created_at: datetime | None = None
+    total_ms: float = 0.0
+    stages: List[StageTimingOut] = []
+
+class HistogramBucket(BaseModel):
+    upper_ms: float | None  # upper bound; None = +Inf
+    count: int
+
+class StageLatencyOut(BaseModel):
+    stage: str
+    count: int
+    avg_ms: float
+    max_ms: float
+    buckets: List[HistogramBucket]
+
+class DbPoolStatsOut(BaseModel):
+    pool: str
+    size: int | None = None
+    checked_out: int | None = None
+    overflow: int | None = None
+    checked_in: int | None = None
+    checkouts: int
+    timeouts: int
+    avg_wait_ms: float
+    max_wait_ms: float
+    buckets: List[HistogramBucket]
+
+class DbPoolOut(DbPoolStatsOut):
+    profile: str
+    async_pool: DbPoolStatsOut | None = None  # async read routes' engine, once created
@@ -0,0 +1,62 @@
+"""
+Re-derive the deadlines of every document from its clauses
+(services/deadlines.py).
+
+Documents are processed in batches: each batch's clauses are loaded with one
+query, resolved in memory and written back with one set-based replace, then
+committed. Narrow the run with --doc-prefix; --dry-run resolves without
+writing.
+
+    python -m app.scripts.bulk_deadlines
+    python -m app.scripts.bulk_deadlines --doc-prefix acme- --docs-per-batch 1000
+"""
+import argparse
+import sys
+import time
+
+from sqlalchemy import select
+
+from app.db import SessionLocal
+from app.models import Clause
+from app.services.deadlines import extract_deadlines, iter_batches, load_clauses, run_batch
+
+
+def _doc_ids(db, prefix):
+    q = select(Clause.doc_id).distinct().order_by(Clause.doc_id)
+    if prefix:
+        q = q.where(Clause.doc_id.startswith(prefix, autoescape=True))
+    return list(db.scalars(q))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--doc-prefix", default="")
+    ap.add_argument("--docs-per-batch", type=int, default=500)
+    ap.add_argument("--dry-run", action="store_true", help="resolve and count, write nothing")
+    args = ap.parse_args()
+
+    db = SessionLocal()
+    n_docs = n_deadlines = 0
+    t0 = time.perf_counter()
+    try:
+        docs = _doc_ids(db, args.doc_prefix)
+        for batch in iter_batches(docs, args.docs_per_batch):
+            if args.dry_run:
+                by_doc, created = load_clauses(db, batch)
+                n = sum(len(extract_deadlines(cls, reference=created.get(d))) for d, cls in by_doc.items())
+            else:
+                n, _ = run_batch(db, batch)
+                db.commit()
+            n_docs += len(batch)
+            n_deadlines += n
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - t0
+    rate = n_docs / elapsed if elapsed else 0.0
+    print(f"docs {n_docs} | deadlines {n_deadlines}{' (dry run)' if args.dry_run else ''} | "
+          f"{elapsed:.2f}s ({rate:,.0f} docs/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
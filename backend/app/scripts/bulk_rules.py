@@ -0,0 +1,91 @@
+"""
+Evaluate the rule set against every clause in the database with the NumPy
+bulk evaluator (services/rules_bulk.py).
+
+The schema has no tenant column, so a "tenant" is the database DATABASE_URL
+points at, optionally narrowed to documents whose id starts with --doc-prefix.
+Documents are processed in batches; each batch is loaded with one query into
+a ClauseTable and evaluated in one pass.
+
+    python -m app.scripts.bulk_rules --rules /configs/rules.yaml --out fires.jsonl
+    python -m app.scripts.bulk_rules --write   # replace policy_fires per document
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from sqlalchemy import delete, insert, select
+
+from app.db import SessionLocal
+from app.models import Clause, PolicyFire, _id
+from app.services.rule_compiler import load_compiled
+from app.services.rules_bulk import CLAUSE_FIELDS, ClauseTable, evaluate_bulk
+
+_COLUMNS = [getattr(Clause, name) for name in CLAUSE_FIELDS]
+
+
+def _doc_ids(db, prefix):
+    q = select(Clause.doc_id).distinct().order_by(Clause.doc_id)
+    if prefix:
+        q = q.where(Clause.doc_id.startswith(prefix, autoescape=True))
+    return list(db.scalars(q))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rules", default=os.getenv("RULES_PATH", "/configs/rules.yaml"))
+    ap.add_argument("--doc-prefix", default="")
+    ap.add_argument("--docs-per-batch", type=int, default=500)
+    ap.add_argument("--out", help="write fires as JSON lines to this file ('-' for stdout)")
+    ap.add_argument("--write", action="store_true", help="replace policy_fires of every evaluated document")
+    args = ap.parse_args()
+
+    ruleset = load_compiled(args.rules)
+    out = None
+    if args.out:
+        out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+
+    db = SessionLocal()
+    n_clauses = n_fires = 0
+    t_load = t_eval = t_write = 0.0
+    try:
+        docs = _doc_ids(db, args.doc_prefix)
+        for i in range(0, len(docs), args.docs_per_batch):
+            batch = docs[i:i + args.docs_per_batch]
+
+            t0 = time.perf_counter()
+            rows = db.execute(select(*_COLUMNS).where(Clause.doc_id.in_(batch))).all()
+            table = ClauseTable.from_rows(rows)
+            t1 = time.perf_counter()
+            fires = evaluate_bulk(ruleset, table).fires()
+            t2 = time.perf_counter()
+
+            if out is not None:
+                for f in fires:
+                    out.write(json.dumps(f, default=str) + "\n")
+            if args.write:
+                db.execute(delete(PolicyFire).where(PolicyFire.doc_id.in_(batch)))
+                if fires:
+                    db.execute(insert(PolicyFire), [{**f, "id": _id("pf")} for f in fires])
+                db.commit()
+            t3 = time.perf_counter()
+
+            n_clauses += len(table)
+            n_fires += len(fires)
+            t_load, t_eval, t_write = t_load + t1 - t0, t_eval + t2 - t1, t_write + t3 - t2
+    finally:
+        db.close()
+        if out is not None and out is not sys.stdout:
+            out.close()
+
+    rate = n_clauses / t_eval if t_eval else 0.0
+    print(f"rules {len(ruleset.rules)} ({ruleset.digest[:12] or 'inline'}) | docs {len(docs)} | "
+          f"clauses {n_clauses} | fires {n_fires}", file=sys.stderr)
+    print(f"load {t_load:.2f}s | evaluate {t_eval:.2f}s ({rate:,.0f} clauses/s) | output {t_write:.2f}s",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Export the embedding model (EMBED_MODEL) to ONNX with int8 dynamic
+quantization for EMBED_BACKEND=onnx (services/embed_onnx.py).
+
+Needs sentence-transformers/torch, so run it once on a build machine; the
+output directory is all the embedding server needs at run time. --check
+compares the exported model with the PyTorch one on a few sample texts.
+
+    python -m app.scripts.export_onnx_embedder --out /models/embedder-onnx --check
+"""
+import argparse
+import json
+import sys
+
+from app.services.embed_onnx import OnnxEmbedder, cosine_parity, export
+from app.services.qdrant import MODEL_NAME
+
+SAMPLES = [
+    "The Supplier's aggregate liability shall not exceed the fees paid in the twelve months preceding the claim.",
+    "Either party may terminate this Agreement on ninety (90) days' written notice.",
+    "This Agreement renews automatically for successive one-year terms.",
+    "Governing law: England and Wales.",
+]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default=MODEL_NAME)
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--opset", type=int, default=17)
+    ap.add_argument("--check", action="store_true", help="report cosine similarity to the PyTorch model")
+    args = ap.parse_args()
+
+    config = export(args.model, args.out, opset=args.opset)
+    print(json.dumps(config, indent=2))
+    if args.check:
+        from sentence_transformers import SentenceTransformer
+        reference = SentenceTransformer(args.model, device="cpu").encode(SAMPLES, normalize_embeddings=True)
+        candidate = OnnxEmbedder(args.out).encode(SAMPLES)
+        cos = cosine_parity(reference, candidate)
+        print(f"cosine vs PyTorch: min {min(cos):.4f}  mean {sum(cos) / len(cos):.4f}")
+        if min(cos) < 0.99:
+            sys.exit("parity check failed (min cosine < 0.99)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# backend/app/services/artifact_cache.py
+"""
+Size-bounded on-disk read-through cache for storage objects on worker nodes.
+
+Layout under ARTIFACT_CACHE_DIR:
+    <sha[:2]>/<sha>        object body (sha = sha256 of the storage key)
+    <sha[:2]>/<sha>.etag   ETag the body was fetched with
+    .lock                  flock'd while evicting
+
+Every read revalidates with the backend (conditional GET / HEAD on ETag), so a
+re-run that rewrites an artifact is picked up; an unchanged object costs one
+small request instead of a full download. Bodies and ETag files are written
+to temp files and renamed into place, so concurrent worker processes on the
+same host never see partial entries. A hit bumps the entry's mtime and
+eviction removes least-recently-used entries until the cache fits in
+ARTIFACT_CACHE_MAX_MB.
+"""
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Callable, Optional, Tuple
+
+_MB = 1024 * 1024
+
+CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "titan-artifacts"))
+MAX_BYTES = int(float(os.getenv("ARTIFACT_CACHE_MAX_MB", "1024")) * _MB)
+
+
+def enabled() -> bool:
+    return MAX_BYTES > 0
+
+
+def _paths(key: str) -> Tuple[str, str]:
+    h = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    base = os.path.join(CACHE_DIR, h[:2], h)
+    return base, base + ".etag"
+
+
+def _read_etag(etag_path: str) -> Optional[str]:
+    try:
+        with open(etag_path, "r", encoding="utf-8") as f:
+            return f.read() or None
+    except FileNotFoundError:
+        return None
+
+
+def _tmp_for(key: str) -> str:
+    data_path, _ = _paths(key)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(data_path), prefix=".tmp-")
+    os.close(fd)
+    return tmp
+
+
+def _commit(key: str, tmp: str, etag: Optional[str]) -> None:
+    """Move a fully written temp body into place, then record its ETag."""
+    data_path, etag_path = _paths(key)
+    # Invalidate first: a reader must never pair a new ETag with an old body
+    try:
+        os.unlink(etag_path)
+    except FileNotFoundError:
+        pass
+    os.replace(tmp, data_path)
+    if etag:
+        etag_tmp = _tmp_for(key)
+        with open(etag_tmp, "w", encoding="utf-8") as f:
+            f.write(etag)
+        os.replace(etag_tmp, etag_path)
+    _evict()
+
+
+def _discard(tmp: str) -> None:
+    try:
+        os.unlink(tmp)
+    except FileNotFoundError:
+        pass
+
+
+def _touch(path: str) -> None:
+    try:
+        os.utime(path, None)
+    except FileNotFoundError:
+        pass
+
+
+def get(key: str, fetch: Callable[[str, Optional[str]], Tuple[str, Optional[bytes], Optional[str]]]) -> Optional[bytes]:
+    """
+    Read-through for small/medium objects. `fetch(key, if_none_match)` returns
+    (status, body, etag) with status "ok" | "not_modified" | "missing".
+    """
+    data_path, etag_path = _paths(key)
+    status, body, etag = fetch(key, _read_etag(etag_path))
+    if status == "not_modified":
+        try:
+            with open(data_path, "rb") as f:
+                body = f.read()
+            _touch(data_path)
+            return body
+        except FileNotFoundError:
+            # Evicted between validation and read: fetch unconditionally
+            status, body, etag = fetch(key, None)
+    if status == "missing" or body is None:
+        return None
+    tmp = _tmp_for(key)
+    try:
+        with open(tmp, "wb") as f:
+            f.write(body)
+        _commit(key, tmp, etag)
+    finally:
+        _discard(tmp)
+    return body
+
+
+def put(key: str, body: bytes, etag: Optional[str]) -> None:
+    """Write-through after an upload, so the next stage on this node gets a hit."""
+    if not etag:
+        return
+    tmp = _tmp_for(key)
+    try:
+        with open(tmp, "wb") as f:
+            f.write(body)
+        _commit(key, tmp, etag)
+    finally:
+        _discard(tmp)
+
+
+def open_file(key: str, fetch_to_file: Callable[[str, BinaryIO, Optional[str]], Tuple[str, Optional[str]]]) -> Optional[BinaryIO]:
+    """
+    Read-through for large objects, returned as an open local file; the body is
+    streamed to disk and never held in memory. `fetch_to_file(key, fileobj,
+    if_none_match)` writes the object into `fileobj` unless it is unchanged and
+    returns (status, etag).
+    """
+    data_path, etag_path = _paths(key)
+    cached_etag = _read_etag(etag_path) if os.path.exists(data_path) else None
+    tmp = _tmp_for(key)
+    try:
+        with open(tmp, "wb") as out:
+            status, etag = fetch_to_file(key, out, cached_etag)
+        if status == "not_modified":
+            try:
+                f = open(data_path, "rb")
+                _touch(data_path)
+                return f
+            except FileNotFoundError:
+                # Evicted between validation and open: fetch unconditionally
+                with open(tmp, "wb") as out:
+                    status, etag = fetch_to_file(key, out, None)
+        if status == "missing":
+            return None
+        # Open before committing: the handle survives the rename and any eviction
+        f = open(tmp, "rb")
+        _commit(key, tmp, etag)
+        return f
+    finally:
+        _discard(tmp)
+
+
+def _evict() -> None:
+    if not os.path.isdir(CACHE_DIR):
+        return
+    lock_path = os.path.join(CACHE_DIR, ".lock")
+    with open(lock_path, "a") as lock:
+        # Non-blocking: if another process is already evicting, let it finish the job
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+        try:
+            entries = []
+            total = 0
+            for sub in os.scandir(CACHE_DIR):
+                if not sub.is_dir():
+                    continue
+                for e in os.scandir(sub.path):
+                    if e.name.endswith(".etag") or e.name.startswith(".tmp-"):
+                        continue
+                    try:
+                        st = e.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, e.path))
+                    total += st.st_size
+            if total <= MAX_BYTES:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                for p in (path + ".etag", path):
+                    try:
+                        os.unlink(p)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+                if total <= MAX_BYTES:
+                    break
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def clear() -> None:
+    """Remove every cached entry (tests / ops)."""
+    import shutil
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+
+def stats() -> dict:
+    files = size = 0
+    if os.path.isdir(CACHE_DIR):
+        for sub in os.scandir(CACHE_DIR):
+            if sub.is_dir():
+                for e in os.scandir(sub.path):
+                    if not e.name.endswith(".etag") and not e.name.startswith(".tmp-"):
+                        files += 1
+                        size += e.stat().st_size
+    return {"dir": CACHE_DIR, "entries": files, "bytes": size, "max_bytes": MAX_BYTES}
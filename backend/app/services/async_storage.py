@@ -0,0 +1,59 @@
+# backend/app/services/async_storage.py
+"""
+Asyncio front-end for services.storage, for use from `async def` routes.
+
+Each call runs the blocking boto3/filesystem operation in a worker thread, so
+the event loop keeps serving other requests during an upload. Storage calls
+get their own capacity limiter (STORAGE_ASYNC_CONCURRENCY) instead of sharing
+AnyIO's default thread pool, so a burst of large uploads cannot starve the
+threads FastAPI uses for sync endpoints and dependencies.
+"""
+from __future__ import annotations
+
+import os
+from functools import partial
+from typing import Any, BinaryIO, Callable, Optional, TypeVar
+
+import anyio
+import anyio.to_thread
+
+from . import storage
+
+T = TypeVar("T")
+
+_CONCURRENCY = int(os.getenv("STORAGE_ASYNC_CONCURRENCY", "16"))
+_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def _get_limiter() -> anyio.CapacityLimiter:
+    # Created lazily: a limiter must be built inside a running event loop
+    global _limiter
+    if _limiter is None:
+        _limiter = anyio.CapacityLimiter(_CONCURRENCY)
+    return _limiter
+
+
+async def _run(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await anyio.to_thread.run_sync(partial(fn, *args, **kwargs), limiter=_get_limiter())
+
+
+async def ensure_bucket() -> None:
+    await _run(storage.ensure_bucket)
+
+async def put_stream(key: str, fileobj: BinaryIO, content_type: str = "application/octet-stream") -> None:
+    await _run(storage.put_stream, key, fileobj, content_type=content_type)
+
+async def put_bytes(key: str, b: bytes, content_type: str = "application/octet-stream") -> None:
+    await _run(storage.put_bytes, key, b, content_type=content_type)
+
+async def get_bytes(key: str) -> bytes | None:
+    return await _run(storage.get_bytes, key)
+
+async def put_json(key: str, data: dict) -> None:
+    await _run(storage.put_json, key, data)
+
+async def get_json(key: str) -> dict | None:
+    return await _run(storage.get_json, key)
+
+async def object_size(key: str) -> int | None:
+    return await _run(storage.object_size, key)
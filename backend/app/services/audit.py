@@ -0,0 +1,206 @@
+# backend/app/services/audit.py
+"""
+Stage timing recorder for the ingestion pipeline.
+
+Every pipeline task runs inside `stage(doc_id, name)`, which:
+  - moves Document.status to the stage name (or "failed" on error),
+  - measures wall time and the bytes read/written through services.storage,
+  - buffers one Audit row per stage and writes the buffer in batches.
+
+Buffered rows are flushed when AUDIT_BATCH_SIZE rows are pending, when the
+oldest pending row is AUDIT_FLUSH_SECONDS old, on stage failure, at the end of
+a document's chain (`complete`) and on worker shutdown. The age check runs on
+a background thread in each process, so rows don't wait in a worker process
+that has gone idle (stages of one document run in different processes, and
+`complete` only flushes its own).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import insert, update
+
+from ..db import SessionLocal
+from ..models import Document
+from ..models.audit import Audit
+
+log = logging.getLogger("titan.audit")
+
+_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "50"))
+_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "5"))
+
+_buffer: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+_oldest: Optional[float] = None   # monotonic time the oldest pending row was buffered
+_flusher_pid: Optional[int] = None
+_TICK_SECONDS = 1.0
+
+
+@dataclass
+class StageRecord:
+    doc_id: str
+    stage: str
+    model: Optional[str] = None
+    input: Dict[str, Any] = field(default_factory=dict)
+    output: Dict[str, Any] = field(default_factory=dict)
+    input_bytes: int = 0
+    output_bytes: int = 0
+
+
+_current: ContextVar[Optional[StageRecord]] = ContextVar("audit_stage", default=None)
+
+
+def worker_id() -> str:
+    # Computed per call: prefork workers change pid after the module is imported
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def track_io(direction: str, nbytes: int) -> None:
+    """Attribute `nbytes` read ("in") or written ("out") to the running stage, if any."""
+    rec = _current.get()
+    if rec is None:
+        return
+    if direction == "in":
+        rec.input_bytes += nbytes
+    else:
+        rec.output_bytes += nbytes
+
+
+def set_status(doc_id: str, status: str) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(update(Document).where(Document.doc_id == doc_id).values(status=status))
+        db.commit()
+    finally:
+        db.close()
+
+
+@contextmanager
+def stage(doc_id: str, name: str, model: Optional[str] = None) -> Iterator[StageRecord]:
+    """
+    Time a pipeline stage. The caller may fill `rec.output` with the stage result;
+    storage reads/writes made inside the block are counted automatically.
+    """
+    rec = StageRecord(doc_id=doc_id, stage=name, model=model, input={"doc_id": doc_id})
+    token = _current.set(rec)
+    _safe(set_status, doc_id, name)
+    started_at = datetime.utcnow()
+    t0 = time.perf_counter()
+    status = "ok"
+    try:
+        yield rec
+    except BaseException as e:
+        status = "error"
+        rec.output = {**rec.output, "error": f"{type(e).__name__}: {e}"}
+        raise
+    finally:
+        _current.reset(token)
+        duration_ms = (time.perf_counter() - t0) * 1000.0
+        _enqueue({
+            "doc_id": doc_id,
+            "stage": name,
+            "input": rec.input,
+            "output": rec.output,
+            "model": rec.model,
+            "created_at": datetime.utcnow(),
+            "status": status,
+            "started_at": started_at,
+            "finished_at": datetime.utcnow(),
+            "duration_ms": duration_ms,
+            "input_bytes": rec.input_bytes,
+            "output_bytes": rec.output_bytes,
+            "worker": worker_id(),
+        })
+        if status == "error":
+            _safe(set_status, doc_id, "failed")
+            _safe(flush)
+
+
+def complete(doc_id: str) -> None:
+    """Mark a document as fully processed and push its pending audit rows."""
+    _safe(set_status, doc_id, "completed")
+    _safe(flush)
+
+
+def _due() -> bool:
+    with _lock:
+        return bool(_buffer) and (len(_buffer) >= _BATCH_SIZE or
+                                  time.monotonic() - (_oldest or 0.0) >= _FLUSH_SECONDS)
+
+
+def _enqueue(row: Dict[str, Any]) -> None:
+    global _oldest
+    with _lock:
+        if not _buffer:
+            _oldest = time.monotonic()
+        _buffer.append(row)
+    _start_flusher()
+    if _due():
+        _safe(flush)
+
+
+def _flusher() -> None:
+    while True:
+        time.sleep(_TICK_SECONDS)
+        if _due():
+            _safe(flush)
+
+
+def _start_flusher() -> None:
+    # One daemon thread per process; started lazily so prefork children get their own
+    global _flusher_pid
+    pid = os.getpid()
+    if _flusher_pid == pid:
+        return
+    with _lock:
+        if _flusher_pid == pid:
+            return
+        _flusher_pid = pid
+    threading.Thread(target=_flusher, name="audit-flush", daemon=True).start()
+
+
+def flush() -> int:
+    """Write all buffered audit rows in one executemany. Returns the number written."""
+    global _oldest
+    with _lock:
+        rows = _buffer[:]
+        _buffer.clear()
+        _oldest = None
+    if not rows:
+        return 0
+    db = SessionLocal()
+    try:
+        db.execute(insert(Audit), rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        # Put rows back so a later flush can retry them
+        with _lock:
+            _buffer[:0] = rows
+            _oldest = time.monotonic()
+        raise
+    finally:
+        db.close()
+    return len(rows)
+
+
+def pending() -> int:
+    with _lock:
+        return len(_buffer)
+
+
+def _safe(fn, *args) -> None:
+    # Auditing must never turn a successful stage into a failed task
+    try:
+        fn(*args)
+    except Exception:
+        log.exception("audit: %s failed", getattr(fn, "__name__", fn))
@@ -0,0 +1,116 @@
+# backend/app/services/bulk_write.py
+"""
+Set-based writes for the pipeline stages that (re)generate rows per document.
+
+`replace_rows` deletes the previous rows with one DELETE ... WHERE and writes
+the new ones as plain dicts, never ORM instances:
+
+  - PostgreSQL (psycopg 3) with at least BULK_COPY_MIN_ROWS rows: COPY FROM
+    STDIN on the session's own connection, so it shares the transaction,
+  - everything else: one INSERT executed with executemany.
+
+Missing columns get their Python-side defaults (ids, timestamps) up front, so
+every row has the same keys and the driver sees a single statement. Nothing is
+committed here: the caller commits once, and readers see either the old rows
+or the new ones.
+
+Each call returns a `WriteStats`; stages put `stats.report()` in their result,
+which the audit table keeps per stage (services/audit.py).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import JSON, delete, insert
+from sqlalchemy.orm import Session
+
+log = logging.getLogger("titan.db")
+
+COPY_MIN_ROWS = int(os.getenv("BULK_COPY_MIN_ROWS", "500"))
+
+
+@dataclass
+class WriteStats:
+    table: str
+    deleted: int = 0
+    inserted: int = 0
+    seconds: float = 0.0
+    method: str = "none"
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "table": self.table,
+            "deleted": self.deleted,
+            "inserted": self.inserted,
+            "method": self.method,
+            "write_ms": round(self.seconds * 1000.0, 3),
+            "rows_per_s": round(self.inserted / self.seconds, 1) if self.seconds > 0 else None,
+        }
+
+
+def with_defaults(table, rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fill columns missing from `rows` with their Python-side defaults."""
+    fill = [c for c in table.columns if c.default is not None]
+    out = []
+    for row in rows:
+        row = dict(row)
+        for col in fill:
+            if col.key not in row:
+                default = col.default
+                row[col.key] = default.arg(None) if default.is_callable else default.arg
+        out.append(row)
+    return out
+
+
+def insert_rows(db: Session, model, rows: Sequence[Dict[str, Any]]) -> WriteStats:
+    table = model.__table__
+    stats = WriteStats(table=table.name)
+    if not rows:
+        return stats
+    rows = with_defaults(table, rows)
+    t0 = time.perf_counter()
+    if len(rows) >= COPY_MIN_ROWS and _copy_rows(db, table, rows):
+        stats.method = "copy"
+    else:
+        db.execute(insert(table), rows)
+        stats.method = "executemany"
+    stats.inserted = len(rows)
+    stats.seconds = time.perf_counter() - t0
+    return stats
+
+
+def replace_rows(db: Session, model, where: Sequence[Any], rows: Sequence[Dict[str, Any]]) -> WriteStats:
+    """DELETE the rows matching `where`, then bulk-insert `rows`. Does not commit."""
+    t0 = time.perf_counter()
+    deleted = db.execute(delete(model).where(*where)).rowcount or 0
+    stats = insert_rows(db, model, rows)
+    stats.deleted = deleted
+    stats.seconds = time.perf_counter() - t0
+    log.debug("bulk write %s: -%d +%d rows (%s) in %.1fms", stats.table, stats.deleted,
+              stats.inserted, stats.method, stats.seconds * 1000.0)
+    return stats
+
+
+def _copy_rows(db: Session, table, rows: List[Dict[str, Any]]) -> bool:
+    conn = db.connection()
+    if conn.dialect.name != "postgresql" or conn.dialect.driver != "psycopg":
+        return False
+    quote = conn.dialect.identifier_preparer
+    cols = [c for c in table.columns if c.key in rows[0]]
+    json_cols = {c.key for c in cols if isinstance(c.type, JSON)}
+    sql = "COPY {} ({}) FROM STDIN".format(quote.format_table(table),
+                                          ", ".join(quote.quote(c.name) for c in cols))
+    raw = conn.connection.driver_connection
+    with raw.cursor() as cur:
+        with cur.copy(sql) as copy:
+            for row in rows:
+                copy.write_row([
+                    json.dumps(row[c.key]) if c.key in json_cols and row[c.key] is not None else row[c.key]
+                    for c in cols
+                ])
+    return True
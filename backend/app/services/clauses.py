@@ -1,25 +1,344 @@
+# backend/app/services/clauses.py
+"""
+Clause extraction from the OCR text in layout_index.json.
+
+Each page's text is rebuilt from its spans (span offsets are character
+offsets within the page, so a match at [start, end) in the rebuilt text maps
+straight back to the page's words). One precompiled regex holds the trigger
+phrases of every ClauseTypeEnum as named alternatives; a single finditer per
+page finds all candidates, whatever the number of types and patterns.
+
+A trigger is widened to its sentence (bounded by MAX_CLAUSE_CHARS on either
+side, which keeps the work linear in the text), overlapping regions of the
+same type are merged, and type-specific parsers fill `normalized`:
+
+  limitation_of_liability  cap_ratio_to_annual_fees, cap_amount, cap_currency
+  renewal                  auto_renew, renewal_term_months, notice_days
+  termination              notice_days, for_convenience
+  payment                  payment_days
+  governing_law            jurisdiction
+  confidentiality          term_years
+  sla                      uptime_pct
+  indemnity / IP           mutual
+
+Quantities ("thirty (30) days") and sentence ends come from
+services/text_parsing.py, which the deadline and summary stages share.
+
+Rows replace the document's previous clauses in one set-based write
+(services/bulk_write.py).
+"""
+from __future__ import annotations
+
+import os
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
+
 from ..db import SessionLocal
-from ..models import Clause
+from ..models import Clause, Deadline, PolicyFire, _id
+from ..schemas.clause import ClauseTypeEnum
+from .bulk_write import replace_rows
+from .storage import get_json
+from .text_parsing import QTY, parse_number, sentence_ends
+
+MAX_CLAUSE_CHARS = int(os.getenv("CLAUSE_MAX_CHARS", "600"))
+
+# (type, confidence, anchors, pattern). The pattern is matched, on the
+# lowercased page text, where one of its anchor word-prefixes starts a word.
+TRIGGERS: List[Tuple[ClauseTypeEnum, float, str, str]] = [
+    (ClauseTypeEnum.indemnity, 0.9, "indemnif", r"indemnif(?:y|ies|ied|ication)\b"),
+    (ClauseTypeEnum.indemnity, 0.8, "hold", r"holds?\s+harmless\b"),
+    (ClauseTypeEnum.limitation_of_liability, 0.95, "limitation", r"limitations?\s+of\s+liability\b"),
+    (ClauseTypeEnum.limitation_of_liability, 0.9, "aggregate total maximum",
+     r"(?:aggregate|total|maximum)\s+liability\b"),
+    (ClauseTypeEnum.limitation_of_liability, 0.85, "liability",
+     r"liability\b[^.]{0,120}?\b(?:shall|will)\s+not\s+exceed\b"),
+    (ClauseTypeEnum.limitation_of_liability, 0.75, "event", r"event\s+shall\b[^.]{0,80}?\bliable\b"),
+    (ClauseTypeEnum.limitation_of_liability, 0.7, "consequential", r"consequential\s+damages\b"),
+    (ClauseTypeEnum.termination, 0.9, "terminat",
+     r"terminat(?:e|ion)\s+(?:for\s+(?:convenience|cause)|of\s+this\s+agreement)\b"),
+    (ClauseTypeEnum.termination, 0.8, "terminat", r"terminat(?:e|es|ed|ion)\b"),
+    (ClauseTypeEnum.renewal, 0.9, "auto", r"auto(?:matic(?:ally)?|-)?\s*renew(?:s|ed|al)?\b"),
+    (ClauseTypeEnum.renewal, 0.85, "renewal", r"renewal\s+(?:term|period)s?\b"),
+    (ClauseTypeEnum.renewal, 0.75, "initial", r"initial\s+term\b"),
+    (ClauseTypeEnum.renewal, 0.8, "successive",
+     r"successive\s+(?:\w+[\s-]+)?(?:year|month|annual)\w*\s+(?:terms?|periods?)\b"),
+    (ClauseTypeEnum.governing_law, 0.95, "governed", r"governed\s+by\b[^.]{0,60}?\blaws?\s+of\b"),
+    (ClauseTypeEnum.governing_law, 0.9, "governing", r"governing\s+law\b"),
+    (ClauseTypeEnum.confidentiality, 0.9, "confidential", r"confidential\s+information\b"),
+    (ClauseTypeEnum.confidentiality, 0.85, "confidentiality non", r"(?:confidentiality|non-?disclosure)\b"),
+    (ClauseTypeEnum.intellectual_property, 0.9, "intellectual", r"intellectual\s+property\b"),
+    (ClauseTypeEnum.intellectual_property, 0.75, "patent copyright trade", r"(?:patents?|copyrights?|trade\s*marks?)\b"),
+    (ClauseTypeEnum.intellectual_property, 0.75, "licen", r"licen[cs]e\s+(?:grant|to\s+use)\b"),
+    (ClauseTypeEnum.payment, 0.9, "payment", r"payment\s+terms?\b"),
+    (ClauseTypeEnum.payment, 0.85, "invoice fees", r"(?:invoices?|fees)\b[^.]{0,80}?\b(?:payable|due)\b"),
+    (ClauseTypeEnum.payment, 0.85, "pay",
+     r"pay\s+(?:all\s+)?(?:undisputed\s+)?(?:invoices|invoiced\s+amounts|fees)\b"),
+    (ClauseTypeEnum.payment, 0.8, "net", r"net\s+\d{1,3}\b"),
+    (ClauseTypeEnum.sla, 0.9, "service", r"service\s+levels?(?:\s+agreement)?\b"),
+    (ClauseTypeEnum.sla, 0.85, "uptime availability", r"(?:uptime|availability)\b[^.]{0,40}?\d{2,3}(?:\.\d+)?\s*%"),
+    (ClauseTypeEnum.sla, 0.8, "service", r"service\s+credits?\b"),
+]
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Alternation of `words` factored into a prefix trie, so the regex engine walks a tree of literals."""
+    trie: Dict[str, Any] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, Any]) -> str:
+        alts = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+# anchor -> trigger indices; one automaton finds every anchor in a single pass
+_BY_ANCHOR: Dict[str, List[int]] = {}
+for _i, (_, _, _anchors, _) in enumerate(TRIGGERS):
+    for _a in _anchors.split():
+        _BY_ANCHOR.setdefault(_a, []).append(_i)
+# the trie matches the longest anchor at a position; triggers of the shorter anchors prefixing it apply too
+_BY_ANCHOR = {a: sorted({i for b, ids in _BY_ANCHOR.items() if a.startswith(b) for i in ids}) for a in _BY_ANCHOR}
+MATCHER = re.compile(r"\b(?:" + _trie_pattern(_BY_ANCHOR) + ")")
+_VERIFY = [re.compile(pat) for _, _, _, pat in TRIGGERS]
+
+# --- value parsing ---------------------------------------------------------
+
+_UNIT_DAYS = {"day": 1, "business day": 1, "week": 7, "month": 30, "year": 365}
+
+_NOTICE = (
+    # "thirty (30) days' prior written notice"
+    re.compile(rf"{QTY}\s*(?P<unit>business\s+days?|days?|weeks?|months?)['’]?\s*"
+               r"(?:prior\s+|advance\s+)?(?:written\s+)?notice", re.IGNORECASE),
+    # "notice of at least 60 days"
+    re.compile(rf"notice\s+(?:of\s+)?(?:at\s+least\s+|not\s+less\s+than\s+)?{QTY}\s*"
+               r"(?P<unit>business\s+days?|days?|weeks?|months?)", re.IGNORECASE),
+)
+_PERCENT_OF_FEES = re.compile(
+    rf"(?:(?P<pct>\d+(?:\.\d+)?)\s*%|{QTY}\s*percent(?:\s*\(\s*(?P<pct2>\d+(?:\.\d+)?)\s*%\s*\))?)"
+    rf"[^.]{{0,40}}?\b(?:of\s+the\s+)?(?:annual|yearly|total|aggregate)?\s*fees",
+    re.IGNORECASE)
+_MULTIPLE_OF_FEES = re.compile(
+    rf"{QTY}\s*(?:times|x)\s+(?:the\s+)?(?P<basis>annual|yearly|total)?\s*fees", re.IGNORECASE)
+_FEES_PAID_MONTHS = re.compile(
+    rf"fees\s+(?:paid|payable|actually\s+paid)[^.]{{0,60}}?{QTY}\s*(?:\(\s*\d+\s*\)\s*)?months", re.IGNORECASE)
+_AMOUNT = re.compile(
+    r"(?P<cur>US\$|\$|€|£|USD|EUR|GBP)\s?(?P<amt>\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?(?:\s*(?P<mult>million|m)\b)?",
+    re.IGNORECASE)
+_CURRENCIES = {"us$": "USD", "$": "USD", "usd": "USD", "€": "EUR", "eur": "EUR", "£": "GBP", "gbp": "GBP"}
+_TERM = re.compile(
+    rf"(?:successive|additional|further|renewal)\s+(?:terms?\s+of\s+)?{QTY}[\s-]*(?P<unit>years?|months?)", re.IGNORECASE)
+_TERM_ADJ = re.compile(r"(?:successive|additional|further)\s+(?P<adj>annual|yearly|monthly)\s", re.IGNORECASE)
+_WITHIN_DAYS = re.compile(rf"(?:within|net)\s+{QTY}\s*(?:days?)?", re.IGNORECASE)
+_LAW = re.compile(
+    r"laws?\s+of\s+(?:the\s+)?(?:State\s+of\s+|Commonwealth\s+of\s+|Province\s+of\s+)?"
+    r"(?P<j>[A-Z][A-Za-z.]*(?:\s+(?:and\s+)?[A-Z][A-Za-z.]*){0,3})")
+_YEARS = re.compile(rf"(?:period\s+of|for)\s+{QTY}\s*years?", re.IGNORECASE)
+_UPTIME = re.compile(r"(?P<pct>\d{2,3}(?:\.\d+)?)\s*%")
+_MUTUAL = re.compile(r"\b(?:each\s+party|mutual(?:ly)?|either\s+party)\b", re.IGNORECASE)
+_CONVENIENCE = re.compile(r"\bfor\s+(?:its\s+)?convenience\b|\bwithout\s+cause\b", re.IGNORECASE)
+
+
+def _days(qty: float, unit: str) -> int:
+    unit = unit.lower().rstrip("s")
+    return int(round(qty * _UNIT_DAYS.get(unit, 1)))
+
+
+def _notice_days(text: str, out: Dict[str, Any]) -> None:
+    for rx in _NOTICE:
+        m = rx.search(text)
+        if m:
+            out["notice_days"] = _days(parse_number(m), m.group("unit"))
+            return
+
+
+def _norm_liability(text: str) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    m = _PERCENT_OF_FEES.search(text)
+    if m:
+        pct = m.group("pct") or m.group("pct2")
+        out["cap_ratio_to_annual_fees"] = round((float(pct) if pct else parse_number(m)) / 100.0, 4)
+    else:
+        m = _MULTIPLE_OF_FEES.search(text)
+        if m:
+            out["cap_ratio_to_annual_fees"] = parse_number(m)
+        else:
+            m = _FEES_PAID_MONTHS.search(text)
+            if m:
+                out["cap_ratio_to_annual_fees"] = round(parse_number(m) / 12.0, 4)
+    m = _AMOUNT.search(text)
+    if m:
+        amount = float(m.group("amt").replace(",", ""))
+        if m.group("mult"):
+            amount *= 1_000_000
+        out["cap_amount"] = amount
+        out["cap_currency"] = _CURRENCIES.get(m.group("cur").lower(), m.group("cur").upper())
+    return out
+
+
+def _norm_renewal(text: str) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"auto_renew": bool(re.search(r"automatic|auto-?\s*renew", text, re.IGNORECASE))}
+    m = _TERM.search(text)
+    if m:
+        months = parse_number(m) * (12 if m.group("unit").lower().startswith("year") else 1)
+        out["renewal_term_months"] = int(months)
+    else:
+        m = _TERM_ADJ.search(text)
+        if m:
+            out["renewal_term_months"] = 1 if m.group("adj").lower() == "monthly" else 12
+    _notice_days(text, out)
+    return out
+
+
+def _norm_termination(text: str) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"for_convenience": bool(_CONVENIENCE.search(text))}
+    _notice_days(text, out)
+    return out
+
+
+def _norm_payment(text: str) -> Dict[str, Any]:
+    m = _WITHIN_DAYS.search(text)
+    return {"payment_days": int(parse_number(m))} if m else {}
+
+
+def _norm_governing_law(text: str) -> Dict[str, Any]:
+    m = _LAW.search(text)
+    return {"jurisdiction": m.group("j").rstrip(".")} if m else {}
+
+
+def _norm_confidentiality(text: str) -> Dict[str, Any]:
+    m = _YEARS.search(text)
+    return {"term_years": parse_number(m)} if m else {}
+
+
+def _norm_sla(text: str) -> Dict[str, Any]:
+    m = _UPTIME.search(text)
+    return {"uptime_pct": float(m.group("pct"))} if m else {}
+
+
+def _norm_mutual(text: str) -> Dict[str, Any]:
+    return {"mutual": bool(_MUTUAL.search(text))}
+
+
+NORMALIZERS: Dict[ClauseTypeEnum, Callable[[str], Dict[str, Any]]] = {
+    ClauseTypeEnum.limitation_of_liability: _norm_liability,
+    ClauseTypeEnum.renewal: _norm_renewal,
+    ClauseTypeEnum.termination: _norm_termination,
+    ClauseTypeEnum.payment: _norm_payment,
+    ClauseTypeEnum.governing_law: _norm_governing_law,
+    ClauseTypeEnum.confidentiality: _norm_confidentiality,
+    ClauseTypeEnum.sla: _norm_sla,
+    ClauseTypeEnum.indemnity: _norm_mutual,
+    ClauseTypeEnum.intellectual_property: _norm_mutual,
+}
+
+# --- extraction ------------------------------------------------------------
+
+def page_text(spans: List[Dict[str, Any]]) -> str:
+    """The page text the span offsets refer to (words at their offsets, spaces between)."""
+    parts: List[str] = []
+    pos = 0
+    for sp in sorted(spans, key=lambda s: s["start"]):
+        text = sp.get("text") or ""
+        if not text or sp["start"] < pos:
+            continue
+        parts.append(" " * (sp["start"] - pos))
+        parts.append(text)
+        pos = sp["start"] + len(text)
+    return "".join(parts)
+
+
+def _sentence(text: str, stops: List[int], start: int, end: int) -> Tuple[int, int]:
+    """The sentence around [start, end), at most MAX_CLAUSE_CHARS beyond it on either side.
+
+    `stops` are the page's sentence ends in ascending order (one pass per page).
+    """
+    i = bisect_right(stops, start)
+    s = max(stops[i - 1] if i else 0, start - MAX_CLAUSE_CHARS, 0)
+    j = bisect_left(stops, end)
+    e = min(stops[j] if j < len(stops) else len(text), end + MAX_CLAUSE_CHARS, len(text))
+    while s < e and text[s].isspace():
+        s += 1
+    return s, e
+
+
+def _lower(text: str) -> str:
+    low = text.lower()
+    if len(low) == len(text):
+        return low
+    # a few characters lowercase to two (e.g. "İ"); keep those as they are so offsets still line up
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+def _candidates(low: str) -> Iterator[Tuple[int, int, int]]:
+    """(trigger index, start, end) for every trigger in the lowercased page text."""
+    for m in MATCHER.finditer(low):
+        for idx in _BY_ANCHOR[m.group()]:
+            v = _VERIFY[idx].match(low, m.start())
+            if v:
+                yield idx, v.start(), v.end()
+
+
+def extract_page(page: int, text: str) -> List[Dict[str, Any]]:
+    """Clauses on one page: dicts with type, page, start, end, text, confidence, normalized."""
+    regions: Dict[ClauseTypeEnum, List[List[Any]]] = {}
+    stops: Optional[List[int]] = None
+    for idx, start, end in _candidates(_lower(text)):
+        if stops is None:
+            stops = sentence_ends(text)
+        ctype, conf = TRIGGERS[idx][:2]
+        s, e = _sentence(text, stops, start, end)
+        spans = regions.setdefault(ctype, [])
+        if spans and s <= spans[-1][1] + 1:  # overlaps or directly follows the previous region of this type
+            last = spans[-1]
+            last[1] = max(last[1], e)
+            last[2] = max(last[2], conf)
+            last[3] += 1
+        else:
+            spans.append([s, e, conf, 1])
+    out = []
+    for ctype, spans in regions.items():
+        for s, e, conf, hits in spans:
+            body = text[s:e]
+            out.append({
+                "type": ctype.value, "page": page, "start": s, "end": e, "text": body,
+                "confidence": round(min(0.99, conf + 0.03 * (hits - 1)), 3),
+                "normalized": NORMALIZERS[ctype](body),
+            })
+    out.sort(key=lambda c: (c["start"], c["type"]))
+    return out
+
+
+def iter_clauses(pages: Dict[str, Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    for key in sorted(pages, key=int):
+        yield from extract_page(int(key), page_text(pages[key].get("spans", [])))
+
 
 def run(doc_id: str):
+    layout = get_json(f"{doc_id}/layout_index.json") or {"pages": {}}
+    rows = [{"id": _id("cl"), "doc_id": doc_id, **c} for c in iter_clauses(layout.get("pages", {}))]
     db: Session = SessionLocal()
     try:
-        # seed 2 clauses
-        c1 = Clause(doc_id=doc_id, type="limitation_of_liability", page=1, start=10, end=30,
-                    text="Liability is capped at fifty percent (50%) of annual fees.",
-                    confidence=0.9, normalized={"cap_ratio_to_annual_fees": 0.5})
-        c2 = Clause(doc_id=doc_id, type="renewal", page=1, start=100, end=130,
-                    text="Auto-renews with a 15 days notice window.", confidence=0.85,
-                    normalized={"notice_days": 15})
-        db.add_all([c1, c2]); db.commit()
-        return {"clauses": 2}
+        # Fires and linked deadlines point at the clauses being replaced; the
+        # rules and deadlines stages regenerate them from the new ones
+        db.execute(delete(PolicyFire).where(PolicyFire.doc_id == doc_id))
+        db.execute(delete(Deadline).where(Deadline.doc_id == doc_id, Deadline.source_clause_id.is_not(None)))
+        stats = replace_rows(db, Clause, [Clause.doc_id == doc_id], rows)
+        db.commit()
+        by_type: Dict[str, int] = {}
+        for r in rows:
+            by_type[r["type"]] = by_type.get(r["type"], 0) + 1
+        return {"clauses": len(rows), "by_type": by_type, "writes": [stats.report()]}
     finally:
         db.close()
-from fastapi import Header, HTTPException
-import os
-_API = os.getenv("API_KEY")
-
-def require_api_key(x_api_key: str = Header(None)):
-    if _API and x_api_key != _API:
-        raise HTTPException(status_code=401, detail="Unauthorized")
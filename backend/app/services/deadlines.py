@@ -1,13 +1,248 @@
-from datetime import datetime, timedelta
+# backend/app/services/deadlines.py
+"""
+Deadlines resolved from the clauses of a document.
+
+A handful of compiled patterns (no date library) read each clause's text:
+
+  absolute dates   "January 5, 2025", "5th day of January, 2025", "2025-01-05",
+                   "01/05/2025" (DEADLINE_DATE_ORDER=MDY or DMY)
+  relative spans   "within 30 days of the Effective Date", "ninety (90) days
+                   prior to renewal", "two (2) weeks before expiration"
+  the term         "an initial term of three (3) years", "expires on ..."
+
+and the clause's normalized fields (renewal notice_days / auto_renew /
+renewal_term_months from services/clauses.py). Dates are then resolved per
+document:
+
+  effective   a date introduced by "effective", "commencing", "dated as of",
+              ...; otherwise the document's upload date
+  term end    an explicit expiry date, or effective + initial term; when the
+              agreement renews automatically, rolled forward by the renewal
+              term to the next renewal date
+  deadlines   relative spans anchored on the effective date or the term end,
+              the renewal notice window (term end - notice_days), the term
+              end itself, and dates introduced by "no later than", "on or
+              before", ...
+
+Spans anchored on an event with no date ("within 30 days of receipt of an
+invoice") can't be put in a calendar and are skipped.
+
+Every deadline links to the clause it came from (source_clause_id).
+`run_batch` loads many documents' clauses with one query and replaces their
+deadlines with one set-based write, for re-processing whole corpora
+(app/scripts/bulk_deadlines.py).
+"""
+from __future__ import annotations
+
+import calendar
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+
 from ..db import SessionLocal
-from ..models import Deadline
+from ..models import Clause, Deadline, Document
+from .bulk_write import WriteStats, replace_rows
+from .text_parsing import QTY, parse_number
+
+DATE_ORDER = os.getenv("DEADLINE_DATE_ORDER", "MDY").upper()  # how to read 01/05/2025
+_MAX_ROLL_YEARS = 50
+
+_MONTHS = {m.lower(): i for i, m in enumerate(calendar.month_name) if m}
+_MONTHS.update({m.lower(): i for i, m in enumerate(calendar.month_abbr) if m})
+_MONTHS["sept"] = 9
+_MON = "(?:" + "|".join(sorted(_MONTHS, key=len, reverse=True)) + r")\.?"
+_ORD = r"(?:st|nd|rd|th)?"
+
+# all patterns run on lowercased clause text
+DATE = re.compile(
+    rf"\b(?:(?P<iy>\d{{4}})-(?P<im>\d{{1,2}})-(?P<id>\d{{1,2}})"
+    rf"|(?P<am>{_MON})\s+(?P<ad>\d{{1,2}}){_ORD},?\s+(?P<ay>\d{{4}})"
+    rf"|(?P<bd>\d{{1,2}}){_ORD}\s+(?:day\s+of\s+)?(?P<bm>{_MON}),?\s+(?P<by>\d{{4}})"
+    rf"|(?P<n1>\d{{1,2}})/(?P<n2>\d{{1,2}})/(?P<ny>\d{{4}}))\b")
+RELATIVE = re.compile(
+    rf"{QTY}\s*(?P<unit>business\s+days?|days?|weeks?|months?|years?)['’]?\s*(?:\(\s*\d+\s*\)\s*)?"
+    rf"(?:(?:prior\s+)?written\s+notice\s+)?"
+    rf"(?P<dir>prior\s+to|before|in\s+advance\s+of|after|following|from|of)\s+(?:the\s+)?"
+    rf"(?P<event>[a-z-]+(?:\s+[a-z-]+){{0,3}})")
+TERM = re.compile(
+    rf"\b(?:initial\s+)?term\s+of\s+{QTY}\s*(?P<unit>years?|months?)")
+# cue words just before an absolute date
+_CUES = [
+    ("effective", re.compile(r"\b(?:effective|commenc\w*|dated|as\s+of|starting|start\s+date)[^.;]{0,30}$")),
+    ("term_end", re.compile(r"\b(?:expir\w*|terminat\w*\s+on|until|through|end\w*\s+on)[^.;]{0,20}$")),
+    ("due", re.compile(r"\b(?:no\s+later\s+than|on\s+or\s+before|by|due\s+on|deadline\s+of)[^.;]{0,10}$")),
+]
+_CUE_WINDOW = 40
+_EVENTS = [
+    ("term_end", re.compile(r"^(?:renewal|expir\w*|end\s+of|then[\s-]current\s+term|current\s+term|term\b)")),
+    ("effective", re.compile(r"^(?:effective|execution|signing|commencement|date\s+of\s+this)")),
+]
+_BEFORE = {"prior to", "before", "in advance of"}
+_UNIT_DAYS = {"day": 1, "business day": 1, "week": 7}
+
+
+def parse_date(m: re.Match) -> Optional[date]:
+    """The date a DATE match denotes, or None if it isn't a real calendar day."""
+    g = m.groupdict()
+    try:
+        if g["iy"]:
+            return date(int(g["iy"]), int(g["im"]), int(g["id"]))
+        if g["ay"]:
+            return date(int(g["ay"]), _MONTHS[g["am"].rstrip(".")], int(g["ad"]))
+        if g["by"]:
+            return date(int(g["by"]), _MONTHS[g["bm"].rstrip(".")], int(g["bd"]))
+        a, b = int(g["n1"]), int(g["n2"])
+        month, day = (b, a) if DATE_ORDER == "DMY" else (a, b)
+        return date(int(g["ny"]), month, day)
+    except ValueError:
+        return None
+
+
+def add_months(d: date, months: int) -> date:
+    y, m = divmod(d.month - 1 + months, 12)
+    y += d.year
+    return date(y, m + 1, min(d.day, calendar.monthrange(y, m + 1)[1]))
+
+
+def shift(d: date, qty: float, unit: str, before: bool = False) -> date:
+    """`d` moved by qty units ("day", "week", "month", "year"; plural allowed)."""
+    unit = re.sub(r"\s+", " ", unit).rstrip("s")
+    sign = -1 if before else 1
+    if unit in ("month", "year"):
+        return add_months(d, sign * int(round(qty * (12 if unit == "year" else 1))))
+    return d + timedelta(days=sign * int(round(qty * _UNIT_DAYS.get(unit, 1))))
+
+
+def _event(words: str) -> Optional[str]:
+    for name, rx in _EVENTS:
+        if rx.match(words):
+            return name
+    return None
+
+
+def _title(ctype: str, kind: str) -> str:
+    if kind == "notice":
+        return "Renewal notice deadline" if ctype == "renewal" else f"{ctype.replace('_', ' ').capitalize()} notice deadline"
+    return f"{ctype.replace('_', ' ').capitalize()} deadline"
+
+
+def _scan_clause(c: Dict[str, Any]) -> Dict[str, Any]:
+    """Everything the resolver needs from one clause, read in one pass per pattern."""
+    text = (c.get("text") or "").lower()
+    dates: List[Tuple[str, date]] = []
+    for m in DATE.finditer(text):
+        d = parse_date(m)
+        if d is None:
+            continue
+        before = text[max(0, m.start() - _CUE_WINDOW):m.start()]
+        cue = next((name for name, rx in _CUES if rx.search(before)), "")
+        dates.append((cue, d))
+    term = TERM.search(text)
+    return {
+        "dates": dates,
+        "relative": [(parse_number(m), m.group("unit"), re.sub(r"\s+", " ", m.group("dir")),
+                      m.group("event")) for m in RELATIVE.finditer(text)],
+        "term_months": int(round(parse_number(term) * (12 if term.group("unit").startswith("year") else 1)))
+        if term else None,
+    }
+
+
+def extract_deadlines(clauses: Sequence[Dict[str, Any]], reference: Optional[datetime] = None,
+                      now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Deadline rows (doc-less: title, due_at, source_clause_id) for one document's clauses.
+
+    `clauses` are dicts with id, type, text and normalized; `reference` stands in
+    for the effective date when the text names none (the upload date).
+    """
+    now = now or datetime.utcnow()
+    scans = [(c, _scan_clause(c)) for c in clauses]
+
+    effective = next((d for _, s in scans for cue, d in s["dates"] if cue == "effective"), None)
+    if effective is None and reference is not None:
+        effective = reference.date()
+    term_src = next(((c, s["term_months"]) for c, s in scans if s["term_months"]), None)
+    term_end = next(((c, d) for c, s in scans for cue, d in s["dates"] if cue == "term_end"), None)
+    if term_end is None and term_src is not None and effective is not None:
+        term_end = (term_src[0], add_months(effective, term_src[1]))
+
+    renewal = next((c for c in clauses if c.get("type") == "renewal"), None)
+    auto_renew = renewal is not None and bool((renewal.get("normalized") or {}).get("auto_renew"))
+    if term_end is not None and auto_renew:
+        step = (renewal.get("normalized") or {}).get("renewal_term_months") or 12
+        src, end = term_end
+        rolls = 0
+        while end < now.date() and rolls < _MAX_ROLL_YEARS * 12 // step:
+            end, rolls = add_months(end, step), rolls + 1
+        term_end = (src, end)
+
+    out: Dict[Tuple[str, date], Dict[str, Any]] = {}
+
+    def add(title: str, due: date, clause: Dict[str, Any]) -> None:
+        out.setdefault((title, due), {"title": title, "due_at": datetime.combine(due, datetime.min.time()),
+                                      "source_clause_id": clause.get("id")})
+
+    if term_end is not None:
+        add("Renewal date" if auto_renew else "Term ends", term_end[1], term_end[0])
+    for c, s in scans:
+        ctype = c.get("type") or ""
+        for cue, d in s["dates"]:
+            if cue == "due":
+                add(_title(ctype, "due"), d, c)
+        relative_notice = False
+        for qty, unit, direction, event in s["relative"]:
+            anchor = {"term_end": term_end[1] if term_end else None, "effective": effective}.get(_event(event) or "")
+            if anchor is None or qty is None:
+                continue
+            before = direction in _BEFORE
+            add(_title(ctype, "notice" if before else "due"), shift(anchor, qty, unit, before), c)
+            relative_notice |= before
+        notice_days = (c.get("normalized") or {}).get("notice_days")
+        if ctype == "renewal" and notice_days and term_end is not None and not relative_notice:
+            add(_title(ctype, "notice"), term_end[1] - timedelta(days=int(notice_days)), c)
+    return sorted(out.values(), key=lambda r: r["due_at"])
+
+
+def load_clauses(db: Session, doc_ids: Sequence[str]) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, datetime]]:
+    """Clauses per document and each document's upload date, in two queries."""
+    by_doc: Dict[str, List[Dict[str, Any]]] = {d: [] for d in doc_ids}
+    q = (select(Clause.id, Clause.doc_id, Clause.type, Clause.text, Clause.normalized)
+         .where(Clause.doc_id.in_(doc_ids)).order_by(Clause.doc_id, Clause.page, Clause.start))
+    for row in db.execute(q):
+        by_doc[row.doc_id].append(row._asdict())
+    created = dict(db.execute(select(Document.doc_id, Document.created_at).where(Document.doc_id.in_(doc_ids))).all())
+    return by_doc, created
+
+
+def run_batch(db: Session, doc_ids: Sequence[str], now: Optional[datetime] = None) -> Tuple[int, WriteStats]:
+    """Replace the deadlines of `doc_ids` in one write. Does not commit."""
+    by_doc, created = load_clauses(db, doc_ids)
+    rows = [{**r, "doc_id": doc_id}
+            for doc_id, cls in by_doc.items()
+            for r in extract_deadlines(cls, reference=created.get(doc_id), now=now)]
+    stats = replace_rows(db, Deadline, [Deadline.doc_id.in_(list(doc_ids))], rows)
+    return len(rows), stats
+
+
+def iter_batches(doc_ids: Iterable[str], size: int) -> Iterable[List[str]]:
+    batch: List[str] = []
+    for d in doc_ids:
+        batch.append(d)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 
 def run(doc_id: str):
     db: Session = SessionLocal()
     try:
-        d1 = Deadline(doc_id=doc_id, title="Renewal notice window", due_at=datetime.utcnow()+timedelta(days=15))
-        db.add(d1); db.commit()
-        return {"deadlines": 1}
+        n, stats = run_batch(db, [doc_id])
+        db.commit()
+        return {"deadlines": n, "writes": [stats.report()]}
     finally:
         db.close()
@@ -0,0 +1,145 @@
+# backend/app/services/embed_batcher.py
+"""
+Dynamic micro-batching for the embedding model.
+
+Concurrent `embed()` calls are queued; a single loop takes the first pending
+request, keeps collecting for up to EMBED_BATCH_WAIT_MS (or until
+EMBED_MAX_BATCH texts are pending), encodes everything in one model call on a
+dedicated thread and hands each caller its slice. Single queries arriving
+together share a forward pass instead of queueing behind each other; a large
+ingest batch is encoded on its own (requests are never split).
+
+Used by the embedding server (app/embed_server.py).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+
+Encoder = Callable[[List[str]], Any]  # texts -> (n, dim) array
+
+
+@dataclass
+class _Pending:
+    texts: Sequence[str]
+    future: asyncio.Future
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+class BatchStats:
+    def __init__(self) -> None:
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self.encode_s = 0.0
+        self.queue_wait_s = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "texts": self.texts,
+            "avg_batch_texts": self.texts / self.batches if self.batches else 0.0,
+            "avg_requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+            "avg_encode_ms": 1000.0 * self.encode_s / self.batches if self.batches else 0.0,
+            "avg_queue_wait_ms": 1000.0 * self.queue_wait_s / self.requests if self.requests else 0.0,
+        }
+
+
+class MicroBatcher:
+    def __init__(self, encode: Encoder, max_batch: int = MAX_BATCH, max_wait_ms: float = BATCH_WAIT_MS):
+        self.encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = BatchStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._carry: Optional[_Pending] = None  # didn't fit the previous batch
+        # One thread: the model runs one batch at a time, the event loop stays free
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=False)
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), dim) array for `texts`: float16 from the ONNX backend, else float32."""
+        self.start()
+        item = _Pending(texts=list(texts), future=asyncio.get_running_loop().create_future())
+        await self._queue.put(item)  # type: ignore[union-attr]
+        return await item.future
+
+    async def _collect(self) -> List[_Pending]:
+        queue = self._queue
+        if self._carry is not None:
+            batch, self._carry = [self._carry], None
+        else:
+            batch = [await queue.get()]  # type: ignore[union-attr]
+        n = len(batch[0].texts)
+        deadline = time.perf_counter() + self.max_wait
+        while n < self.max_batch:
+            try:
+                item = queue.get_nowait()  # type: ignore[union-attr]
+            except asyncio.QueueEmpty:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), remaining)  # type: ignore[union-attr]
+                except asyncio.TimeoutError:
+                    break
+            if n + len(item.texts) > self.max_batch:
+                self._carry = item
+                break
+            batch.append(item)
+            n += len(item.texts)
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            texts = [t for item in batch for t in item.texts]
+            started = time.perf_counter()
+            try:
+                vectors = await loop.run_in_executor(self._executor, self.encode, texts)
+                vectors = np.asarray(vectors)
+                if vectors.dtype != np.float16:
+                    vectors = vectors.astype(np.float32, copy=False)
+            except Exception as e:
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+                continue
+            s = self.stats
+            s.batches += 1
+            s.requests += len(batch)
+            s.texts += len(texts)
+            s.encode_s += time.perf_counter() - started
+            s.queue_wait_s += sum(started - item.queued_at for item in batch)
+            offset = 0
+            for item in batch:
+                n = len(item.texts)
+                if not item.future.done():
+                    item.future.set_result(vectors[offset:offset + n])
+                offset += n
@@ -0,0 +1,157 @@
+# backend/app/services/embed_onnx.py
+"""
+ONNX Runtime backend for the sentence-transformers embedding model (CPU, int8).
+
+`export()` (run once, where torch/transformers are installed; see
+app/scripts/export_onnx_embedder.py) writes to a directory:
+
+  model.onnx        the transformer, dynamic batch/sequence axes
+  model.int8.onnx   the same with int8 dynamic quantization (weights int8,
+                    activations quantized per batch at run time)
+  tokenizer.json    the model's fast tokenizer, as used by sentence-transformers
+  embed_config.json pooling, normalization, max length, dimension
+
+`OnnxEmbedder` loads that directory with onnxruntime + tokenizers only (no
+torch) and reproduces SentenceTransformer.encode: truncate to the model's
+max_seq_length, mean-pool over the attention mask, L2-normalize. Vectors are
+returned as float16.
+
+Selected with EMBED_BACKEND=onnx and EMBED_ONNX_DIR (services/qdrant.get_model).
+"""
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+ONNX_DIR = os.getenv("EMBED_ONNX_DIR", "/models/embedder-onnx")
+ONNX_THREADS = int(os.getenv("EMBED_ONNX_THREADS", "0"))  # 0: onnxruntime default (all cores)
+QUANTIZED = os.getenv("EMBED_ONNX_INT8", "true").lower() == "true"
+
+CONFIG_FILE = "embed_config.json"
+
+
+class OnnxEmbedder:
+    def __init__(self, model_dir: Optional[str] = None, quantized: Optional[bool] = None,
+                 threads: Optional[int] = None, dtype: Any = np.float16):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = model_dir or ONNX_DIR
+        quantized = QUANTIZED if quantized is None else quantized
+        threads = ONNX_THREADS if threads is None else threads
+
+        with open(os.path.join(model_dir, CONFIG_FILE)) as f:
+            self.config: Dict[str, Any] = json.load(f)
+        self.max_length = int(self.config.get("max_length", 384))
+        self.normalize = bool(self.config.get("normalize", True))
+        self.dtype = dtype
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_length)
+        self.tokenizer.enable_padding(pad_id=int(self.config.get("pad_id", 1)),
+                                      pad_token=self.config.get("pad_token", "<pad>"))
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+        name = "model.int8.onnx" if quantized else "model.onnx"
+        self.session = ort.InferenceSession(os.path.join(model_dir, name), opts,
+                                            providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return int(self.config["dim"])
+
+    def _encode_batch(self, texts: Sequence[str]) -> np.ndarray:
+        encs = self.tokenizer.encode_batch(list(texts))
+        ids = np.array([e.ids for e in encs], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encs], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._inputs:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run(None, {k: v for k, v in feeds.items() if k in self._inputs})[0]
+        # Mean pooling over real tokens (sentence-transformers' Pooling(mean))
+        m = mask[:, :, None].astype(np.float32)
+        pooled = (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+        return pooled
+
+    def encode(self, texts: Sequence[str], normalize_embeddings: Optional[bool] = None,
+               batch_size: int = 32, **_) -> np.ndarray:
+        """(len(texts), dim) array in `self.dtype`; same contract as SentenceTransformer.encode."""
+        texts = list(texts)
+        dim = self.get_sentence_embedding_dimension()
+        if not texts:
+            return np.zeros((0, dim), dtype=self.dtype)
+        # Length-sorted batches keep padding small; results go back in input order
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        out = np.empty((len(texts), dim), dtype=np.float32)
+        step = max(1, batch_size)
+        for i in range(0, len(texts), step):
+            idx = order[i:i + step]
+            out[idx] = self._encode_batch([texts[j] for j in idx])
+        if self.normalize if normalize_embeddings is None else normalize_embeddings:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+        return out.astype(self.dtype, copy=False)
+
+
+def export(model_name: str, out_dir: str, opset: int = 17) -> Dict[str, Any]:
+    """Export `model_name` (a sentence-transformers model) to ONNX + int8 in `out_dir`."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(out_dir, exist_ok=True)
+    st = SentenceTransformer(model_name, device="cpu")
+    transformer = st[0].auto_model.eval()
+    tokenizer = st.tokenizer
+    pooling = st[1]
+    if not getattr(pooling, "pooling_mode_mean_tokens", False):
+        raise ValueError(f"{model_name}: only mean pooling is supported by the ONNX backend")
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic = {n: {0: "batch", 1: "sequence"} for n in input_names}
+    dynamic["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    class _Hidden(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *args):
+            return self.model(**dict(zip(input_names, args))).last_hidden_state
+
+    fp32 = os.path.join(out_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(_Hidden(transformer), tuple(sample[n] for n in input_names), fp32,
+                          input_names=input_names, output_names=["last_hidden_state"],
+                          dynamic_axes=dynamic, opset_version=opset)
+    quantize_dynamic(fp32, os.path.join(out_dir, "model.int8.onnx"), weight_type=QuantType.QInt8)
+
+    tokenizer.backend_tokenizer.save(os.path.join(out_dir, "tokenizer.json"))
+    config = {
+        "model": model_name,
+        "pooling": "mean",
+        "normalize": any(type(m).__name__ == "Normalize" for m in st),
+        "max_length": int(st.max_seq_length),
+        "dim": int(st.get_sentence_embedding_dimension()),
+        "pad_id": int(tokenizer.pad_token_id),
+        "pad_token": tokenizer.pad_token,
+        "inputs": input_names,
+    }
+    with open(os.path.join(out_dir, CONFIG_FILE), "w") as f:
+        json.dump(config, f, indent=2)
+    return config
+
+
+def cosine_parity(reference: np.ndarray, candidate: np.ndarray) -> List[float]:
+    """Row-wise cosine similarity between two embedding matrices."""
+    a = np.asarray(reference, dtype=np.float32)
+    b = np.asarray(candidate, dtype=np.float32)
+    num = (a * b).sum(axis=1)
+    den = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    return (num / np.clip(den, 1e-12, None)).tolist()
@@ -4,54 +4,52 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Dict, List
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from ..db import SessionLocal
-from ..models import Clause, PolicyFire, Guidance as GModel
+from ..models import Clause, PolicyFire, Guidance as GModel, _id
+from .bulk_write import replace_rows
+from .summarizer import SUMMARY_TITLE
 
 
 def compose(doc_id: str) -> dict:
     """
     Compose GuidanceItems for a document from clauses and policy fires.
     - Per-clause, attach the matching PolicyFire (if any) to set risk.
-    - Replace any existing guidance items for this doc to avoid duplicates.
+    - Replace any existing guidance items for this doc to avoid duplicates
+      (one DELETE plus one bulk INSERT/COPY, in a single transaction); the
+      summary row written by the summary stage is kept.
     """
     db: Session = SessionLocal()
     try:
-        # Fetch once
-        clauses: List[Clause] = (
-            db.query(Clause).filter(Clause.doc_id == doc_id).all()
+        # Fetch once, only the columns we need
+        clauses = db.execute(
+            select(Clause.id, Clause.type, Clause.page, Clause.start, Clause.end, Clause.confidence)
+            .where(Clause.doc_id == doc_id)
+        ).all()
+        fires_by_clause: Dict[str, str] = dict(
+            db.execute(select(PolicyFire.clause_id, PolicyFire.severity).where(PolicyFire.doc_id == doc_id)).all()
         )
-        fires_by_clause: Dict[str, PolicyFire] = {
-            f.clause_id: f
-            for f in db.query(PolicyFire).filter(PolicyFire.doc_id == doc_id).all()
-        }
-
-        # Clear existing guidance for this doc (simple upsert strategy)
-        db.query(GModel).filter(GModel.doc_id == doc_id).delete()
-
-        created = 0
-        for c in clauses:
-            # Build evidence chip like "D1:14:231-560"
-            evidence_chip = f"{c.doc_id}:{c.page}:{c.start}-{c.end}"
-            fire = fires_by_clause.get(c.id)  # may be None
-            risk = fire.severity if fire else "low"
-
-            g = GModel(
-                doc_id=c.doc_id,
-                title=f"{c.type.replace('_', ' ').title()} – check terms",
-                what="Detected clause with potential considerations.",
-                action="Review and align with policy.",
-                risk=risk,
-                deadline=None,
-                evidence=[evidence_chip],
-                confidence=float(c.confidence or 0.0),
-            )
-            db.add(g)
-            created += 1
 
+        rows = [
+            {
+                "id": _id("gd"),
+                "doc_id": doc_id,
+                "title": f"{c.type.replace('_', ' ').title()} – check terms",
+                "what": "Detected clause with potential considerations.",
+                "action": "Review and align with policy.",
+                "risk": fires_by_clause.get(c.id, "low"),
+                "deadline": None,
+                # Evidence chip like "D1:14:231-560"
+                "evidence": [f"{doc_id}:{c.page}:{c.start}-{c.end}"],
+                "confidence": float(c.confidence or 0.0),
+            }
+            for c in clauses
+        ]
+        stats = replace_rows(db, GModel, [GModel.doc_id == doc_id, GModel.title != SUMMARY_TITLE], rows)
         db.commit()
-        return {"guidance_items": created}
+        return {"guidance_items": len(rows), "writes": [stats.report()]}
     finally:
         db.close()
 
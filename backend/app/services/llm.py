@@ -1,7 +1,7 @@
 # backend/app/services/llm.py
 from __future__ import annotations
 import os
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, List, Optional
 import httpx
 
 PROVIDER = os.getenv("LLM_PROVIDER", "openrouter").lower()
@@ -23,23 +23,30 @@ def _confidence_heuristic(text: str) -> float:
     # Simple heuristic: if model emitted bracketed citations, assume higher confidence
     return 0.8 if "[" in text and "]" in text else 0.55
 
-async def chat_with_citations(system: str, prompt: str) -> Tuple[str, float]:
+def _add_usage(usage: Optional[Dict[str, int]], prompt_tokens: Any, completion_tokens: Any) -> None:
+    if usage is None:
+        return
+    usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + int(prompt_tokens or 0)
+    usage["completion_tokens"] = usage.get("completion_tokens", 0) + int(completion_tokens or 0)
+
+async def chat_with_citations(system: str, prompt: str, usage: Optional[Dict[str, int]] = None) -> Tuple[str, float]:
     """
     Returns (answer_text, confidence).
     Assumes you already embedded evidence and 'cite like [D:page:start-end]' instructions in 'prompt'.
+    If `usage` is given, the provider's prompt_tokens / completion_tokens are added to it.
 
     Supports multiple LLM providers:
     - openrouter: Uses OpenRouter API with various free models
     - ollama: Legacy local Ollama support (deprecated)
     """
     if PROVIDER == "openrouter":
-        return await _chat_openrouter(system, prompt)
+        return await _chat_openrouter(system, prompt, usage)
     elif PROVIDER == "ollama":
-        return await _chat_ollama(system, prompt)
+        return await _chat_ollama(system, prompt, usage)
     else:
         raise RuntimeError(f"LLM_PROVIDER={PROVIDER} not supported. Use 'openrouter' or 'ollama'.")
 
-async def _chat_openrouter(system: str, prompt: str) -> Tuple[str, float]:
+async def _chat_openrouter(system: str, prompt: str, usage: Optional[Dict[str, int]] = None) -> Tuple[str, float]:
     """Chat using OpenRouter API (OpenAI-compatible format)."""
     if not OPENROUTER_API_KEY:
         raise RuntimeError("OPENROUTER_API_KEY not configured in environment")
@@ -64,6 +71,9 @@ async def _chat_openrouter(system: str, prompt: str) -> Tuple[str, float]:
         r.raise_for_status()
         data = r.json()
 
+    counts = data.get("usage") or {}
+    _add_usage(usage, counts.get("prompt_tokens"), counts.get("completion_tokens"))
+
     # OpenAI-compatible response format
     text = data.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
     if not text:
@@ -71,7 +81,7 @@ async def _chat_openrouter(system: str, prompt: str) -> Tuple[str, float]:
 
     return text, _confidence_heuristic(text)
 
-async def _chat_ollama(system: str, prompt: str) -> Tuple[str, float]:
+async def _chat_ollama(system: str, prompt: str, usage: Optional[Dict[str, int]] = None) -> Tuple[str, float]:
     """Chat using Ollama API (legacy support)."""
     url = f"{OLLAMA_BASE.rstrip('/')}/api/chat"
     payload = {
@@ -85,5 +95,6 @@ async def _chat_ollama(system: str, prompt: str) -> Tuple[str, float]:
         r.raise_for_status()
         data = r.json()
 
+    _add_usage(usage, data.get("prompt_eval_count"), data.get("eval_count"))
     text = (data.get("message") or {}).get("content", "").strip()
     return text, _confidence_heuristic(text)
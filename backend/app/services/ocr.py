@@ -1,46 +1,134 @@
 # backend/app/services/ocr.py
 from __future__ import annotations
 
-import io
-from typing import Dict, List
-from PIL import Image
+import logging
+import os
+from typing import Any, BinaryIO, Dict, List
 import numpy as np
 import pypdfium2 as pdfium
-from doctr.models import ocr_predictor
-from .storage import put_json, put_bytes, get_bytes
+from .storage import put_json, open_stream
+
+log = logging.getLogger("titan.ocr")
+
+# torch: docTR (PyTorch); onnx: OnnxTR, the docTR models exported to ONNX Runtime
+OCR_BACKEND = os.getenv("OCR_BACKEND", "torch").lower()
+# Lighter pair for CPU-only workers: db_mobilenet_v3_large + crnn_mobilenet_v3_small
+OCR_DET_ARCH = os.getenv("OCR_DET_ARCH", "db_resnet50")
+OCR_RECO_ARCH = os.getenv("OCR_RECO_ARCH", "crnn_vgg16_bn")
+# torch: dynamic int8 quantization of the recognition model's Linear/LSTM layers;
+# onnx: the published int8 models
+OCR_INT8 = os.getenv("OCR_INT8", "false").lower() == "true"
+# Intra-op threads for torch / onnxruntime; 0 leaves the library default (all cores)
+OCR_THREADS = int(os.getenv("OCR_THREADS", "0"))
+OCR_RECO_BATCH = int(os.getenv("OCR_RECO_BATCH", "128"))
+
+# Page rendering (plan_render): "adaptive" sizes each page from a cheap probe,
+# "fixed" renders everything at OCR_FIXED_SCALE in colour, whatever its size
+OCR_RENDER = os.getenv("OCR_RENDER", "adaptive").lower()
+OCR_FIXED_SCALE = float(os.getenv("OCR_FIXED_SCALE", "2"))
+OCR_MIN_SCALE = float(os.getenv("OCR_MIN_SCALE", "1"))
+OCR_MAX_SCALE = float(os.getenv("OCR_MAX_SCALE", "4"))
+# Upper bound on rendered pixels per page (large drawings): 12M ~ A3 at 3x
+OCR_MAX_PIXELS = int(os.getenv("OCR_MAX_PIXELS", "12000000"))
+# Text line height (ink rows) the recognizer should see; 11-12pt body text -> ~2x
+OCR_TARGET_LINE_PX = float(os.getenv("OCR_TARGET_LINE_PX", "20"))
+# Monochrome pages rendering to at least this many pixels are rendered in grayscale
+OCR_GRAY_MIN_PIXELS = int(os.getenv("OCR_GRAY_MIN_PIXELS", "6000000"))
+
+_PROBE_SCALE = 1.0      # 72 dpi: an A4 probe is ~0.5M pixels
+_PROBE_MAX_PIXELS = 2_000_000  # lower probe resolution for large sheets
+_PROBE_STRIPS = 4       # columns are measured separately so their lines don't merge
+_INK_LEVEL = 160        # probe pixels darker than this are ink
+_EMPTY_INK = 0.002      # below this ink fraction the page is treated as (near) empty
+_COLOUR_CHROMA = 32     # max-min channel spread that counts as a coloured pixel
+_COLOUR_SHARE = 0.001   # pages with fewer coloured pixels are rendered in grayscale
 
 # Initialize docTR model (lazy load)
 _predictor = None
 
+def build_predictor(backend: str = OCR_BACKEND, det_arch: str = OCR_DET_ARCH, reco_arch: str = OCR_RECO_ARCH,
+                    int8: bool = OCR_INT8, threads: int = OCR_THREADS, reco_bs: int = OCR_RECO_BATCH) -> Any:
+    """A docTR-compatible predictor: predictor([page_np]).pages[0].blocks -> lines -> words."""
+    if backend == "onnx":
+        import onnxruntime as ort
+        from onnxtr.models import EngineConfig, ocr_predictor as onnx_ocr_predictor
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+            opts.inter_op_num_threads = 1
+        cfg = EngineConfig(providers=["CPUExecutionProvider"], session_options=opts)
+        return onnx_ocr_predictor(det_arch=det_arch, reco_arch=reco_arch, reco_bs=reco_bs, load_in_8_bit=int8,
+                                  det_engine_cfg=cfg, reco_engine_cfg=cfg, clf_engine_cfg=cfg)
+    if backend != "torch":
+        raise ValueError(f"OCR_BACKEND must be 'torch' or 'onnx', not {backend!r}")
+
+    # docTR pulls in torch: imported here so that importing this module
+    # (the API does, via services/pipeline) stays cheap
+    import torch
+    from doctr.models import ocr_predictor
+    if threads:
+        torch.set_num_threads(threads)
+    # Set pretrained=True to download weights automatically
+    predictor = ocr_predictor(det_arch=det_arch, reco_arch=reco_arch, pretrained=True, reco_bs=reco_bs)
+    predictor.eval()
+    if int8:
+        # Conv layers (all of detection) have no dynamic int8 kernels; the
+        # recognition head's LSTM/Linear layers are where this pays off
+        reco = predictor.reco_predictor
+        reco.model = torch.ao.quantization.quantize_dynamic(
+            reco.model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8)
+    return predictor
+
 def _get_predictor():
     """Lazy load the OCR predictor model."""
     global _predictor
     if _predictor is None:
-        # Use pre-trained model: db_resnet50 for detection + crnn_vgg16_bn for recognition
-        # Set pretrained=True to download weights automatically
-        _predictor = ocr_predictor(det_arch='db_resnet50', reco_arch='crnn_vgg16_bn', pretrained=True)
+        log.info("loading OCR predictor: backend=%s det=%s reco=%s int8=%s threads=%s",
+                 OCR_BACKEND, OCR_DET_ARCH, OCR_RECO_ARCH, OCR_INT8, OCR_THREADS or "default")
+        _predictor = build_predictor()
     return _predictor
 
+def warm_up() -> None:
+    """Load the OCR models now instead of on the first page (worker processes only)."""
+    _get_predictor()
+
+def page_key(doc_id: str, page: int) -> str:
+    return f"{doc_id}/layout/{page}.json"
+
+
+def manifest_key(doc_id: str) -> str:
+    # Written after every page artifact: its presence means they are all there
+    return f"{doc_id}/layout/manifest.json"
+
+
 def run(doc_id: str) -> Dict[str, bool]:
     """
     OCR pipeline using docTR and pypdfium2 for memory efficiency:
-      1) Load PDF bytes from MinIO storage.
+      1) Open the PDF from storage as a seekable stream (ranged reads, no full copy).
       2) Use pypdfium2 to iterate through pages one by one.
-      3) Render each page individually and run docTR predictor.
+      3) Render each page individually (scale chosen per page, see plan_render)
+         and run docTR predictor.
       4) Extract text with bounding boxes from docTR output.
-      5) Save page images and layout_index.json.
+      5) Save each page's layout as `{doc_id}/layout/{page}.json` as soon as it
+         is done, then `{doc_id}/layout/manifest.json` and the whole
+         layout_index.json. Stages that work page by page (services/tables.py)
+         read the per-page artifacts and never hold the whole layout. Page
+         images are rendered on demand (services/page_images.py), not here.
     Returns: {"layout_index": True}
     """
-    pdf_bytes = _fetch_pdf_bytes(doc_id)
-    if not pdf_bytes:
+    pdf_stream = open_pdf_stream(doc_id)
+    if pdf_stream is None:
         # Fallback: keep compatibility so the app has at least one span
         layout = {"pages": {"1": {"width": 800, "height": 1100,
                                   "spans": [{"start": 10, "end": 30, "bbox": [100, 200, 250, 40], "text": ""}]}}}
+        put_json(page_key(doc_id, 1), layout["pages"]["1"])
+        put_json(manifest_key(doc_id), {"pages": [1]})
         put_json(f"{doc_id}/layout_index.json", layout)
         return {"layout_index": True}
 
-    # Use pypdfium2 to avoid loading all rasterized pages at once
-    pdf = pdfium.PdfDocument(io.BytesIO(pdf_bytes))
+    # Use pypdfium2 to avoid loading all rasterized pages at once; it reads the
+    # stream lazily, so only the byte ranges pdfium touches are fetched
+    pdf = pdfium.PdfDocument(pdf_stream)
     predictor = _get_predictor()
 
     layout = {"pages": {}}
@@ -49,98 +137,165 @@ def run(doc_id: str) -> Dict[str, bool]:
     for page_idx in range(len(pdf)):
         page_num = page_idx + 1
         page = pdf.get_page(page_idx)
-        # Render at 2x scale (approx 144 DPI) for good balance of OCR quality and memory
-        bitmap = page.render(scale=2)
-        page_img = bitmap.to_pil()
-
-        # Convert to numpy array for docTR
-        page_np = np.array(page_img)
+        plan = plan_render(page)
+        page_np = render_page(page, plan["scale"], plan["grayscale"])
 
         # Run OCR prediction on single page
         result = predictor([page_np])
         page_data = result.pages[0]
 
-        # Save page image as JPEG
-        buf = io.BytesIO()
-        page_img.save(buf, format="JPEG", quality=85)
-        put_bytes(f"{doc_id}/pages/{page_num}.jpg", buf.getvalue(), content_type="image/jpeg")
-
-        page_width = page_img.width
-        page_height = page_img.height
-
-        page_spans: List[Dict] = []
-        cursor = 0  # character index within this page
-
-        # Process blocks -> lines -> words
-        for block in page_data.blocks:
-            for line in block.lines:
-                for word in line.words:
-                    text = word.value.strip()
-                    if not text:
-                        continue
-
-                    # docTR provides normalized coordinates (0-1)
-                    # Format: ((x_min, y_min), (x_max, y_max))
-                    geometry = word.geometry
-                    x_min, y_min = geometry[0]
-                    x_max, y_max = geometry[1]
-
-                    # Convert to pixel coordinates
-                    left = int(x_min * page_width)
-                    top = int(y_min * page_height)
-                    width = int((x_max - x_min) * page_width)
-                    height = int((y_max - y_min) * page_height)
-
-                    # Add space before word if not first word
-                    if page_spans:
-                        cursor += 1
-
-                    start = cursor
-                    cursor += len(text)
-                    end = cursor
-
-                    page_spans.append({
-                        "start": start,
-                        "end": end,
-                        "bbox": [left, top, width, height],  # x, y, w, h in pixels
-                        "text": text,
-                        "confidence": word.confidence,  # docTR provides confidence scores
-                    })
-
-        layout["pages"][str(page_num)] = {
+        page_height, page_width = page_np.shape[:2]
+        del page_np
+
+        page_spans = page_spans_from(page_data, page_width, page_height)
+
+        layout["pages"][str(page_num)] = entry = {
             "width": page_width,
             "height": page_height,
+            # bboxes are in pixels of this rendering: scale = pixels per PDF point
+            "scale": plan["scale"],
+            "grayscale": plan["grayscale"],
             "spans": page_spans,
         }
+        put_json(page_key(doc_id, page_num), entry)
 
         # Explicitly close to help GC
         page.close()
 
     pdf.close()
+    pdf_stream.close()
 
+    put_json(manifest_key(doc_id), {"pages": [int(n) for n in layout["pages"]]})
     put_json(f"{doc_id}/layout_index.json", layout)
     return {"layout_index": True}
 
 
 # --- helpers ---------------------------------------------------------------
 
-def _fetch_pdf_bytes(doc_id: str) -> bytes | None:
+def _line_heights(ink: np.ndarray) -> np.ndarray:
+    """Heights (probe pixels) of runs of ink rows, per vertical strip of the page."""
+    runs = []
+    for strip in np.array_split(ink, _PROBE_STRIPS, axis=1):
+        # Vertical rules (table grids, borders) would join every line they cross
+        strip = strip[:, strip.mean(axis=0) < 0.5]
+        rows = strip.any(axis=1).astype(np.int8)
+        edges = np.diff(np.concatenate(([0], rows, [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        runs.append(ends - starts)
+    return np.concatenate(runs)
+
+def plan_render(page: Any) -> Dict[str, Any]:
+    """
+    Render scale and colour mode for one page.
+
+    A 72 dpi probe gives the ink share, whether the page has any colour and
+    the height of its text lines (row runs of ink, per strip). The scale
+    brings the smaller text (20th percentile of line heights) to
+    OCR_TARGET_LINE_PX, clamped to [OCR_MIN_SCALE, OCR_MAX_SCALE] and to
+    OCR_MAX_PIXELS; a near-empty page gets OCR_MIN_SCALE. Large renders of
+    pages without colour use grayscale: pdfium's bitmap is then one byte per
+    pixel instead of three, so rendering peaks at 4 bytes per pixel (bitmap
+    plus the RGB array the predictor takes) rather than 6. The array handed
+    to OCR is the same size either way.
+    """
+    if OCR_RENDER != "adaptive":
+        return {"scale": OCR_FIXED_SCALE, "grayscale": False}
+    width_pt, height_pt = page.get_size()
+    budget = (OCR_MAX_PIXELS / max(width_pt * height_pt, 1.0)) ** 0.5
+
+    probe_scale = min(_PROBE_SCALE, (_PROBE_MAX_PIXELS / max(width_pt * height_pt, 1.0)) ** 0.5)
+    probe = page.render(scale=probe_scale, rev_byteorder=True).to_numpy()
+    r, g, b = probe[..., 0], probe[..., 1], probe[..., 2]  # per channel: much faster than axis=2 reductions
+    lo = np.minimum(np.minimum(r, g), b)
+    chroma = np.maximum(np.maximum(r, g), b) - lo
+    monochrome = bool((chroma > _COLOUR_CHROMA).mean() < _COLOUR_SHARE)
+    ink = lo < _INK_LEVEL
+    ink_share = float(ink.mean())
+    if ink_share < _EMPTY_INK:
+        scale = OCR_MIN_SCALE
+    else:
+        heights = _line_heights(ink)
+        heights = heights[heights >= 2]  # rules and specks
+        if heights.size:
+            line_pt = float(np.percentile(heights, 20)) / probe_scale
+            scale = OCR_TARGET_LINE_PX / line_pt
+        else:
+            scale = OCR_FIXED_SCALE
+    scale = min(max(scale, OCR_MIN_SCALE), OCR_MAX_SCALE, budget)
+    # pdfium's grayscale rendering is slower; it pays off in memory on large renders
+    grayscale = monochrome and width_pt * height_pt * scale * scale >= OCR_GRAY_MIN_PIXELS
+    return {"scale": round(scale, 3), "grayscale": grayscale}
+
+def render_page(page: Any, scale: float, grayscale: bool = False) -> np.ndarray:
+    """HxWx3 uint8 RGB array of the page, as the OCR predictor takes it.
+
+    A grayscale render is expanded to three channels here, so only pdfium's
+    bitmap is smaller; the predictor needs an ordinary writable RGB array.
+    """
+    bitmap = page.render(scale=scale, grayscale=grayscale, rev_byteorder=True)
+    pixels = bitmap.to_numpy()  # a view of pdfium's buffer: copied before the bitmap goes
+    if pixels.ndim == 2:
+        return np.repeat(pixels[:, :, None], 3, axis=2)
+    return pixels.copy()
+
+def page_spans_from(page_data: Any, page_width: int, page_height: int) -> List[Dict]:
+    """Word spans (character offsets within the page text, pixel bboxes) from a predicted page."""
+    page_spans: List[Dict] = []
+    cursor = 0  # character index within this page
+
+    # Process blocks -> lines -> words
+    for block in page_data.blocks:
+        for line in block.lines:
+            for word in line.words:
+                text = word.value.strip()
+                if not text:
+                    continue
+
+                # docTR provides normalized coordinates (0-1)
+                # Format: ((x_min, y_min), (x_max, y_max))
+                geometry = word.geometry
+                x_min, y_min = geometry[0]
+                x_max, y_max = geometry[1]
+
+                # Convert to pixel coordinates
+                left = int(x_min * page_width)
+                top = int(y_min * page_height)
+                width = int((x_max - x_min) * page_width)
+                height = int((y_max - y_min) * page_height)
+
+                # Add space before word if not first word
+                if page_spans:
+                    cursor += 1
+
+                start = cursor
+                cursor += len(text)
+                end = cursor
+
+                page_spans.append({
+                    "start": start,
+                    "end": end,
+                    "bbox": [left, top, width, height],  # x, y, w, h in pixels
+                    "text": text,
+                    "confidence": float(word.confidence),  # docTR provides confidence scores
+                })
+    return page_spans
+
+def open_pdf_stream(doc_id: str) -> BinaryIO | None:
     """
-    Fetch PDF bytes from MinIO storage.
+    Open the original PDF as a seekable stream from storage.
     Falls back to local disk if storage fails.
     """
-    # First try MinIO storage
-    pdf_bytes = get_bytes(f"{doc_id}/original.pdf")
-    if pdf_bytes:
-        return pdf_bytes
+    # First try object storage
+    stream = open_stream(f"{doc_id}/original.pdf")
+    if stream is not None:
+        return stream
 
     # Fallback: try local disk (for dev environment)
     try:
         import os
         path = f"/app_storage/{doc_id}/original.pdf"
         if os.path.exists(path):
-            with open(path, "rb") as f:
-                return f.read()
+            return open(path, "rb")
     except Exception:
         pass
 
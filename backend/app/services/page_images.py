@@ -0,0 +1,208 @@
+# backend/app/services/page_images.py
+"""
+Page images rendered on demand from the original PDF (GET /docs/{doc_id}/pages/{n}).
+
+Ingestion no longer renders, encodes and uploads a JPEG of every page; most
+pages are never looked at. A request renders just that page at the requested
+size variant, JPEG-encodes it and keeps the result in a bounded in-process
+LRU cache (PAGE_CACHE_MB), so a viewer paging back and forth costs one render
+per page and size.
+
+The original PDF of a document never changes, so a page image is identified
+by (doc_id, page, variant, RENDER_VERSION): that is its ETag, and a client
+revalidating a cached image gets a 304 without a render. Every request still
+checks that the original exists (one HEAD on S3) and that the page is in
+range, against a per-process cache of page counts, so a deleted document or
+an out-of-range page is a 404 even with a matching If-None-Match or a warm
+render cache. Bump RENDER_VERSION when rendering output changes.
+
+pdfium is not thread-safe, so renders take a process-wide lock. Ranged
+network streams are spooled to a temp file before it, so the lock is only
+held around pdfium calls on local data.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Optional, Tuple
+
+_MB = 1024 * 1024
+
+RENDER_VERSION = "1"
+# Longest side in pixels per size variant
+SIZES: Dict[str, int] = {"thumb": 256, "preview": 1024, "full": 2048}
+JPEG_QUALITY = int(os.getenv("PAGE_JPEG_QUALITY", "80"))
+CACHE_MAX_BYTES = int(float(os.getenv("PAGE_CACHE_MB", "64")) * _MB)
+CACHE_CONTROL = os.getenv("PAGE_CACHE_CONTROL", "private, max-age=86400")
+
+# pdfium is not thread-safe: one render at a time per process (cache hits don't wait)
+_pdfium_lock = threading.Lock()
+_PAGE_COUNTS_MAX = 4096
+
+
+class PageNotFound(LookupError):
+    pass
+
+
+def etag(doc_id: str, page: int, size: str) -> str:
+    digest = hashlib.sha1(f"{doc_id}:{page}:{size}:{JPEG_QUALITY}:{RENDER_VERSION}".encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def matches(if_none_match: str, tag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 specifies for GET)."""
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or tag in tags
+
+
+class RenderCache:
+    """LRU of encoded page images, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Tuple[str, int, str], bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: Tuple[str, int, str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._items.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Tuple[str, int, str], body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._items[key] = body
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._items), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+cache = RenderCache()
+_page_counts: "OrderedDict[str, int]" = OrderedDict()
+_page_counts_lock = threading.Lock()
+
+
+def _remember_pages(doc_id: str, n: int) -> None:
+    with _page_counts_lock:
+        _page_counts[doc_id] = n
+        _page_counts.move_to_end(doc_id)
+        if len(_page_counts) > _PAGE_COUNTS_MAX:
+            _page_counts.popitem(last=False)
+
+
+def _known_pages(doc_id: str) -> Optional[int]:
+    with _page_counts_lock:
+        return _page_counts.get(doc_id)
+
+
+def _check_range(doc_id: str, page: int, n: int) -> None:
+    if not 1 <= page <= n:
+        raise PageNotFound(f"document {doc_id} has {n} pages")
+
+
+def _open_pdf(doc_id: str) -> BinaryIO:
+    from .ocr import open_pdf_stream
+
+    stream = open_pdf_stream(doc_id)
+    if stream is None:
+        raise PageNotFound(f"document {doc_id} not found")
+    return stream
+
+
+def _local(stream: BinaryIO) -> BinaryIO:
+    """`stream` if it is a local file, else a temp-file copy of it (read outside the pdfium lock)."""
+    try:
+        stream.fileno()
+        return stream
+    except (OSError, AttributeError):
+        spool = tempfile.TemporaryFile()
+        shutil.copyfileobj(stream, spool, _MB)
+        stream.close()
+        spool.seek(0)
+        return spool  # type: ignore[return-value]
+
+
+def render_jpeg(doc_id: str, stream: BinaryIO, page: int, size: str) -> bytes:
+    """JPEG of page `page` (1-based) of the PDF in `stream`, scaled so its longest side is SIZES[size] pixels."""
+    import pypdfium2 as pdfium
+
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(stream)
+        try:
+            n = len(pdf)
+            _remember_pages(doc_id, n)
+            _check_range(doc_id, page, n)
+            pdf_page = pdf.get_page(page - 1)
+            width_pt, height_pt = pdf_page.get_size()
+            scale = SIZES[size] / max(width_pt, height_pt, 1.0)
+            img = pdf_page.render(scale=scale, rev_byteorder=True).to_pil()
+            pdf_page.close()
+        finally:
+            pdf.close()
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return buf.getvalue()
+
+
+def check_page(doc_id: str, page: int) -> None:
+    """Raise PageNotFound unless the document's original exists and has page `page`."""
+    stream = _open_pdf(doc_id)
+    try:
+        n = _known_pages(doc_id)
+        if n is None:
+            import pypdfium2 as pdfium
+
+            stream = _local(stream)
+            with _pdfium_lock:
+                pdf = pdfium.PdfDocument(stream)
+                n = len(pdf)
+                pdf.close()
+            _remember_pages(doc_id, n)
+    finally:
+        stream.close()
+    _check_range(doc_id, page, n)
+
+
+def get_page_image(doc_id: str, page: int, size: str) -> bytes:
+    stream = _open_pdf(doc_id)
+    try:
+        n = _known_pages(doc_id)
+        if n is not None:
+            _check_range(doc_id, page, n)
+            body = cache.get((doc_id, page, size))
+            if body is not None:
+                return body
+        stream = _local(stream)
+        body = render_jpeg(doc_id, stream, page, size)
+    finally:
+        stream.close()
+    cache.put((doc_id, page, size), body)
+    return body
@@ -1,5 +1,6 @@
 # app/services/pipeline.py
-from celery import chain
+import os
+from celery import chain, group
 from celery import shared_task  # use shared_task for robustness
 from .ocr import run as ocr_run
 from .tables import run as tables_run
@@ -9,39 +10,66 @@ from .deadlines import run as deadlines_run
 from .rules import run as rules_run
 from .summarizer import run as summary_run
 from .guidance import compose as compose_run
+from . import audit
+from . import rule_versions
+
+# Cache affinity: each worker also consumes its own "node.<hostname>" queue
+# (see workers/celery_app.py), and a finished stage routes the rest of the
+# document's chain there, where its artifacts are in the local artifact cache.
+# Off by default: tasks pinned to a node wait for that node if it goes down.
+NODE_AFFINITY = os.getenv("CELERY_NODE_AFFINITY", "false").lower() == "true"
+
+def node_queue(hostname: str) -> str:
+    return f"node.{hostname}"
+
+def _pin_rest_of_chain(task) -> None:
+    hostname = getattr(task.request, "hostname", None)
+    if not NODE_AFFINITY or not hostname:
+        return
+    for sig in task.request.chain or []:
+        sig.setdefault("options", {})["queue"] = node_queue(hostname)
+
+def _run_stage(task, stage: str, fn, doc_id: str):
+    # Times the stage and records it in the audit table (see services/audit.py)
+    with audit.stage(doc_id, stage) as rec:
+        rec.output = fn(doc_id) or {}
+    _pin_rest_of_chain(task)
+    return rec.output
 
 # IMPORTANT: names must match the strings you see in the error logs
-@shared_task(name="app.services.pipeline.task_ocr")
-def task_ocr(doc_id):
-    return ocr_run(doc_id)
+@shared_task(name="app.services.pipeline.task_ocr", bind=True)
+def task_ocr(self, doc_id):
+    return _run_stage(self, "ocr", ocr_run, doc_id)
 
-@shared_task(name="app.services.pipeline.task_tables")
-def task_tables(doc_id):
-    return tables_run(doc_id)
+@shared_task(name="app.services.pipeline.task_tables", bind=True)
+def task_tables(self, doc_id):
+    return _run_stage(self, "tables", tables_run, doc_id)
 
-@shared_task(name="app.services.pipeline.task_emb")
-def task_emb(doc_id):
-    return emb_run(doc_id)
+@shared_task(name="app.services.pipeline.task_emb", bind=True)
+def task_emb(self, doc_id):
+    return _run_stage(self, "emb", emb_run, doc_id)
 
-@shared_task(name="app.services.pipeline.task_clauses")
-def task_clauses(doc_id):
-    return clauses_run(doc_id)
+@shared_task(name="app.services.pipeline.task_clauses", bind=True)
+def task_clauses(self, doc_id):
+    return _run_stage(self, "clauses", clauses_run, doc_id)
 
-@shared_task(name="app.services.pipeline.task_deadlines")
-def task_deadlines(doc_id):
-    return deadlines_run(doc_id)
+@shared_task(name="app.services.pipeline.task_deadlines", bind=True)
+def task_deadlines(self, doc_id):
+    return _run_stage(self, "deadlines", deadlines_run, doc_id)
 
-@shared_task(name="app.services.pipeline.task_rules")
-def task_rules(doc_id):
-    return rules_run(doc_id)
+@shared_task(name="app.services.pipeline.task_rules", bind=True)
+def task_rules(self, doc_id):
+    return _run_stage(self, "rules", rules_run, doc_id)
 
-@shared_task(name="app.services.pipeline.task_summary")
-def task_summary(doc_id):
-    return summary_run(doc_id)
+@shared_task(name="app.services.pipeline.task_summary", bind=True)
+def task_summary(self, doc_id):
+    return _run_stage(self, "summary", summary_run, doc_id)
 
-@shared_task(name="app.services.pipeline.task_compose")
-def task_compose(doc_id):
-    return compose_run(doc_id)
+@shared_task(name="app.services.pipeline.task_compose", bind=True)
+def task_compose(self, doc_id):
+    result = _run_stage(self, "compose", compose_run, doc_id)
+    audit.complete(doc_id)
+    return result
 
 def enqueue_ingestion(doc_id: str):
     return chain(
@@ -55,4 +83,10 @@ def enqueue_ingestion(doc_id: str):
         task_compose.si(doc_id),#type: ignore
     ).apply_async()
 
-    return workflow.apply_async()
+# Rule rollouts (services/rule_versions.py): one task per batch of documents
+@shared_task(name="app.services.pipeline.task_rule_rollout")
+def task_rule_rollout(rollout_id, doc_ids):
+    return rule_versions.run_batch(rollout_id, doc_ids)
+
+def enqueue_rule_rollout(rollout_id: int, batches):
+    return group(task_rule_rollout.si(rollout_id, b) for b in batches).apply_async()#type: ignore
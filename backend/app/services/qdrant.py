@@ -1,27 +1,117 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import logging
 import uuid
 import os
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, Batch, Filter, FieldCondition, MatchValue
-from sentence_transformers import SentenceTransformer
+import threading
+import time
+import numpy as np
 
-_qdrant = QdrantClient(url=os.getenv("QDRANT_URL", "http://qdrant:6333"))
+log = logging.getLogger("titan.embed")
+
+# qdrant_client and sentence_transformers (torch) are imported on first use:
+# importing this module must stay cheap for the API (see services/warmup.py)
+_QDRANT_URL = os.getenv("QDRANT_URL", "http://qdrant:6333")
 _COL = "spans"
 # Using all-mpnet-base-v2: Better quality, Apache 2.0 license, 768 dimensions
-_model = SentenceTransformer("sentence-transformers/all-mpnet-base-v2")
+MODEL_NAME = os.getenv("EMBED_MODEL", "sentence-transformers/all-mpnet-base-v2")
+# torch: sentence-transformers; onnx: int8 ONNX Runtime export (services/embed_onnx.py)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()
+# Shared embedding server (app/embed_server.py); empty: always embed in-process
+EMBED_SERVER_URL = os.getenv("EMBED_SERVER_URL", "")
+_SERVER_TIMEOUT = float(os.getenv("EMBED_SERVER_TIMEOUT", "10"))
+# After a failed call, embed in-process for this long before trying the server again
+_SERVER_RETRY_SECONDS = float(os.getenv("EMBED_SERVER_RETRY_SECONDS", "30"))
+
+_qdrant = None
+_model = None
+_collection_ready = False
+_http = None
+_server_down_until = 0.0
+_client_lock = threading.Lock()
+_model_lock = threading.Lock()
+
+def get_client():
+    global _qdrant
+    if _qdrant is None:
+        with _client_lock:
+            if _qdrant is None:
+                from qdrant_client import QdrantClient
+                _qdrant = QdrantClient(url=_QDRANT_URL)
+    return _qdrant
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                if EMBED_BACKEND == "onnx":
+                    from .embed_onnx import OnnxEmbedder
+                    _model = OnnxEmbedder()
+                else:
+                    from sentence_transformers import SentenceTransformer
+                    _model = SentenceTransformer(MODEL_NAME)
+    return _model
 
 def ensure_collection(dim: int = 768) -> None:
-    cols = {c.name for c in _qdrant.get_collections().collections}
+    # Checked once per process; the collection is never dropped by the app
+    global _collection_ready
+    if _collection_ready:
+        return
+    from qdrant_client.models import Distance, VectorParams
+    client = get_client()
+    cols = {c.name for c in client.get_collections().collections}
     if _COL not in cols:
-        _qdrant.create_collection(_COL, vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+        client.create_collection(_COL, vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+    _collection_ready = True
+
+def _server():
+    global _http
+    if _http is None:
+        with _client_lock:
+            if _http is None:
+                import httpx
+                _http = httpx.Client(base_url=EMBED_SERVER_URL, timeout=_SERVER_TIMEOUT)
+    return _http
+
+def _embed_remote(texts: List[str]) -> Optional[np.ndarray]:
+    """Vectors from the embedding server, or None when it's not configured or failing."""
+    global _server_down_until
+    if not EMBED_SERVER_URL or time.monotonic() < _server_down_until:
+        return None
+    import httpx
+    try:
+        resp = _server().post("/embed", json={"texts": texts})
+        resp.raise_for_status()
+        rows, dim = (int(x) for x in resp.headers["X-Embedding-Shape"].split(","))
+        dtype = resp.headers.get("X-Embedding-Dtype", "<f4")
+        return np.frombuffer(resp.content, dtype=dtype).reshape(rows, dim)
+    except (httpx.HTTPError, KeyError, ValueError) as e:
+        _server_down_until = time.monotonic() + _SERVER_RETRY_SECONDS
+        log.warning("embed server %s failed (%s: %s); embedding in-process for %.0fs",
+                    EMBED_SERVER_URL, type(e).__name__, e, _SERVER_RETRY_SECONDS)
+        return None
 
 def embed(texts: List[str]) -> List[List[float]]:
-    return _model.encode(texts, normalize_embeddings=True).tolist() # type: ignore
+    vectors = _embed_remote(texts)
+    if vectors is None:
+        vectors = get_model().encode(texts, normalize_embeddings=True)
+    return vectors.tolist() # type: ignore
+
+def warm_up_embedder() -> None:
+    """Check the embedding server when one is configured, else load the model here."""
+    if EMBED_SERVER_URL and time.monotonic() >= _server_down_until:
+        try:
+            _server().get("/health").raise_for_status()
+            return
+        except Exception as e:
+            log.warning("embed server %s not reachable (%s); loading the model in-process", EMBED_SERVER_URL, e)
+    get_model()
 
 def _stable_id(doc: str, idx: int) -> str:
     return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{doc}::{idx}"))
 
 def upsert_spans(doc_id: str, spans: List[Dict[str, Any]]) -> None:
+    from qdrant_client.models import Batch
     ensure_collection()
     if not spans:
         return
@@ -34,15 +124,16 @@ def upsert_spans(doc_id: str, spans: List[Dict[str, Any]]) -> None:
         ids = [_stable_id(doc_id, i + j) for j in range(len(batch))]
         payloads = [{"doc_id": doc_id, **s} for s in batch]
 
-        _qdrant.upsert(
+        get_client().upsert(
             collection_name=_COL,
             points=Batch(ids=ids, vectors=vectors, payloads=payloads),#type: ignore
             wait=True,
         )
 
 def search_spans(doc_id: str, query: str, top_k: int = 5):
+    from qdrant_client.models import Filter, FieldCondition, MatchValue
     ensure_collection()
     vec = embed([query])[0]
     qfilter = Filter(must=[FieldCondition(key="doc_id", match=MatchValue(value=doc_id))])
-    hits = _qdrant.search(collection_name=_COL, query_vector=vec, limit=top_k, query_filter=qfilter, with_payload=True)
+    hits = get_client().search(collection_name=_COL, query_vector=vec, limit=top_k, query_filter=qfilter, with_payload=True)
     return [h.payload or {} for h in hits]
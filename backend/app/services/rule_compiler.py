@@ -0,0 +1,348 @@
+# backend/app/services/rule_compiler.py
+"""
+Compiled form of the YAML rule spec evaluated by services.rules.evaluate_rules_yaml.
+
+`compile_rules(spec)` does all per-rule work once:
+  - dotted paths are split (and list indices parsed) ahead of time,
+  - operator strings ("< 30", ">= '2025-01-01'") are parsed and the right-hand
+    side is pre-coerced into every type _coerce_types could pick at runtime
+    (number, datetime, raw string), so evaluation only selects one by LHS type,
+  - an equality guard on `clause.type` is lifted out of the predicates and used
+    to index rules by clause type.
+
+`evaluate_compiled` then tests each clause only against the rules guarded by
+its type (plus unguarded rules). Results are identical to evaluate_rules_yaml,
+including fire order (rule order first, then clause order).
+
+`load_compiled(path)` caches compiled rule sets per file, keyed by mtime/size
+and content hash, so unchanged files are neither re-parsed nor re-compiled.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+try:
+    import yaml
+except Exception:
+    yaml = None
+
+from .rules import _OP_RE, _cmp, _try_parse_datetime, _try_parse_number
+
+Clause = Dict[str, Any]
+Predicate = Callable[[Clause], bool]
+
+NO_GUARD = object()
+_ISO_RE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+
+# --- path access -----------------------------------------------------------
+
+Steps = List[Tuple[str, Optional[int]]]
+
+
+def path_steps(key: str) -> Optional[Steps]:
+    """
+    Parsed steps below `clause` for a dotted key (list indices pre-parsed),
+    or None when the key doesn't start at `clause` and so never resolves.
+    """
+    parts = key.split(".")
+    if parts[0] != "clause":
+        return None
+    steps: Steps = []
+    for part in parts[1:]:
+        try:
+            idx: Optional[int] = int(part)
+        except ValueError:
+            idx = None
+        steps.append((part, idx))
+    return steps
+
+
+def compile_path(key: str) -> Callable[[Clause], Any]:
+    """
+    Equivalent of `_get_in({"clause": clause}, key, None)` with the path parsed once.
+    """
+    steps = path_steps(key)
+    if steps is None:
+        # The root dict only has "clause"; any other first segment is always missing
+        return lambda clause: None
+
+    if len(steps) == 1:
+        name = steps[0][0]
+
+        def get1(clause: Clause) -> Any:
+            if isinstance(clause, dict):
+                return clause.get(name)
+            return walk(clause, steps)
+        return get1
+
+    def get(clause: Clause) -> Any:
+        return walk(clause, steps)
+    return get
+
+
+def walk(cur: Any, steps: Steps) -> Any:
+    for part, idx in steps:
+        if isinstance(cur, dict):
+            if part in cur:
+                cur = cur[part]
+            else:
+                return None
+        elif isinstance(cur, list):
+            if idx is None or not (0 <= idx < len(cur)):
+                return None
+            cur = cur[idx]
+        else:
+            return None
+    return cur
+
+
+# --- predicates ------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Comparison:
+    """A parsed `key: "<op> rhs"` condition with the RHS pre-coerced."""
+    key: str
+    op: str
+    rhs_str: str
+    rhs_num: Any
+    rhs_dt: Any
+    rhs_iso: bool
+
+    def rhs_for(self, lhs: Any) -> Any:
+        # Mirrors services.rules._coerce_types, without re-parsing the RHS
+        if isinstance(lhs, (int, float)):
+            return self.rhs_num
+        if isinstance(lhs, datetime):
+            return self.rhs_dt
+        if isinstance(lhs, str):
+            try:
+                float(lhs)
+                return self.rhs_num
+            except ValueError:
+                pass
+            if self.rhs_iso:
+                return self.rhs_dt
+        return self.rhs_str
+
+
+def parse_condition(key: str, val: Any) -> Comparison | None:
+    """Comparison for operator strings, None for plain equality conditions."""
+    if not isinstance(val, str):
+        return None
+    m = _OP_RE.match(val)
+    if not m:
+        return None
+    op, rhs = m.group(1), m.group(2)
+    if len(rhs) >= 2 and rhs[0] == rhs[-1] and rhs[0] in ("'", '"'):
+        rhs = rhs[1:-1]
+    return Comparison(
+        key=key, op=op, rhs_str=rhs,
+        rhs_num=_try_parse_number(rhs),
+        rhs_dt=_try_parse_datetime(rhs),
+        rhs_iso=bool(_ISO_RE.match(rhs)),
+    )
+
+
+@dataclass(frozen=True)
+class Condition:
+    """Declarative form of one `key: value` entry, for non-Python backends (NumPy, SQL)."""
+    key: str
+    value: Any
+    cmp: Optional[Comparison]  # None: plain equality against `value`
+
+
+def parse_group(cond: Dict[str, Any]) -> Tuple[Condition, ...]:
+    return tuple(Condition(k, v, parse_condition(k, v)) for k, v in cond.items())
+
+
+def compile_condition(key: str, val: Any) -> Predicate:
+    get = compile_path(key)
+    cmp = parse_condition(key, val)
+    if cmp is None:
+        return lambda clause: get(clause) == val
+    op = cmp.op
+    rhs_for = cmp.rhs_for
+
+    def pred(clause: Clause) -> bool:
+        lhs = get(clause)
+        return _cmp(lhs, op, rhs_for(lhs))
+    return pred
+
+
+def _compile_group(cond: Dict[str, Any]) -> Predicate:
+    preds = [compile_condition(k, v) for k, v in cond.items()]
+    if len(preds) == 1:
+        return preds[0]
+    return lambda clause: all(p(clause) for p in preds)
+
+
+# --- rule sets -------------------------------------------------------------
+
+@dataclass(frozen=True)
+class CompiledRule:
+    index: int
+    rule_id: Any
+    severity: Any
+    message: Any
+    type_guard: Any  # NO_GUARD when the rule has no clause.type equality guard
+    predicates: Tuple[Predicate, ...]
+    # Same rule, declaratively: guard AND conditions AND any(any_groups) AND all(all_groups)
+    conditions: Tuple[Condition, ...] = ()
+    any_groups: Optional[Tuple[Tuple[Condition, ...], ...]] = None
+    all_groups: Optional[Tuple[Tuple[Condition, ...], ...]] = None
+
+    def matches(self, clause: Clause) -> bool:
+        for p in self.predicates:
+            if not p(clause):
+                return False
+        return True
+
+
+@dataclass(eq=False)  # identity: hashable, usable as a cache key
+class CompiledRuleSet:
+    rules: List[CompiledRule]
+    by_type: Dict[Hashable, List[CompiledRule]] = field(default_factory=dict)
+    unguarded: List[CompiledRule] = field(default_factory=list)
+    digest: str = ""
+
+    def guarded_for(self, clause: Clause) -> List[CompiledRule]:
+        """Rules whose clause.type guard equals this clause's type."""
+        ctype = clause.get("type") if isinstance(clause, dict) else None
+        try:
+            return self.by_type.get(ctype, [])
+        except TypeError:  # unhashable type value can't equal any guard
+            return []
+
+
+def _type_guard(when: Dict[str, Any]) -> Any:
+    if "clause.type" not in when:
+        return NO_GUARD
+    val = when["clause.type"]
+    if parse_condition("clause.type", val) is not None:
+        return NO_GUARD
+    try:
+        hash(val)
+    except TypeError:
+        return NO_GUARD
+    return val
+
+
+def compile_rules(spec: Dict[str, Any], digest: str = "") -> CompiledRuleSet:
+    """Compile a rule spec (same grammar as evaluate_rules_yaml) once."""
+    compiled: List[CompiledRule] = []
+    for i, rule in enumerate((spec or {}).get("rules", []) or []):
+        when = rule.get("when", {}) or {}
+        then = rule.get("then", {}) or {}
+
+        preds: List[Predicate] = []
+        any_groups = all_groups = None
+        if "any" in when:
+            groups = [_compile_group(c) for c in when["any"]]
+            preds.append(lambda clause, gs=groups: any(g(clause) for g in gs))
+            any_groups = tuple(parse_group(c) for c in when["any"])
+        if "all" in when:
+            groups = [_compile_group(c) for c in when["all"]]
+            preds.append(lambda clause, gs=groups: all(g(clause) for g in gs))
+            all_groups = tuple(parse_group(c) for c in when["all"])
+
+        guard = _type_guard(when)
+        conditions: List[Condition] = []
+        for k, v in when.items():
+            if k in ("any", "all"):
+                continue
+            if k == "clause.type" and guard is not NO_GUARD:
+                continue  # enforced by the type index
+            preds.append(compile_condition(k, v))
+            conditions.append(Condition(k, v, parse_condition(k, v)))
+
+        compiled.append(CompiledRule(
+            index=i,
+            rule_id=rule.get("id"),
+            severity=then.get("severity", "info"),
+            message=then.get("message", ""),
+            type_guard=guard,
+            predicates=tuple(preds),
+            conditions=tuple(conditions),
+            any_groups=any_groups,
+            all_groups=all_groups,
+        ))
+
+    rs = CompiledRuleSet(rules=compiled, digest=digest)
+    for r in compiled:
+        if r.type_guard is NO_GUARD:
+            rs.unguarded.append(r)
+        else:
+            rs.by_type.setdefault(r.type_guard, []).append(r)
+    return rs
+
+
+def evaluate_compiled(ruleset: CompiledRuleSet, clauses: List[Clause], doc_id: Any) -> List[Dict[str, Any]]:
+    """Same output as evaluate_rules_yaml(spec, clauses, doc_id) for the compiled spec."""
+    per_rule: List[List[Dict[str, Any]]] = [[] for _ in ruleset.rules]
+    unguarded = ruleset.unguarded
+    for cl in clauses:
+        # Fires are bucketed per rule, so the order rules are tried in doesn't matter
+        for rules in (ruleset.guarded_for(cl), unguarded):
+            for rule in rules:
+                if rule.matches(cl):
+                    per_rule[rule.index].append({
+                        "id": None,
+                        "rule_id": rule.rule_id,
+                        "doc_id": doc_id,
+                        "clause_id": cl.get("id"),
+                        "severity": rule.severity,
+                        "message": rule.message,
+                    })
+    return [f for fires in per_rule for f in fires]
+
+
+# --- file cache ------------------------------------------------------------
+
+_cache: Dict[str, Tuple[Tuple[int, int], CompiledRuleSet]] = {}
+_cache_lock = threading.Lock()
+
+
+def parse_spec_bytes(raw: bytes, path: str = "") -> Dict[str, Any]:
+    if path.endswith(".json"):
+        import json
+        return json.loads(raw) or {}
+    if yaml is None:
+        raise RuntimeError("PyYAML is required to load YAML rule files")
+    return yaml.safe_load(raw) or {}
+
+
+def load_compiled(path: str) -> CompiledRuleSet:
+    """
+    Compiled rule set for a YAML/JSON file. Re-reads only when mtime/size change
+    and re-compiles only when the content hash changes.
+    """
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        hit = _cache.get(path)
+    if hit and hit[0] == stamp:
+        return hit[1]
+
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    if hit and hit[1].digest == digest:
+        rs = hit[1]  # touched but unchanged
+    else:
+        rs = compile_rules(parse_spec_bytes(raw, path), digest=digest)
+    with _cache_lock:
+        _cache[path] = (stamp, rs)
+    return rs
+
+
+def forget(path: str) -> None:
+    """Drop a file's cached rule set (registry eviction)."""
+    with _cache_lock:
+        _cache.pop(path, None)
@@ -0,0 +1,200 @@
+# backend/app/services/rule_registry.py
+"""
+Process-wide registry of compiled rule sets with hot reload.
+
+Lookups are dictionary reads: no stat, no YAML parsing on the request path.
+A daemon thread (started lazily in each process, so it survives Celery's
+prefork) polls the registered files every RULES_RELOAD_SECONDS. When a file
+changed, it's re-parsed and compiled (rule_compiler.load_compiled) and the
+entry is replaced in one assignment; readers see the old rule set or the new
+one, never a partial one. A file that fails to parse keeps the last good rule
+set and reports the error in `active()`. With RULES_RELOAD_SECONDS=0 there
+is no thread and every lookup checks the file instead.
+
+Rule sets are resolved per tenant: RULES_TENANT_DIR/<tenant>.yaml (or .json)
+when it exists, RULES_PATH otherwise. The schema has no tenant column, so the
+tenant is whatever the caller passes (e.g. the `tenant` query parameter).
+Ad-hoc files (per-document rules under /app_storage) go through `for_path`
+and are kept in an LRU of RULES_REGISTRY_MAX_FILES entries; resolved tenants
+are kept in an LRU of the same size, since tenant names come from requests.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from . import rule_compiler
+from .rule_compiler import CompiledRuleSet
+
+log = logging.getLogger("titan.rules")
+
+RULES_PATH = os.getenv("RULES_PATH", "/configs/rules.yaml")
+TENANT_DIR = os.getenv("RULES_TENANT_DIR", "/configs/tenants")
+RELOAD_SECONDS = float(os.getenv("RULES_RELOAD_SECONDS", "2"))
+MAX_FILES = int(os.getenv("RULES_REGISTRY_MAX_FILES", "256"))
+
+DEFAULT_TENANT = "default"
+_TENANT_RE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+EMPTY = rule_compiler.compile_rules({"rules": []})
+
+
+@dataclass(frozen=True)
+class ActiveRules:
+    path: str
+    ruleset: CompiledRuleSet
+    version: int           # bumped on every reload of this path
+    loaded_at: datetime
+    error: Optional[str] = None  # last reload failure; ruleset is the last good one
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "digest": self.ruleset.digest,
+            "rules": len(self.ruleset.rules),
+            "loaded_at": self.loaded_at,
+            "error": self.error,
+        }
+
+
+class RuleRegistry:
+    def __init__(self, default_path: str = RULES_PATH, tenant_dir: str = TENANT_DIR,
+                 reload_seconds: float = RELOAD_SECONDS, max_files: int = MAX_FILES):
+        self.default_path = default_path
+        self.tenant_dir = tenant_dir
+        self.reload_seconds = reload_seconds
+        self.max_files = max_files
+        self._entries: "OrderedDict[str, ActiveRules]" = OrderedDict()
+        self._tenants: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._stop = threading.Event()
+
+    # --- lookups -------------------------------------------------------------
+
+    def for_tenant(self, tenant: Optional[str] = None) -> CompiledRuleSet:
+        return self.for_path(self.tenant_path(tenant))
+
+    def for_path(self, path: str) -> CompiledRuleSet:
+        self._ensure_watcher()
+        entry = self._entries.get(path)
+        if entry is None or not self.reload_seconds:
+            entry = self._refresh(path)
+        else:
+            with self._lock:
+                if path in self._entries:
+                    self._entries.move_to_end(path)
+        return entry.ruleset
+
+    def tenant_path(self, tenant: Optional[str]) -> str:
+        tenant = tenant or DEFAULT_TENANT
+        path = self._tenants.get(tenant)
+        if path is None or not self.reload_seconds:
+            path = self._resolve_tenant(tenant)
+        with self._lock:
+            self._tenants[tenant] = path
+            self._tenants.move_to_end(tenant)
+            while len(self._tenants) > self.max_files:
+                self._tenants.popitem(last=False)
+        return path
+
+    def _resolve_tenant(self, tenant: str) -> str:
+        if tenant != DEFAULT_TENANT and _TENANT_RE.match(tenant) and self.tenant_dir:
+            for ext in (".yaml", ".yml", ".json"):
+                path = os.path.join(self.tenant_dir, tenant + ext)
+                if os.path.exists(path):
+                    return path
+        return self.default_path
+
+    def active(self) -> List[Dict[str, Any]]:
+        """Active version per loaded file, plus which file each tenant uses."""
+        tenants: Dict[str, List[str]] = {}
+        for tenant, path in list(self._tenants.items()):
+            tenants.setdefault(path, []).append(tenant)
+        return [{**e.describe(), "tenants": sorted(tenants.get(p, []))}
+                for p, e in list(self._entries.items())]
+
+    # --- reloading -----------------------------------------------------------
+
+    def _refresh(self, path: str) -> ActiveRules:
+        """Reload `path` if it changed; returns the entry now active."""
+        old = self._entries.get(path)
+        try:
+            ruleset = rule_compiler.load_compiled(path)
+            error = None
+        except FileNotFoundError:
+            ruleset, error = EMPTY, None
+        except Exception as e:  # keep serving the last good version
+            ruleset, error = (old.ruleset if old else EMPTY), f"{type(e).__name__}: {e}"
+            log.error("rules: failed to load %s: %s", path, error)
+
+        if old is not None and old.ruleset is ruleset:
+            entry = old if old.error == error else replace(old, error=error)
+        else:
+            entry = ActiveRules(path=path, ruleset=ruleset, loaded_at=datetime.utcnow(),
+                                version=(old.version + 1) if old else 1, error=error)
+            if old is not None:
+                log.info("rules: reloaded %s (v%d, %s)", path, entry.version, ruleset.digest[:12])
+        with self._lock:
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_files:
+                evicted, _ = self._entries.popitem(last=False)
+                rule_compiler.forget(evicted)
+        return entry
+
+    def refresh(self) -> None:
+        """Re-resolve tenants and reload every changed file (one poll)."""
+        for tenant in list(self._tenants):
+            path = self._resolve_tenant(tenant)
+            with self._lock:
+                if tenant in self._tenants:  # not evicted meanwhile
+                    self._tenants[tenant] = path
+        for path in list(self._entries):
+            self._refresh(path)
+
+    def _ensure_watcher(self) -> None:
+        if not self.reload_seconds or (self._thread is not None and self._pid == os.getpid()):
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            # First use in this process (or first use after a fork)
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="rules-reload", daemon=True)
+            self._thread.start()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.reload_seconds):
+            try:
+                self.refresh()
+            except Exception:
+                log.exception("rules: reload poll failed")
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+
+registry = RuleRegistry()
+
+
+def for_tenant(tenant: Optional[str] = None) -> CompiledRuleSet:
+    return registry.for_tenant(tenant)
+
+
+def for_path(path: str) -> CompiledRuleSet:
+    return registry.for_path(path)
+
+
+def active() -> List[Dict[str, Any]]:
+    return registry.active()
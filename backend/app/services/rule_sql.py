@@ -0,0 +1,306 @@
+# backend/app/services/rule_sql.py
+"""
+Translate compiled rules (services/rule_compiler.py) into SQL WHERE clauses
+over the `clauses` table, so the database finds the matching clauses.
+
+Python's comparison semantics depend on the runtime type of the left-hand
+side (see services.rules._coerce_types / _cmp), so every operand is
+translated into per-kind SQL expressions (is it null/missing, a number, a
+string, something else) and a condition becomes one branch per kind:
+
+    clause.normalized.notice_days: "<= 30"
+        -> (kind = number AND value <= 30)       # strings/null/lists: False
+
+    clause.type: "!= payment"
+        -> (kind = string AND type != 'payment') OR kind != string
+
+Dotted paths into `normalized` use json_type/json_extract on SQLite and
+json_typeof/json_extract_path(_text) on PostgreSQL; string comparisons use
+the "C" collation on PostgreSQL so ordering matches Python's code-point order.
+
+Every rule is matched in SQL. Where the translation can't be exact it selects
+a superset of the matching clauses and the rule is re-checked in Python on
+those candidates only: ordering a string against a number-like or ISO RHS
+(whether Python's float() accepts the string decides), list indices in paths
+and equality against lists/dicts. Other dialects evaluate in Python. On
+PostgreSQL, JSON numbers compare as double precision.
+"""
+from __future__ import annotations
+
+import math
+import weakref
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Float, and_, case, cast, false, func, literal, or_, select, true, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from ..models import Clause
+from .rule_compiler import NO_GUARD, CompiledRule, CompiledRuleSet, Condition, path_steps
+
+# Clause fields by SQL kind; anything else under `clause.` is always missing
+_STR_FIELDS = ("id", "doc_id", "type", "text")
+_NUM_FIELDS = ("page", "start", "end", "confidence")
+
+DIALECTS = ("sqlite", "postgresql")
+
+# Rules per UNION ALL statement (SQLite caps compound selects at 500)
+_RULES_PER_QUERY = 100
+_IDS_PER_QUERY = 500
+
+# Fire order within a rule, on both the SQL and the Python path
+CLAUSE_ORDER = (Clause.page, Clause.start, Clause.id)
+
+
+class _Operand:
+    """Per-kind SQL view of a path. The is_* flags are never NULL."""
+
+    def __init__(self, is_null=None, is_num=None, is_str=None, num=None, text=None):
+        self.is_null = is_null if is_null is not None else false()
+        self.is_num = is_num if is_num is not None else false()
+        self.is_str = is_str if is_str is not None else false()
+        self.num = num
+        self.text = text
+
+
+_NONE = _Operand(is_null=true())
+_OTHER = _Operand()  # dict/list: neither null, number nor string
+
+
+def _is_number(v: Any) -> bool:
+    return isinstance(v, (int, float))
+
+
+def _finite(v: Any) -> bool:
+    return not isinstance(v, float) or math.isfinite(v)
+
+
+def _apply(lhs: ColumnElement, op: str, rhs: Any) -> ColumnElement:
+    if op == "==": return lhs == rhs
+    if op == "!=": return lhs != rhs
+    if op == "<":  return lhs < rhs
+    if op == ">":  return lhs > rhs
+    if op == "<=": return lhs <= rhs
+    return lhs >= rhs
+
+
+class RuleTranslator:
+    def __init__(self, dialect: str):
+        self.dialect = dialect
+        self.exact = True
+
+    # --- operands ------------------------------------------------------------
+
+    def _text_cmp(self, text: ColumnElement, op: str, rhs: str) -> ColumnElement:
+        if op not in ("==", "!=") and self.dialect == "postgresql":
+            text = text.collate("C")  # Python orders strings by code point
+        return _apply(text, op, rhs)
+
+    def operand(self, key: str) -> Optional[_Operand]:
+        """None when the path can't be expressed in SQL."""
+        steps = path_steps(key)
+        if steps is None:
+            return _NONE
+        if not steps:
+            return _OTHER  # the clause dict itself
+        name = steps[0][0]
+        if name == "normalized":
+            if len(steps) == 1:
+                return None  # the whole normalized object
+            return self._json_operand([part for part, _ in steps[1:]], [idx for _, idx in steps[1:]])
+        if len(steps) > 1 or name not in _STR_FIELDS + _NUM_FIELDS:
+            return _NONE  # scalars have no children; unknown fields are missing
+        col = getattr(Clause, name)
+        if name in _NUM_FIELDS:
+            return _Operand(is_null=col.is_(None), is_num=col.isnot(None), num=col)
+        return _Operand(is_null=col.is_(None), is_str=col.isnot(None), text=col)
+
+    def _json_operand(self, keys: List[str], idxs: List[Optional[int]]) -> Optional[_Operand]:
+        if any(i is not None for i in idxs):
+            # walk() indexes lists *or* looks up dict keys; a JSON path can't do both
+            return None
+        if self.dialect == "sqlite":
+            if any('"' in k or "\\" in k for k in keys):
+                return None
+            path = "$" + "".join(f'."{k}"' for k in keys)
+            kind = func.coalesce(func.json_type(Clause.normalized, path), "null")
+            value = func.json_extract(Clause.normalized, path)  # true/false -> 1/0
+            return _Operand(
+                is_null=kind == "null",
+                is_num=kind.in_(("integer", "real", "true", "false")),
+                is_str=kind == "text",
+                num=value, text=value,
+            )
+        kind = func.coalesce(func.json_typeof(func.json_extract_path(Clause.normalized, *keys)), "null")
+        raw = func.json_extract_path_text(Clause.normalized, *keys)
+        num = case(
+            (kind == "boolean", case((raw == "true", 1.0), else_=0.0)),
+            (kind == "number", cast(raw, Float)),
+        )
+        return _Operand(
+            is_null=kind == "null",
+            is_num=kind.in_(("number", "boolean")),
+            is_str=kind == "string",
+            num=num, text=raw,
+        )
+
+    # --- conditions ----------------------------------------------------------
+
+    def _recheck(self, superset: ColumnElement = None) -> ColumnElement:
+        """A superset of the matching rows; the rule gets re-checked in Python."""
+        self.exact = False
+        return true() if superset is None else superset
+
+    def equals(self, o: Optional[_Operand], val: Any) -> ColumnElement:
+        if o is None:
+            return self._recheck()
+        if val is None:
+            return o.is_null
+        if _is_number(val):
+            if not _finite(val):
+                return self._recheck()
+            # True == 1 in Python
+            return and_(o.is_num, o.num == (int(val) if isinstance(val, bool) else val)) if o.num is not None else false()
+        if isinstance(val, str):
+            return and_(o.is_str, o.text == val) if o.text is not None else false()
+        return self._recheck()  # lists/dicts/dates from YAML
+
+    def condition(self, cond: Condition) -> ColumnElement:
+        o = self.operand(cond.key)
+        if cond.cmp is None:
+            return self.equals(o, cond.value)
+        if o is None:
+            return self._recheck()
+        c = cond.cmp
+        op = c.op
+        ordering = op not in ("==", "!=")
+        if _is_number(c.rhs_num):
+            if not _finite(c.rhs_num):
+                return self._recheck()
+            hit = and_(o.is_num, _apply(o.num, op, c.rhs_num)) if o.num is not None else false()
+            if op == "!=":
+                return or_(hit, ~o.is_num)
+            if ordering and o.text is not None:
+                # Non-numeric strings compare as text against the raw RHS while
+                # number-like ones never match; only float() can tell them apart
+                return or_(hit, self._recheck(and_(o.is_str, self._text_cmp(o.text, op, c.rhs_str))))
+            return hit
+        if c.rhs_iso and not isinstance(c.rhs_dt, str):
+            # Non-numeric strings meet a datetime RHS (incomparable), number-like
+            # strings compare as text; neither can equal the ISO string
+            if not ordering:
+                return true() if op == "!=" else false()
+            if o.text is None:
+                return false()
+            return self._recheck(and_(o.is_str, self._text_cmp(o.text, op, c.rhs_str)))
+        hit = and_(o.is_str, self._text_cmp(o.text, op, c.rhs_str)) if o.text is not None else false()
+        return or_(hit, ~o.is_str) if op == "!=" else hit
+
+    def group(self, conds: Sequence[Condition]) -> ColumnElement:
+        return and_(*[self.condition(c) for c in conds]) if conds else true()
+
+    def rule(self, rule: CompiledRule) -> Tuple[ColumnElement, bool]:
+        """(WHERE expression, exact). Inexact expressions select a superset."""
+        self.exact = True
+        terms = []
+        if rule.type_guard is not NO_GUARD:
+            terms.append(self.equals(self.operand("clause.type"), rule.type_guard))
+        terms.extend(self.condition(c) for c in rule.conditions)
+        if rule.any_groups is not None:
+            terms.append(or_(*[self.group(g) for g in rule.any_groups]) if rule.any_groups else false())
+        if rule.all_groups is not None:
+            terms.extend(self.group(g) for g in rule.all_groups)
+        return (and_(*terms) if terms else true()), self.exact
+
+
+Translated = List[Tuple[CompiledRule, ColumnElement, bool]]
+
+# Per rule set (compiled once per rules file version) and dialect
+_translated: "weakref.WeakKeyDictionary[CompiledRuleSet, Dict[str, Translated]]" = weakref.WeakKeyDictionary()
+
+
+def translate(ruleset: CompiledRuleSet, dialect: str) -> Optional[Translated]:
+    """(rule, WHERE expression, exact) per rule, or None for unsupported dialects."""
+    if dialect not in DIALECTS:
+        return None
+    per_dialect = _translated.setdefault(ruleset, {})
+    if dialect not in per_dialect:
+        tr = RuleTranslator(dialect)
+        per_dialect[dialect] = [(rule, *tr.rule(rule)) for rule in ruleset.rules]
+    return per_dialect[dialect]
+
+
+def _python_matches(rule: CompiledRule, clauses: List[Dict[str, Any]]) -> List[Any]:
+    guard = rule.type_guard
+    return [cl.get("id") for cl in clauses
+            if (guard is NO_GUARD or cl.get("type") == guard) and rule.matches(cl)]
+
+
+def _clause_dict(c: Clause) -> Dict[str, Any]:
+    return {
+        "id": c.id, "doc_id": c.doc_id, "type": c.type, "page": c.page,
+        "start": c.start, "end": c.end, "text": c.text,
+        "confidence": c.confidence, "normalized": c.normalized,
+    }
+
+
+def load_clause_dicts(db: Session, doc_id: str) -> List[Dict[str, Any]]:
+    rows = db.execute(select(Clause).where(Clause.doc_id == doc_id).order_by(*CLAUSE_ORDER)).scalars()
+    return [_clause_dict(c) for c in rows]
+
+
+def _load_by_id(db: Session, ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+    out: Dict[str, Dict[str, Any]] = {}
+    ids = list(ids)
+    for i in range(0, len(ids), _IDS_PER_QUERY):
+        for c in db.execute(select(Clause).where(Clause.id.in_(ids[i:i + _IDS_PER_QUERY]))).scalars():
+            out[c.id] = _clause_dict(c)
+    return out
+
+
+def find_fires(db: Session, ruleset: CompiledRuleSet, doc_id: str) -> List[Dict[str, Any]]:
+    """
+    Fires for one document, same dicts as evaluate_rules_yaml (rule order, then
+    clauses by page/start/id). The database matches every rule, UNION ALL'd in
+    batches; candidates of inexact rules are re-checked in Python.
+    """
+    rules = translate(ruleset, db.get_bind().dialect.name)
+    if rules is None:
+        clauses = load_clause_dicts(db, doc_id)
+        matched = {rule.index: _python_matches(rule, clauses) for rule in ruleset.rules}
+        return _fires(ruleset, doc_id, matched)
+
+    exact = {rule.index: is_exact for rule, _, is_exact in rules}
+    matched: Dict[int, List[Any]] = {}
+    for i in range(0, len(rules), _RULES_PER_QUERY):
+        selects = [
+            select(literal(rule.index).label("rule"), Clause.id, Clause.page, Clause.start)
+            .where(Clause.doc_id == doc_id, expr)
+            for rule, expr, _ in rules[i:i + _RULES_PER_QUERY]
+        ]
+        u = (union_all(*selects) if len(selects) > 1 else selects[0]).subquery()
+        for rule_idx, clause_id in db.execute(
+                select(u.c.rule, u.c.id).order_by(u.c.rule, u.c.page, u.c.start, u.c.id)):
+            matched.setdefault(rule_idx, []).append(clause_id)
+
+    recheck = [idx for idx in matched if not exact[idx]]
+    if recheck:
+        clauses = _load_by_id(db, {cid for idx in recheck for cid in matched[idx]})
+        for idx in recheck:
+            matched[idx] = _python_matches(ruleset.rules[idx], [clauses[cid] for cid in matched[idx]])
+    return _fires(ruleset, doc_id, matched)
+
+
+def _fires(ruleset: CompiledRuleSet, doc_id: str, matched: Dict[int, List[Any]]) -> List[Dict[str, Any]]:
+    fires: List[Dict[str, Any]] = []
+    for rule in ruleset.rules:
+        for clause_id in matched.get(rule.index, ()):
+            fires.append({
+                "id": None,
+                "rule_id": rule.rule_id,
+                "doc_id": doc_id,
+                "clause_id": clause_id,
+                "severity": rule.severity,
+                "message": rule.message,
+            })
+    return fires
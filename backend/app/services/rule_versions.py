@@ -0,0 +1,276 @@
+# backend/app/services/rule_versions.py
+"""
+Rule set versioning and incremental re-evaluation ("rollouts").
+
+Every rule is hashed over its canonical JSON form, grouped by rule id, and a
+spec version is identified by the hash of those per-rule hashes, so edits to
+comments or formatting don't create versions. Registering a new version diffs
+it against the previous one:
+
+  - removed rules: their fires are deleted across the corpus in one statement,
+  - added / changed rules: evaluated across every document that has clauses,
+    in batches of RULE_ROLLOUT_BATCH_DOCS documents (one Celery task each,
+    see services/pipeline.enqueue_rule_rollout),
+  - unchanged rules: not touched.
+
+Versions store the spec as JSON. YAML date and datetime constants are tagged
+({"$date": ...}) and restored when a worker loads the spec, so rollouts compile
+exactly what evaluate_rules_yaml sees; other non-JSON constants are rejected.
+Rule ids are compared and stored as strings.
+
+A batch replaces the fires of the evaluated rule ids for its documents, so a
+retried batch doesn't duplicate fires. Batches update the rollout's counters
+with atomic increments, in the same transaction that records the batch in
+rule_rollout_batches; a redelivered batch (task_acks_late) finds its row there
+and is skipped, so it isn't counted twice. `progress()` reports completion and
+throughput.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..db import SessionLocal
+from ..models import Clause, PolicyFire, _id
+from ..models.rules import RuleRollout, RuleRolloutBatch, RuleSetVersion
+from .bulk_write import replace_rows
+from .rule_compiler import CompiledRuleSet, compile_rules
+from .rules_bulk import CLAUSE_FIELDS, ClauseTable, evaluate_bulk
+
+log = logging.getLogger("titan.rules")
+
+BATCH_DOCS = int(os.getenv("RULE_ROLLOUT_BATCH_DOCS", "200"))
+
+_CLAUSE_COLUMNS = [getattr(Clause, name) for name in CLAUSE_FIELDS]
+
+
+# --- hashing / diff --------------------------------------------------------
+
+def _rule_key(rule: Dict[str, Any]) -> str:
+    return str(rule.get("id"))
+
+
+def spec_to_json(obj: Any) -> Any:
+    """`obj` as plain JSON, dates tagged; ValueError for constants JSON can't hold."""
+    if isinstance(obj, datetime):
+        return {"$datetime": obj.isoformat()}
+    if isinstance(obj, date):
+        return {"$date": obj.isoformat()}
+    if isinstance(obj, dict):
+        bad = [k for k in obj if not isinstance(k, str)]
+        if bad:
+            raise ValueError(f"rule spec key {bad[0]!r} is not a string")
+        return {k: spec_to_json(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [spec_to_json(v) for v in obj]
+    if obj is None or isinstance(obj, (str, bool, int, float)):
+        return obj
+    raise ValueError(f"rule spec constant {obj!r} ({type(obj).__name__}) can't be stored as JSON")
+
+
+def spec_from_json(obj: Any) -> Any:
+    """Inverse of spec_to_json."""
+    if isinstance(obj, dict):
+        if len(obj) == 1:
+            (tag, val), = obj.items()
+            if tag == "$datetime" and isinstance(val, str):
+                return datetime.fromisoformat(val)
+            if tag == "$date" and isinstance(val, str):
+                return date.fromisoformat(val)
+        return {k: spec_from_json(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [spec_from_json(v) for v in obj]
+    return obj
+
+
+def rule_hashes(spec: Dict[str, Any]) -> Dict[str, str]:
+    """{rule_id: content hash}; rules sharing an id are hashed together, in order."""
+    grouped: Dict[str, List[Any]] = {}
+    for rule in (spec or {}).get("rules", []) or []:
+        grouped.setdefault(_rule_key(rule), []).append(rule)
+    return {
+        key: hashlib.sha256(json.dumps(spec_to_json(rules), sort_keys=True).encode("utf-8")).hexdigest()
+        for key, rules in grouped.items()
+    }
+
+
+def spec_digest(hashes: Dict[str, str]) -> str:
+    return hashlib.sha256(json.dumps(hashes, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class RuleDiff:
+    added: List[str]
+    changed: List[str]
+    removed: List[str]
+    unchanged: List[str]
+
+    @property
+    def to_evaluate(self) -> List[str]:
+        return self.added + self.changed
+
+
+def diff_hashes(old: Dict[str, str], new: Dict[str, str]) -> RuleDiff:
+    return RuleDiff(
+        added=[k for k in new if k not in old],
+        changed=[k for k in new if k in old and old[k] != new[k]],
+        removed=[k for k in old if k not in new],
+        unchanged=[k for k in new if old.get(k) == new[k]],
+    )
+
+
+# --- versions / rollouts ---------------------------------------------------
+
+def current_version(db: Session) -> Optional[RuleSetVersion]:
+    return db.scalars(select(RuleSetVersion).order_by(RuleSetVersion.id.desc()).limit(1)).first()
+
+
+def start_rollout(db: Session, spec: Dict[str, Any], source: Optional[str] = None,
+                  batch_docs: int = 0) -> Tuple[Optional[RuleRollout], List[List[str]]]:
+    """
+    Register `spec` as the active version and plan its rollout. Returns the
+    rollout and the document batches to enqueue; (None, []) when the spec is
+    already the active version. ValueError when the spec holds constants JSON
+    can't store.
+    """
+    hashes = rule_hashes(spec)
+    digest = spec_digest(hashes)
+    prev = current_version(db)
+    if prev is not None and prev.digest == digest:
+        return None, []
+
+    # Re-activating an earlier spec adds a new row too: versions are ordered by id
+    version = RuleSetVersion(digest=digest, source=source, spec=spec_to_json(spec), rule_hashes=hashes)
+    db.add(version)
+    db.flush()
+
+    diff = diff_hashes(prev.rule_hashes if prev is not None else {}, hashes)
+    fires_deleted = 0
+    if diff.removed:
+        fires_deleted = db.execute(delete(PolicyFire).where(PolicyFire.rule_id.in_(diff.removed))).rowcount or 0
+
+    doc_ids: List[str] = []
+    if diff.to_evaluate:
+        doc_ids = list(db.scalars(select(Clause.doc_id).distinct().order_by(Clause.doc_id)))
+
+    rollout = RuleRollout(
+        from_version=prev.id if prev is not None else None,
+        to_version=version.id,
+        added=diff.added, changed=diff.changed, removed=diff.removed,
+        total_docs=len(doc_ids), fires_deleted=fires_deleted,
+        status="running" if doc_ids else "done",
+        finished_at=None if doc_ids else datetime.utcnow(),
+    )
+    db.add(rollout)
+    db.commit()
+
+    size = batch_docs or BATCH_DOCS
+    batches = [doc_ids[i:i + size] for i in range(0, len(doc_ids), size)]
+    log.info("rule rollout %s: v%s -> v%s, +%d ~%d -%d rules, %d docs in %d batches",
+             rollout.id, rollout.from_version, rollout.to_version, len(diff.added),
+             len(diff.changed), len(diff.removed), len(doc_ids), len(batches))
+    return rollout, batches
+
+
+_compiled: Dict[int, Tuple[List[str], CompiledRuleSet]] = {}
+_compiled_lock = threading.Lock()
+
+
+def _rules_to_evaluate(db: Session, rollout: RuleRollout) -> Tuple[List[str], CompiledRuleSet]:
+    # Compiled once per rollout per worker process
+    with _compiled_lock:
+        hit = _compiled.get(rollout.id)
+    if hit is not None:
+        return hit
+    keys = list(rollout.added) + list(rollout.changed)
+    wanted = set(keys)
+    spec = spec_from_json(db.get(RuleSetVersion, rollout.to_version).spec)
+    subset = {"rules": [r for r in spec.get("rules", []) or [] if _rule_key(r) in wanted]}
+    hit = (keys, compile_rules(subset))
+    with _compiled_lock:
+        _compiled[rollout.id] = hit
+    return hit
+
+
+def batch_key(doc_ids: Sequence[str]) -> str:
+    return hashlib.sha256("\n".join(sorted(doc_ids)).encode("utf-8")).hexdigest()
+
+
+def run_batch(rollout_id: int, doc_ids: Sequence[str]) -> Dict[str, Any]:
+    """Evaluate a rollout's added/changed rules for `doc_ids` and replace their fires."""
+    db = SessionLocal()
+    try:
+        rollout = db.get(RuleRollout, rollout_id)
+        if rollout is None:
+            return {"rollout": rollout_id, "skipped": True}
+        key = batch_key(doc_ids)
+        if db.get(RuleRolloutBatch, (rollout_id, key)) is not None:
+            return {"rollout": rollout_id, "docs": len(doc_ids), "duplicate": True}
+        keys, ruleset = _rules_to_evaluate(db, rollout)
+
+        rows = db.execute(select(*_CLAUSE_COLUMNS).where(Clause.doc_id.in_(doc_ids))).all()
+        table = ClauseTable.from_rows(rows)
+        fires = evaluate_bulk(ruleset, table).fires()
+
+        stats = replace_rows(db, PolicyFire, [PolicyFire.doc_id.in_(doc_ids), PolicyFire.rule_id.in_(keys)],
+                             [{**f, "rule_id": str(f["rule_id"]), "id": _id("pf")} for f in fires])
+        try:
+            db.add(RuleRolloutBatch(rollout_id=rollout_id, batch_key=key))
+            db.flush()
+            db.execute(
+                update(RuleRollout).where(RuleRollout.id == rollout_id).values(
+                    done_docs=RuleRollout.done_docs + len(doc_ids),
+                    clauses_evaluated=RuleRollout.clauses_evaluated + len(table),
+                    fires_inserted=RuleRollout.fires_inserted + stats.inserted,
+                    fires_deleted=RuleRollout.fires_deleted + stats.deleted,
+                )
+            )
+            db.execute(
+                update(RuleRollout)
+                .where(RuleRollout.id == rollout_id, RuleRollout.status == "running",
+                       RuleRollout.done_docs >= RuleRollout.total_docs)
+                .values(status="done", finished_at=datetime.utcnow())
+            )
+            db.commit()
+        except IntegrityError:
+            # the same batch delivered twice at once: the copy that committed first is counted
+            db.rollback()
+            return {"rollout": rollout_id, "docs": len(doc_ids), "duplicate": True}
+        return {"rollout": rollout_id, "docs": len(doc_ids), "clauses": len(table), "fires": len(fires),
+                "writes": [stats.report()]}
+    finally:
+        db.close()
+
+
+def progress(rollout: RuleRollout, now: Optional[datetime] = None) -> Dict[str, Any]:
+    end = rollout.finished_at or now or datetime.utcnow()
+    elapsed = max((end - rollout.created_at).total_seconds(), 1e-6)
+    total = rollout.total_docs or 0
+    return {
+        "id": rollout.id,
+        "from_version": rollout.from_version,
+        "to_version": rollout.to_version,
+        "status": rollout.status,
+        "added": list(rollout.added or []),
+        "changed": list(rollout.changed or []),
+        "removed": list(rollout.removed or []),
+        "total_docs": total,
+        "done_docs": rollout.done_docs,
+        "percent": 100.0 if not total else round(100.0 * min(rollout.done_docs, total) / total, 1),
+        "clauses_evaluated": rollout.clauses_evaluated,
+        "fires_inserted": rollout.fires_inserted,
+        "fires_deleted": rollout.fires_deleted,
+        "elapsed_s": round(elapsed, 3),
+        "docs_per_s": round(rollout.done_docs / elapsed, 2),
+        "clauses_per_s": round(rollout.clauses_evaluated / elapsed, 2),
+    }
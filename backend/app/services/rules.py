@@ -4,10 +4,6 @@ from typing import Any, Callable, Dict, List
 # add these near the top with your other imports
 import re, os, json
 from typing import Any, Dict, List
-try:
-    import yaml  # for rules.yaml
-except Exception:
-    yaml = None
 
 from .storage import put_json  # already used elsewhere
 
@@ -219,25 +215,6 @@ def _load_json(path: str):
     except Exception:
         return None
 
-def _load_yaml(path: str):
-    if yaml is None:
-        return None
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
-    except Exception:
-        return None
-
-def _load_rules_for(doc_id: str) -> Dict[str, Any]:
-    base = f"/app_storage/{doc_id}"
-    if not os.path.exists(base):
-        return {"rules": []}
-    # Prefer YAML, fallback to JSON, else empty spec
-    spec = _load_yaml(os.path.join(base, "rules.yaml"))
-    if spec is None:
-        spec = _load_json(os.path.join(base, "rules.json"))
-    return spec or {"rules": []}
-
 def _load_clauses_for(doc_id: str) -> List[Dict[str, Any]]:
     base = f"/app_storage/{doc_id}"
     if not os.path.exists(base):
@@ -246,6 +223,16 @@ def _load_clauses_for(doc_id: str) -> List[Dict[str, Any]]:
     # Fallback to empty list if nothing found
     return clauses or []
 
+def _load_compiled_rules_for(doc_id: str):
+    # Process-cached and hot-reloaded (see services/rule_registry.py)
+    from .rule_registry import EMPTY, for_path
+    base = f"/app_storage/{doc_id}"
+    for name in ("rules.yaml", "rules.json"):
+        path = os.path.join(base, name)
+        if os.path.exists(path):
+            return for_path(path)
+    return EMPTY
+
 def run(doc_id: str) -> Dict[str, Any]:
     """
     Policy/Rule Engine entrypoint.
@@ -253,10 +240,11 @@ def run(doc_id: str) -> Dict[str, Any]:
     evaluates them, saves results to {doc_id}/policy_results.json via storage, and
     returns a small status dict for the caller.
     """
-    spec = _load_rules_for(doc_id)
+    from .rule_compiler import evaluate_compiled
+    ruleset = _load_compiled_rules_for(doc_id)
     clauses = _load_clauses_for(doc_id)
 
-    fires = evaluate_rules_yaml(spec=spec, clauses=clauses, doc_id=doc_id)
+    fires = evaluate_compiled(ruleset, clauses, doc_id)
 
     # Persist results for the rest of the pipeline/UI
     put_json(f"{doc_id}/policy_results.json", {"doc_id": doc_id, "results": fires})
@@ -0,0 +1,337 @@
+# backend/app/services/rules_bulk.py
+"""
+Vectorized (NumPy) evaluation of a compiled rule set over many clauses at once.
+
+Clauses are loaded into a `ClauseTable`: one object array per top-level field
+(id, doc_id, type, ..., normalized). Every dotted path a rule touches
+(`clause.normalized.notice_days`, `clause.normalized.parties.1`, ...) is
+flattened once per table into a `Column` carrying the values plus a per-row
+kind code and a float64 view of the numeric rows. A condition then becomes a
+handful of array comparisons, one per kind, instead of a Python call per
+clause per rule.
+
+The semantics are those of services.rules.evaluate_rules_yaml, kind by kind
+(see `_cmp_mask`): numbers compare numerically, numeric strings against the
+numeric RHS, ISO-looking RHS against datetimes, and incomparable pairs give
+False for ordering, False for `==` and True for `!=`. Whenever NumPy can't
+reproduce Python's answer exactly (ints beyond 2**53, equality against
+lists/dicts, naive vs aware datetimes) the affected rows fall back to the
+Python comparison, so results are identical, including fire order.
+
+Rules guarded by `clause.type` only look at the rows of that type, as in
+rule_compiler.evaluate_compiled.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .rule_compiler import CompiledRule, CompiledRuleSet, Condition, path_steps, walk
+from .rules import _cmp
+
+# Column names of the clause dicts built by the routes and the pipeline
+CLAUSE_FIELDS = ("id", "doc_id", "type", "page", "start", "end", "text", "confidence", "normalized")
+
+# Per-row kind codes
+K_OTHER, K_NONE, K_NUM, K_NUMSTR, K_STR, K_DT = range(6)
+
+_EXACT_INT = 2 ** 53  # largest magnitude at which int -> float64 is lossless
+_MEMO_LIMIT = 512     # condition masks kept per evaluator
+
+
+def _obj_array(values: Iterable[Any], n: int) -> np.ndarray:
+    # fromiter keeps lists/dicts as elements instead of broadcasting them
+    return np.fromiter(values, dtype=object, count=n)
+
+
+class Column:
+    """One flattened path: raw values, kind codes and float64 numbers."""
+
+    __slots__ = ("obj", "kind", "num", "exact")
+
+    def __init__(self, obj: np.ndarray, kind: np.ndarray, num: np.ndarray, exact: bool):
+        self.obj = obj
+        self.kind = kind
+        self.num = num
+        self.exact = exact  # False if some int can't be represented in float64
+
+    @classmethod
+    def from_values(cls, obj: np.ndarray) -> "Column":
+        n = len(obj)
+        kind = np.zeros(n, dtype=np.int8)
+        num = np.full(n, np.nan)
+        exact = True
+        for i, v in enumerate(obj):
+            if isinstance(v, (int, float)):
+                kind[i] = K_NUM
+                if isinstance(v, int) and not -_EXACT_INT <= v <= _EXACT_INT:
+                    exact = False
+                else:
+                    num[i] = v
+            elif isinstance(v, str):
+                try:
+                    float(v)
+                    kind[i] = K_NUMSTR
+                except ValueError:
+                    kind[i] = K_STR
+            elif isinstance(v, datetime):
+                kind[i] = K_DT
+            elif v is None:
+                kind[i] = K_NONE
+        return cls(obj, kind, num, exact)
+
+    def take(self, rows: np.ndarray) -> "Column":
+        return Column(self.obj[rows], self.kind[rows], self.num[rows], self.exact)
+
+
+class ClauseTable:
+    """Columnar clauses. Paths are flattened lazily and cached per table."""
+
+    def __init__(self, fields: Dict[str, np.ndarray], n: int):
+        self.fields = fields
+        self.n = n
+        self._columns: Dict[str, Column] = {}
+
+    def __len__(self) -> int:
+        return self.n
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[Any]], names: Sequence[str] = CLAUSE_FIELDS) -> "ClauseTable":
+        """Tuples in `names` order, e.g. straight from a SQLAlchemy select()."""
+        n = len(rows)
+        fields = {name: _obj_array((r[j] for r in rows), n) for j, name in enumerate(names)}
+        return cls(fields, n)
+
+    @classmethod
+    def from_dicts(cls, clauses: Sequence[Dict[str, Any]]) -> "ClauseTable":
+        names: Dict[str, None] = {}
+        for cl in clauses:
+            names.update(dict.fromkeys(cl))
+        n = len(clauses)
+        fields = {name: _obj_array((cl.get(name) for cl in clauses), n) for name in names}
+        return cls(fields, n)
+
+    def take(self, rows: np.ndarray) -> "ClauseTable":
+        sub = ClauseTable({k: v[rows] for k, v in self.fields.items()}, len(rows))
+        sub._columns = {k: c.take(rows) for k, c in self._columns.items()}
+        return sub
+
+    def values(self, name: str) -> np.ndarray:
+        arr = self.fields.get(name)
+        return arr if arr is not None else np.full(self.n, None, dtype=object)
+
+    def column(self, key: str) -> Column:
+        col = self._columns.get(key)
+        if col is None:
+            col = Column.from_values(self._resolve(key))
+            self._columns[key] = col
+        return col
+
+    def _resolve(self, key: str) -> np.ndarray:
+        steps = path_steps(key)
+        if steps is None:
+            return np.full(self.n, None, dtype=object)
+        if not steps:  # bare "clause": the clause dict itself
+            names = list(self.fields)
+            return _obj_array(({k: self.fields[k][i] for k in names} for i in range(self.n)), self.n)
+        base = self.values(steps[0][0])
+        if len(steps) == 1:
+            return base
+        rest = steps[1:]
+        return _obj_array((walk(v, rest) for v in base), self.n)
+
+
+# --- masks -----------------------------------------------------------------
+
+def _const(op: str) -> bool:
+    # Python's answer for a pair of incomparable types
+    return op == "!="
+
+
+def _np_cmp(lhs: np.ndarray, op: str, rhs: Any) -> np.ndarray:
+    if op == "==": return lhs == rhs
+    if op == "!=": return lhs != rhs
+    if op == "<":  return lhs < rhs
+    if op == ">":  return lhs > rhs
+    if op == "<=": return lhs <= rhs
+    return lhs >= rhs
+
+
+def _py_cmp(values: np.ndarray, op: str, rhs: Any) -> np.ndarray:
+    return np.fromiter((_cmp(v, op, rhs) for v in values), dtype=bool, count=len(values))
+
+
+def _is_number(v: Any) -> bool:
+    return isinstance(v, (int, float))
+
+
+def _fill(out: np.ndarray, col: Column, kind: int, op: str, rhs: Any) -> None:
+    """out[rows of `kind`] = _cmp(lhs, op, rhs), vectorized where exact."""
+    rows = col.kind == kind
+    if not rows.any():
+        return
+    if kind == K_NUM:
+        if not _is_number(rhs):
+            out[rows] = _const(op)
+        elif col.exact and not (isinstance(rhs, int) and not -_EXACT_INT <= rhs <= _EXACT_INT):
+            out[rows] = _np_cmp(col.num[rows], op, float(rhs))
+        else:
+            out[rows] = _py_cmp(col.obj[rows], op, rhs)
+    elif kind in (K_NUMSTR, K_STR):
+        if isinstance(rhs, str):
+            out[rows] = _np_cmp(col.obj[rows], op, rhs)
+        else:
+            out[rows] = _const(op)
+    elif kind == K_DT:
+        if isinstance(rhs, datetime):
+            try:
+                out[rows] = _np_cmp(col.obj[rows], op, rhs)
+            except TypeError:  # naive vs aware somewhere in the slice
+                out[rows] = _py_cmp(col.obj[rows], op, rhs)
+        else:
+            out[rows] = _const(op)
+    else:
+        out[rows] = _py_cmp(col.obj[rows], op, rhs)
+
+
+def _cmp_mask(col: Column, cond: Condition) -> np.ndarray:
+    # RHS per LHS kind, as Comparison.rhs_for / services.rules._coerce_types pick it
+    c = cond.cmp
+    out = np.zeros(len(col.kind), dtype=bool)
+    _fill(out, col, K_NUM, c.op, c.rhs_num)
+    _fill(out, col, K_NUMSTR, c.op, c.rhs_num)
+    _fill(out, col, K_STR, c.op, c.rhs_dt if c.rhs_iso else c.rhs_str)
+    _fill(out, col, K_DT, c.op, c.rhs_dt)
+    rest = (col.kind == K_NONE) | (col.kind == K_OTHER)
+    if rest.any():
+        # None / lists / dicts against a plain string
+        out[rest] = _const(c.op)
+    return out
+
+
+def _eq_mask(col: Column, val: Any) -> np.ndarray:
+    """lhs == val for every row."""
+    if _is_number(val):
+        out = np.zeros(len(col.kind), dtype=bool)
+        _fill(out, col, K_NUM, "==", val)
+        return out
+    if isinstance(val, str):
+        out = np.zeros(len(col.kind), dtype=bool)
+        _fill(out, col, K_NUMSTR, "==", val)
+        _fill(out, col, K_STR, "==", val)
+        return out
+    if val is None:
+        return col.kind == K_NONE
+    return np.fromiter((bool(v == val) for v in col.obj), dtype=bool, count=len(col.obj))
+
+
+def _memo_key(cond: Condition) -> Any:
+    if cond.cmp is not None:
+        # rhs_num/rhs_dt/rhs_iso are all derived from rhs_str
+        return (cond.key, cond.cmp.op, cond.cmp.rhs_str)
+    try:
+        hash(cond.value)
+    except TypeError:
+        return None
+    return (cond.key, "=", type(cond.value), cond.value)
+
+
+class _Evaluator:
+    def __init__(self, table: ClauseTable):
+        self.table = table
+        self._memo: Dict[Any, np.ndarray] = {}
+
+    def condition(self, cond: Condition) -> np.ndarray:
+        key = _memo_key(cond)
+        if key is not None and key in self._memo:
+            return self._memo[key]
+        col = self.table.column(cond.key)
+        mask = _eq_mask(col, cond.value) if cond.cmp is None else _cmp_mask(col, cond)
+        if key is not None and len(self._memo) < _MEMO_LIMIT:
+            self._memo[key] = mask
+        return mask
+
+    def group(self, conds: Sequence[Condition]) -> np.ndarray:
+        m = np.ones(self.table.n, dtype=bool)
+        for cond in conds:
+            m &= self.condition(cond)
+        return m
+
+    def rule(self, rule: CompiledRule) -> np.ndarray:
+        m = self.group(rule.conditions)
+        if rule.any_groups is not None and m.any():
+            hit = np.zeros(self.table.n, dtype=bool)
+            for grp in rule.any_groups:
+                hit |= self.group(grp)
+            m &= hit
+        if rule.all_groups is not None:
+            for grp in rule.all_groups:
+                if not m.any():
+                    break
+                m &= self.group(grp)
+        return m
+
+
+# --- evaluation ------------------------------------------------------------
+
+@dataclass
+class BulkResult:
+    """Fires as parallel arrays, rule-major then clause order."""
+    ruleset: CompiledRuleSet
+    table: ClauseTable
+    rule_index: np.ndarray   # index into ruleset.rules
+    clause_index: np.ndarray  # row in table
+
+    def __len__(self) -> int:
+        return len(self.rule_index)
+
+    def fires(self, doc_id: Any = None) -> List[Dict[str, Any]]:
+        """
+        Fire dicts as evaluate_rules_yaml builds them. Without `doc_id` each
+        fire takes the doc_id of its clause (tables spanning many documents).
+        """
+        rules = self.ruleset.rules
+        ids = self.table.values("id")
+        docs = self.table.values("doc_id") if doc_id is None else None
+        out = []
+        for ri, ci in zip(self.rule_index.tolist(), self.clause_index.tolist()):
+            rule = rules[ri]
+            out.append({
+                "id": None,
+                "rule_id": rule.rule_id,
+                "doc_id": doc_id if docs is None else docs[ci],
+                "clause_id": ids[ci],
+                "severity": rule.severity,
+                "message": rule.message,
+            })
+        return out
+
+
+def evaluate_bulk(ruleset: CompiledRuleSet, table: ClauseTable) -> BulkResult:
+    hits: List[Optional[np.ndarray]] = [None] * len(ruleset.rules)
+    if table.n:
+        types = table.column("clause.type")
+        for guard, rules in ruleset.by_type.items():
+            rows = np.flatnonzero(_eq_mask(types, guard))
+            if not rows.size:
+                continue
+            ev = _Evaluator(table.take(rows))
+            for rule in rules:
+                hits[rule.index] = rows[ev.rule(rule)]
+        ev = _Evaluator(table)
+        for rule in ruleset.unguarded:
+            hits[rule.index] = np.flatnonzero(ev.rule(rule))
+
+    empty = np.zeros(0, dtype=np.int64)
+    clause_index = np.concatenate([h if h is not None else empty for h in hits]) if hits else empty
+    rule_index = np.repeat(np.arange(len(hits), dtype=np.int64),
+                           [0 if h is None else len(h) for h in hits])
+    return BulkResult(ruleset, table, rule_index, clause_index.astype(np.int64, copy=False))
+
+
+def evaluate_clauses(ruleset: CompiledRuleSet, clauses: List[Dict[str, Any]], doc_id: Any) -> List[Dict[str, Any]]:
+    """Drop-in for evaluate_compiled(ruleset, clauses, doc_id) on the NumPy path."""
+    return evaluate_bulk(ruleset, ClauseTable.from_dicts(clauses)).fires(doc_id)
@@ -0,0 +1,136 @@
+# backend/app/services/serialization.py
+"""
+Encoding for JSON-like storage artifacts (layout_index.json, policy_results.json, ...).
+
+Writers pick a codec (ARTIFACT_CODEC: json | msgpack) and a compression
+(ARTIFACT_COMPRESSION: none | zstd | gzip). Plain uncompressed JSON is written
+as-is, so those artifacts stay readable by any JSON tool. Every other
+combination is wrapped in a small header:
+
+    b"TGA" | version (1 byte) | codec id (1 byte) | compression id (1 byte) | payload
+
+Readers look at the header, never at the current config, so artifacts written
+with earlier settings (including the legacy stdlib-JSON ones) keep loading.
+orjson, msgpack and zstandard are optional; JSON falls back to the stdlib.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from typing import Any, Tuple
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+try:
+    import msgpack  # type: ignore
+except Exception:
+    msgpack = None
+try:
+    import zstandard  # type: ignore
+except Exception:
+    zstandard = None
+
+MAGIC = b"TGA"
+VERSION = 1
+
+_CODECS = {"json": 1, "msgpack": 2}
+_COMPRESSIONS = {"none": 0, "zstd": 1, "gzip": 2}
+_CODEC_NAMES = {v: k for k, v in _CODECS.items()}
+_COMPRESSION_NAMES = {v: k for k, v in _COMPRESSIONS.items()}
+
+_CODEC = os.getenv("ARTIFACT_CODEC", "json").lower()
+_COMPRESSION = os.getenv("ARTIFACT_COMPRESSION", "none").lower()
+_ZSTD_LEVEL = int(os.getenv("ARTIFACT_ZSTD_LEVEL", "3"))
+
+if orjson is not None:
+    # Match stdlib json: int keys become strings; numpy scalars from OCR serialize
+    _ORJSON_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+# --- codecs ----------------------------------------------------------------
+
+def _json_dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=_ORJSON_OPTS)
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+def _json_loads(body: bytes | memoryview) -> Any:
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(bytes(body))
+
+def _encode(codec: str, data: Any) -> bytes:
+    if codec == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("ARTIFACT_CODEC=msgpack requires the 'msgpack' package")
+        return msgpack.packb(data, use_bin_type=True)
+    return _json_dumps(data)
+
+def _decode(codec: str, payload: bytes | memoryview) -> Any:
+    if codec == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("artifact is msgpack-encoded but 'msgpack' is not installed")
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+    return _json_loads(payload)
+
+def _compress(compression: str, raw: bytes) -> bytes:
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("ARTIFACT_COMPRESSION=zstd requires the 'zstandard' package")
+        return zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(raw)
+    if compression == "gzip":
+        return gzip.compress(raw, compresslevel=6)
+    return raw
+
+def _decompress(compression: str, payload: bytes | memoryview) -> bytes | memoryview:
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("artifact is zstd-compressed but 'zstandard' is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if compression == "gzip":
+        return gzip.decompress(payload)
+    return payload
+
+
+# --- public API ------------------------------------------------------------
+
+def content_type(codec: str, compression: str) -> str:
+    if codec == "json" and compression == "none":
+        return "application/json"
+    return f"application/vnd.titan.artifact+{codec}; v={VERSION}; compression={compression}"
+
+def dumps(data: Any, codec: str | None = None, compression: str | None = None) -> Tuple[bytes, str]:
+    """Serialize `data`; returns (body, content_type). Defaults come from the environment."""
+    codec = (codec or _CODEC).lower()
+    compression = (compression or _COMPRESSION).lower()
+    if codec not in _CODECS:
+        raise ValueError(f"unknown artifact codec: {codec}")
+    if compression not in _COMPRESSIONS:
+        raise ValueError(f"unknown artifact compression: {compression}")
+
+    raw = _encode(codec, data)
+    if codec == "json" and compression == "none":
+        return raw, content_type(codec, compression)
+    header = MAGIC + bytes((VERSION, _CODECS[codec], _COMPRESSIONS[compression]))
+    return header + _compress(compression, raw), content_type(codec, compression)
+
+def loads(body: bytes) -> Any:
+    """Deserialize an artifact written by `dumps` (any settings) or legacy plain JSON."""
+    if not body.startswith(MAGIC):
+        return _json_loads(body)
+    if len(body) < 6:
+        raise ValueError("truncated artifact header")
+    version, codec_id, comp_id = body[3], body[4], body[5]
+    if version != VERSION or codec_id not in _CODEC_NAMES or comp_id not in _COMPRESSION_NAMES:
+        raise ValueError(f"unsupported artifact header: v={version} codec={codec_id} compression={comp_id}")
+    payload = _decompress(_COMPRESSION_NAMES[comp_id], memoryview(body)[6:])
+    return _decode(_CODEC_NAMES[codec_id], payload)
+
+def available() -> list[tuple[str, str]]:
+    """(codec, compression) pairs usable in this environment."""
+    codecs = ["json"] + (["msgpack"] if msgpack is not None else [])
+    comps = ["none", "gzip"] + (["zstd"] if zstandard is not None else [])
+    return [(c, z) for c in codecs for z in comps]
@@ -1,38 +1,421 @@
-import os, io, json, boto3
+# backend/app/services/storage.py
+"""
+Single object-storage layer for the API and the pipeline services.
+
+Backends (STORAGE_BACKEND):
+  - "s3" (default): MinIO/S3 through one shared, thread-safe boto3 client with a
+    sized connection pool; large objects use parallel multipart uploads and
+    parallel ranged downloads.
+  - "local": plain files under STORAGE_ROOT, for tests and single-box dev.
+
+`open_stream` returns a seekable, read-only file object backed by ranged GETs,
+so pypdfium2 can open a PDF without copying the whole object into memory.
+
+With the S3 backend, reads go through the worker-local artifact cache
+(services/artifact_cache.py, ARTIFACT_CACHE_MAX_MB=0 disables it).
+"""
+import os, io, shutil, tempfile, threading, boto3
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Iterator
 from botocore.client import Config
+from botocore.exceptions import ClientError
+from boto3.s3.transfer import TransferConfig
+from .audit import track_io
+from . import serialization, artifact_cache
+
+_MB = 1024 * 1024
+
+_endpoint = os.getenv("MINIO_ENDPOINT", "minio:9000")  # use "localhost:9000" if not in Docker
+_secure = os.getenv("MINIO_SECURE", "false").lower() == "true"
+# MinIO client expects host:port, but boto3 requires scheme (http:// or https://)
+if _endpoint and not _endpoint.startswith("http"):
+    _endpoint = f"{'https' if _secure else 'http'}://{_endpoint}"
+
+_BACKEND = os.getenv("STORAGE_BACKEND", "s3").lower()
+_BUCKET = os.getenv("MINIO_BUCKET", "docs")
+_ROOT = os.getenv("STORAGE_ROOT", "/app_storage")
+
+# Pool sized for the transfer threads of a few concurrent callers
+_MAX_POOL = int(os.getenv("STORAGE_MAX_POOL", "32"))
+_PART_SIZE = int(os.getenv("STORAGE_PART_SIZE_MB", "8")) * _MB
+_MAX_CONCURRENCY = int(os.getenv("STORAGE_MAX_CONCURRENCY", "8"))
+# Block size for ranged stream reads; pdfium seeks around, so keep a few blocks
+_READ_BLOCK = int(os.getenv("STORAGE_READ_BLOCK_KB", "1024")) * 1024
+_READ_BLOCKS = int(os.getenv("STORAGE_READ_BLOCKS", "16"))
 
-_endpoint = os.getenv("MINIO_ENDPOINT")
-_secure = os.getenv("MINIO_SECURE", "false").lower() == "true"
-# MinIO client expects host:port, but boto3 requires scheme (http:// or https://)
-if _endpoint and not _endpoint.startswith("http"):
-    _endpoint = f"{'https' if _secure else 'http'}://{_endpoint}"
-
 _s3 = boto3.client(
     "s3",
-    endpoint_url=_endpoint,
-    aws_access_key_id=os.getenv("MINIO_ACCESS_KEY"),
-    aws_secret_access_key=os.getenv("MINIO_SECRET_KEY"),
-    config=Config(signature_version="s3v4"),
+    endpoint_url=_endpoint,
+    aws_access_key_id=os.getenv("MINIO_ACCESS_KEY", "minioadmin"),
+    aws_secret_access_key=os.getenv("MINIO_SECRET_KEY", "minioadmin"),
+    config=Config(
+        signature_version="s3v4",
+        max_pool_connections=_MAX_POOL,
+        retries={"max_attempts": 5, "mode": "adaptive"},
+        tcp_keepalive=True,
+        connect_timeout=5,
+        read_timeout=60,
+    ),
+) if _BACKEND == "s3" else None
+
+_transfer = TransferConfig(
+    multipart_threshold=_PART_SIZE,
+    multipart_chunksize=_PART_SIZE,
+    max_concurrency=_MAX_CONCURRENCY,
+    use_threads=True,
 )
-_BUCKET = os.getenv("MINIO_BUCKET", "docs")
+
+
+def _missing(e: ClientError) -> bool:
+    return e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+def _not_modified(e: ClientError) -> bool:
+    return e.response.get("Error", {}).get("Code") in ("304", "NotModified")
+
+
+# --- streaming reader ------------------------------------------------------
+
+class RangedReader(io.RawIOBase):
+    """
+    Seekable read-only file object over `size` bytes served by `fetch(start, end)`
+    (inclusive range). Reads are aligned to `block_size` blocks and the last
+    `max_blocks` blocks are kept, so random access (PDF xref at the end, page
+    objects scattered) costs one ranged GET per new block.
+    """
+
+    def __init__(self, fetch: Callable[[int, int], bytes], size: int,
+                 block_size: int = _READ_BLOCK, max_blocks: int = _READ_BLOCKS):
+        super().__init__()
+        self._fetch = fetch
+        self._size = size
+        self._block = block_size
+        self._max_blocks = max_blocks
+        self._blocks: "OrderedDict[int, bytes]" = OrderedDict()
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError("negative seek position")
+        self._pos = pos
+        return pos
+
+    def _get_block(self, idx: int) -> bytes:
+        blk = self._blocks.get(idx)
+        if blk is not None:
+            self._blocks.move_to_end(idx)
+            return blk
+        start = idx * self._block
+        end = min(start + self._block, self._size) - 1
+        blk = self._fetch(start, end)
+        track_io("in", len(blk))
+        self._blocks[idx] = blk
+        if len(self._blocks) > self._max_blocks:
+            self._blocks.popitem(last=False)
+        return blk
+
+    def readinto(self, b) -> int:
+        view = memoryview(b).cast("B")
+        n = 0
+        while n < len(view) and self._pos < self._size:
+            idx, off = divmod(self._pos, self._block)
+            blk = self._get_block(idx)
+            chunk = min(len(blk) - off, len(view) - n)
+            view[n:n + chunk] = blk[off:off + chunk]
+            n += chunk
+            self._pos += chunk
+        return n
+
+
+class _CountingReader:
+    """Forwards to `raw`, counting the bytes read from it (I/O accounting of streamed uploads)."""
+
+    def __init__(self, raw: BinaryIO):
+        self.raw = raw
+        self.nbytes = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.nbytes += len(data)
+        return data
+
+    def __getattr__(self, name: str):
+        return getattr(self.raw, name)
+
+
+# --- backends --------------------------------------------------------------
+
+class S3Backend:
+    def __init__(self, client, bucket: str):
+        self.client = client
+        self.bucket = bucket
+        self._bucket_ready = False
+        self._lock = threading.Lock()
+
+    def ensure_bucket(self) -> None:
+        # Checked once per process instead of on every upload
+        if self._bucket_ready:
+            return
+        with self._lock:
+            if self._bucket_ready:
+                return
+            try:
+                self.client.head_bucket(Bucket=self.bucket)
+            except ClientError as e:
+                if not _missing(e):
+                    raise
+                self.client.create_bucket(Bucket=self.bucket)
+            self._bucket_ready = True
+
+    def put(self, key: str, body: bytes, content_type: str) -> str | None:
+        """Upload; returns the new ETag when the backend reports one."""
+        if len(body) >= _PART_SIZE:
+            self.upload(key, io.BytesIO(body), content_type)
+            return None
+        return self.client.put_object(Bucket=self.bucket, Key=key, Body=body, ContentType=content_type).get("ETag")
+
+    def upload(self, key: str, fileobj: BinaryIO, content_type: str) -> None:
+        # Multipart with parallel parts above the threshold, single PUT below
+        self.client.upload_fileobj(fileobj, self.bucket, key,
+                                   ExtraArgs={"ContentType": content_type}, Config=_transfer)
+
+    def fetch(self, key: str, if_none_match: str | None = None) -> tuple[str, bytes | None, str | None]:
+        """Conditional GET: ("ok", body, etag) | ("not_modified", None, etag) | ("missing", None, None)."""
+        kwargs = {"IfNoneMatch": if_none_match} if if_none_match else {}
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=key, **kwargs)
+        except ClientError as e:
+            if _missing(e):
+                return "missing", None, None
+            if _not_modified(e):
+                return "not_modified", None, if_none_match
+            raise
+        etag = obj.get("ETag")
+        size = obj["ContentLength"]
+        if size < _PART_SIZE:
+            return "ok", obj["Body"].read(), etag
+        # Large object: drop the single stream and fetch ranges in parallel
+        obj["Body"].close()
+        return "ok", b"".join(self._parts(key, size, etag)), etag
+
+    def fetch_to_file(self, key: str, fileobj: BinaryIO, if_none_match: str | None = None) -> tuple[str, str | None]:
+        """Stream the object into `fileobj` (parallel ranges) unless its ETag still matches."""
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if _missing(e):
+                return "missing", None
+            raise
+        etag = head.get("ETag")
+        if if_none_match and etag == if_none_match:
+            return "not_modified", etag
+        for part in self._parts(key, head["ContentLength"], etag):
+            fileobj.write(part)
+        return "ok", etag
+
+    def _parts(self, key: str, size: int, etag: str | None) -> Iterator[bytes]:
+        """
+        The object's bytes in _PART_SIZE ranges, in order, with up to
+        _MAX_CONCURRENCY ranged GETs in flight. Each GET is conditional on
+        `etag`, so an object replaced mid-download fails (412) instead of
+        mixing two versions.
+        """
+        cond = {"IfMatch": etag} if etag else {}
+
+        def part(start: int) -> bytes:
+            end = min(start + _PART_SIZE, size) - 1
+            obj = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}", **cond)
+            return obj["Body"].read()
+
+        with ThreadPoolExecutor(max_workers=_MAX_CONCURRENCY) as pool:
+            pending: deque = deque()
+            for start in range(0, size, _PART_SIZE):
+                pending.append(pool.submit(part, start))
+                if len(pending) >= _MAX_CONCURRENCY:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def get(self, key: str) -> bytes | None:
+        return self.fetch(key)[1]
+
+    def size(self, key: str) -> int | None:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"]
+        except ClientError as e:
+            if _missing(e):
+                return None
+            raise
+
+    def open(self, key: str) -> BinaryIO | None:
+        size = self.size(key)
+        if size is None:
+            return None
+
+        def fetch(start: int, end: int) -> bytes:
+            obj = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}")
+            return obj["Body"].read()
+
+        return io.BufferedReader(RangedReader(fetch, size), buffer_size=64 * 1024)  # type: ignore[return-value]
+
+
+class LocalBackend:
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.bucket = os.path.basename(self.root)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"invalid storage key: {key!r}")
+        return path
+
+    def ensure_bucket(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+
+    def upload(self, key: str, fileobj: BinaryIO, content_type: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(fileobj, f, _MB)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def put(self, key: str, body: bytes, content_type: str) -> str | None:
+        self.upload(key, io.BytesIO(body), content_type)
+        return self._etag(self._path(key))
+
+    @staticmethod
+    def _etag(path: str) -> str:
+        st = os.stat(path)
+        return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def fetch(self, key: str, if_none_match: str | None = None) -> tuple[str, bytes | None, str | None]:
+        path = self._path(key)
+        try:
+            etag = self._etag(path)
+            if if_none_match and etag == if_none_match:
+                return "not_modified", None, etag
+            with open(path, "rb") as f:
+                return "ok", f.read(), etag
+        except FileNotFoundError:
+            return "missing", None, None
+
+    def fetch_to_file(self, key: str, fileobj: BinaryIO, if_none_match: str | None = None) -> tuple[str, str | None]:
+        path = self._path(key)
+        try:
+            etag = self._etag(path)
+            if if_none_match and etag == if_none_match:
+                return "not_modified", etag
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, fileobj, _MB)
+            return "ok", etag
+        except FileNotFoundError:
+            return "missing", None
+
+    def size(self, key: str) -> int | None:
+        try:
+            return os.path.getsize(self._path(key))
+        except FileNotFoundError:
+            return None
+
+    def open(self, key: str) -> BinaryIO | None:
+        try:
+            return open(self._path(key), "rb")
+        except FileNotFoundError:
+            return None
+
+
+_backend = S3Backend(_s3, _BUCKET) if _BACKEND == "s3" else LocalBackend(_ROOT)
+# The local backend is already on disk; caching it would only duplicate files
+_cached = _BACKEND == "s3" and artifact_cache.enabled()
+
+
+def _get(key: str) -> bytes | None:
+    if _cached:
+        return artifact_cache.get(key, _backend.fetch)
+    return _backend.get(key)
+
+def _put(key: str, body: bytes, content_type: str) -> None:
+    etag = _backend.put(key, body, content_type)
+    if _cached:
+        artifact_cache.put(key, body, etag)
+
+
+# --- public API ------------------------------------------------------------
+
+def bucket_name() -> str:
+    return _backend.bucket
+
+def ensure_bucket() -> None:
+    _backend.ensure_bucket()
 
 def put_json(key: str, data: dict):
-    _s3.put_object(Bucket=_BUCKET, Key=key, Body=json.dumps(data).encode("utf-8"), ContentType="application/json")
+    # Codec/compression per ARTIFACT_CODEC / ARTIFACT_COMPRESSION (see services/serialization.py)
+    body, content_type = serialization.dumps(data)
+    _put(key, body, content_type)
+    track_io("out", len(body))
 
 def get_json(key: str) -> dict | None:
-    try:
-        obj = _s3.get_object(Bucket=_BUCKET, Key=key)
-        return json.loads(obj["Body"].read().decode("utf-8"))
-    except _s3.exceptions.NoSuchKey:
+    body = _get(key)
+    if body is None:
         return None
+    track_io("in", len(body))
+    return serialization.loads(body)
 
 def put_bytes(key: str, b: bytes, content_type: str = "application/octet-stream"):
-    _s3.put_object(Bucket=_BUCKET, Key=key, Body=b, ContentType=content_type)
+    _put(key, b, content_type)
+    track_io("out", len(b))
 
 def get_bytes(key: str) -> bytes | None:
     """Fetch raw bytes from storage."""
-    try:
-        obj = _s3.get_object(Bucket=_BUCKET, Key=key)
-        return obj["Body"].read()
-    except _s3.exceptions.NoSuchKey:
+    body = _get(key)
+    if body is None:
         return None
+    track_io("in", len(body))
+    return body
+
+def put_stream(key: str, fileobj: BinaryIO, content_type: str = "application/octet-stream") -> None:
+    """Upload from a file object without reading it fully into memory."""
+    counted = _CountingReader(fileobj)
+    _backend.upload(key, counted, content_type)  # type: ignore[arg-type]
+    track_io("out", counted.nbytes)
+
+def open_stream(key: str) -> BinaryIO | None:
+    """Seekable read-only file object for `key`, or None if it does not exist. Caller closes."""
+    if _cached:
+        # Local file from the worker cache (downloaded once with parallel ranges)
+        return artifact_cache.open_file(key, _backend.fetch_to_file)
+    return _backend.open(key)
+
+def object_size(key: str) -> int | None:
+    return _backend.size(key)
@@ -1,22 +1,309 @@
+# backend/app/services/summarizer.py
+"""
+Evidence-cited document summary, map-reduce over the OCR text.
+
+  1. passages  each page's text (layout_index.json) cut at sentence ends into
+               passages of at most SUMMARY_PASSAGE_CHARS; every passage keeps
+               its page and offsets, i.e. its citation chip [doc:page:start-end]
+  2. map       consecutive passages grouped into chunks of about
+               SUMMARY_CHUNK_CHARS, each summarized by llm.chat_with_citations
+               (assets/prompts/summary_system.txt), at most SUMMARY_CONCURRENCY
+               calls in flight. Passages are tagged [P1], [P2], ... in the
+               prompt and the tags are swapped for chips in the answer, so a
+               chunk's prompt depends on its text only
+  3. reduce    the partial summaries, plus the extracted clauses, combined into
+               one summary (assets/prompts/summary_reduce.txt); in several
+               rounds if they exceed SUMMARY_REDUCE_CHARS
+
+Every LLM result is cached in storage under `summary_cache/<sha256>.json`,
+keyed by model, system prompt and prompt: re-running a document, or another
+document with the same section text, makes no call for unchanged chunks.
+
+Tokens (as reported by the provider), cache hits and call latencies are
+accounted per document: in the stage result, which the audit table keeps, and
+with the per-chunk figures in `{doc_id}/summary.json`.
+
+If no chunk can be summarized (e.g. the LLM is not configured), the summary
+falls back to the list of extracted clause types.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import statistics
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+
 from ..db import SessionLocal
-from ..models import Guidance, Clause
+from ..models import Guidance, Clause, _id
+from . import llm
+from .bulk_write import replace_rows
+from .clauses import page_text
+from .storage import get_json, put_json
+from .text_parsing import sentence_ends
+
+log = logging.getLogger("titan.summary")
+
+SUMMARY_TITLE = "Evidence-cited summary"
+
+CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+CHUNK_CHARS = int(os.getenv("SUMMARY_CHUNK_CHARS", "6000"))
+PASSAGE_CHARS = int(os.getenv("SUMMARY_PASSAGE_CHARS", "500"))
+REDUCE_CHARS = int(os.getenv("SUMMARY_REDUCE_CHARS", "12000"))
+CACHE_PREFIX = "summary_cache"
+_MAX_CLAUSES = 40      # extracted clauses listed in the final reduce prompt
+_MAX_REDUCE_ROUNDS = 4
+
+_PROMPTS = Path(__file__).resolve().parent.parent / "assets" / "prompts"
+MAP_SYSTEM = (_PROMPTS / "summary_system.txt").read_text(encoding="utf-8")
+REDUCE_SYSTEM = (_PROMPTS / "summary_reduce.txt").read_text(encoding="utf-8")
+
+_TAG = re.compile(r"\[P(\d+)\]")
+_CHIP = re.compile(r"\[([^\[\]\s]+:\d+:\d+-\d+)\]")
+_NOTHING = "nothing material"
+
+
+class Passage(NamedTuple):
+    page: int
+    start: int
+    end: int
+    text: str
+
+
+def chip(doc_id: str, page: int, start: int, end: int) -> str:
+    return f"{doc_id}:{page}:{start}-{end}"
+
+
+def split_page(page: int, text: str, limit: Optional[int] = None) -> Iterator[Passage]:
+    """Passages of at most `limit` (SUMMARY_PASSAGE_CHARS) chars, cut at sentence ends, else at a space."""
+    limit = limit or PASSAGE_CHARS
+    stops = sentence_ends(text)
+    pos, n = 0, len(text)
+    while pos < n:
+        if n - pos <= limit:
+            end = n
+        else:
+            j = bisect_right(stops, pos + limit) - 1
+            if j >= 0 and stops[j] > pos:
+                end = stops[j]
+            else:
+                space = text.rfind(" ", pos + 1, pos + limit)
+                end = space if space > pos else pos + limit
+        s, e = pos, end
+        while s < e and text[s].isspace():
+            s += 1
+        while e > s and text[e - 1].isspace():
+            e -= 1
+        if s < e:
+            yield Passage(page, s, e, text[s:e])
+        pos = end
+
+
+def chunk_passages(pages: Dict[str, Dict[str, Any]], chunk_chars: Optional[int] = None) -> List[List[Passage]]:
+    """Consecutive passages, in page order, grouped into chunks of about `chunk_chars` (SUMMARY_CHUNK_CHARS)."""
+    chunk_chars = chunk_chars or CHUNK_CHARS
+    chunks: List[List[Passage]] = []
+    cur: List[Passage] = []
+    size = 0
+    for key in sorted(pages, key=int):
+        for p in split_page(int(key), page_text(pages[key].get("spans", []))):
+            if cur and size + len(p.text) > chunk_chars:
+                chunks.append(cur)
+                cur, size = [], 0
+            cur.append(p)
+            size += len(p.text)
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+
+def map_prompt(chunk: Sequence[Passage]) -> str:
+    return "Passages:\n\n" + "\n\n".join(f"[P{i}] {p.text}" for i, p in enumerate(chunk, 1))
+
+
+def reduce_prompt(partials: Sequence[str], clause_lines: Sequence[str] = ()) -> str:
+    parts = ["Section summaries:\n\n" + "\n\n".join(partials)]
+    if clause_lines:
+        parts.append("Extracted clauses:\n" + "\n".join(clause_lines))
+    return "\n\n".join(parts)
+
+
+def cache_key(system: str, prompt: str) -> str:
+    h = hashlib.sha256()
+    for part in (llm.MODEL, system, prompt):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+@dataclass
+class Accounting:
+    """LLM usage of one document's summary."""
+    calls: int = 0
+    cached: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    tokens_saved: int = 0
+    latencies_ms: List[float] = field(default_factory=list)
+
+    def report(self, wall_s: float) -> Dict[str, Any]:
+        lat = self.latencies_ms
+        return {
+            "model": llm.MODEL,
+            "calls": self.calls,
+            "cached": self.cached,
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_saved_by_cache": self.tokens_saved,
+            "llm_ms_total": round(sum(lat), 1),
+            "llm_ms_p50": round(statistics.median(lat), 1) if lat else None,
+            "llm_ms_max": round(max(lat), 1) if lat else None,
+            "wall_ms": round(wall_s * 1000.0, 1),
+        }
+
+
+async def cached_chat(system: str, prompt: str, sem: asyncio.Semaphore,
+                      acc: Accounting) -> Tuple[str, float, Dict[str, Any]]:
+    """llm.chat_with_citations through the content-hash cache; (text, confidence, per-call info)."""
+    digest = cache_key(system, prompt)
+    key = f"{CACHE_PREFIX}/{digest}.json"
+    hit = await asyncio.to_thread(get_json, key)
+    if hit is not None:
+        tokens = sum((hit.get("usage") or {}).values())
+        acc.cached += 1
+        acc.tokens_saved += tokens
+        return hit["text"], hit["confidence"], {"hash": digest[:16], "cached": True, "tokens": tokens}
+
+    usage: Dict[str, int] = {}
+    async with sem:
+        t0 = time.perf_counter()
+        text, conf = await llm.chat_with_citations(system, prompt, usage=usage)
+        ms = (time.perf_counter() - t0) * 1000.0
+    acc.calls += 1
+    acc.prompt_tokens += usage.get("prompt_tokens", 0)
+    acc.completion_tokens += usage.get("completion_tokens", 0)
+    acc.latencies_ms.append(ms)
+    await asyncio.to_thread(put_json, key, {"model": llm.MODEL, "text": text, "confidence": conf, "usage": usage})
+    return text, conf, {"hash": digest[:16], "cached": False, "tokens": sum(usage.values()),
+                        "latency_ms": round(ms, 1)}
+
+
+async def _map_chunk(doc_id: str, chunk: List[Passage], sem: asyncio.Semaphore,
+                     acc: Accounting) -> Tuple[Optional[str], float, Dict[str, Any]]:
+    info: Dict[str, Any] = {"pages": [chunk[0].page, chunk[-1].page], "passages": len(chunk)}
+    try:
+        text, conf, call = await cached_chat(MAP_SYSTEM, map_prompt(chunk), sem, acc)
+    except Exception as e:
+        acc.errors += 1
+        log.warning("summary chunk %s pages %s failed: %s", doc_id, info["pages"], e)
+        return None, 0.0, {**info, "error": f"{type(e).__name__}: {e}"}
+    info.update(call)
+    if text.strip().lower().rstrip(".").startswith(_NOTHING):
+        return None, conf, info
+
+    def to_chip(m: re.Match) -> str:
+        i = int(m.group(1)) - 1
+        return f"[{chip(doc_id, *chunk[i][:3])}]" if 0 <= i < len(chunk) else ""
+
+    return _TAG.sub(to_chip, text).strip(), conf, info
+
+
+def _groups(texts: Sequence[str], limit: int) -> List[List[str]]:
+    groups: List[List[str]] = [[]]
+    size = 0
+    for t in texts:
+        if groups[-1] and size + len(t) > limit:
+            groups.append([])
+            size = 0
+        groups[-1].append(t)
+        size += len(t)
+    return groups
+
+
+async def _reduce(partials: List[str], clause_lines: List[str], sem: asyncio.Semaphore,
+                  acc: Accounting) -> Tuple[str, float]:
+    level = partials
+    for _ in range(_MAX_REDUCE_ROUNDS):
+        groups = _groups(level, REDUCE_CHARS)
+        if len(groups) == 1:
+            break
+        done = await asyncio.gather(*(cached_chat(REDUCE_SYSTEM, reduce_prompt(g), sem, acc) for g in groups))
+        level = [text for text, _, _ in done]
+    text, conf, _ = await cached_chat(REDUCE_SYSTEM, reduce_prompt(level, clause_lines), sem, acc)
+    return text, conf
+
+
+async def summarize(doc_id: str, chunks: List[List[Passage]], clause_lines: List[str],
+                    acc: Accounting) -> Tuple[Optional[str], float, List[Dict[str, Any]]]:
+    """(summary text or None, confidence, per-chunk info) for one document's chunks."""
+    sem = asyncio.Semaphore(max(1, CONCURRENCY))
+    mapped = await asyncio.gather(*(_map_chunk(doc_id, c, sem, acc) for c in chunks))
+    partials = [(text, conf) for text, conf, _ in mapped if text]
+    infos = [info for _, _, info in mapped]
+    if not partials:
+        return None, 0.0, infos
+    if len(partials) == 1 and not clause_lines:
+        return partials[0][0], partials[0][1], infos
+    try:
+        text, conf = await _reduce([t for t, _ in partials], clause_lines, sem, acc)
+    except Exception as e:
+        acc.errors += 1
+        log.warning("summary reduce %s failed, keeping the section summaries: %s", doc_id, e)
+        text, conf = "\n".join(t for t, _ in partials), min(c for _, c in partials)
+    return text, conf, infos
+
+
+def _clause_list(doc_id: str, cls) -> Tuple[str, List[str]]:
+    bullets = [f"- {c.type.replace('_',' ')}: see [{chip(doc_id, c.page, c.start, c.end)}]" for c in cls[:8]]
+    text = "Key terms:\n" + "\n".join(bullets) if bullets else "Unknown."
+    return text, [chip(doc_id, c.page, c.start, c.end) for c in cls[:1]]
+
 
 def run(doc_id: str):
+    t0 = time.perf_counter()
+    layout = get_json(f"{doc_id}/layout_index.json") or {"pages": {}}
     db: Session = SessionLocal()
     try:
-        cls = db.query(Clause).filter(Clause.doc_id==doc_id).all()
-        bullets = []
-        for c in cls[:8]:
-            chip = f"{doc_id}:{c.page}:{c.start}-{c.end}"
-            bullets.append(f"- {c.type.replace('_',' ')}: see [{chip}]")
-        text = "Key terms:\n" + "\n".join(bullets) if bullets else "Unknown."
-        g = Guidance(doc_id=doc_id, title="Evidence-cited summary",
-                     what=text, action="Review flagged items.", risk="medium",
-                     deadline=None, evidence=[f"{doc_id}:{cls[0].page}:{cls[0].start}-{cls[0].end}"] if cls else [],
-                     confidence=0.8)
-        db.query(Guidance).filter(Guidance.doc_id==doc_id, Guidance.title=="Evidence-cited summary").delete()
-        db.add(g); db.commit()
-        return {"summary": True}
+        cls = db.execute(
+            select(Clause.type, Clause.page, Clause.start, Clause.end, Clause.normalized)
+            .where(Clause.doc_id==doc_id).order_by(Clause.page, Clause.start).limit(_MAX_CLAUSES)
+        ).all()
+    finally:
+        db.close()
+    clause_lines = [f"- {c.type.replace('_',' ')} {c.normalized or {}} [{chip(doc_id, c.page, c.start, c.end)}]"
+                    for c in cls]
+
+    chunks = chunk_passages(layout.get("pages", {}))
+    acc = Accounting()
+    text, conf, infos = asyncio.run(summarize(doc_id, chunks, clause_lines, acc))
+    known = {chip(doc_id, p.page, p.start, p.end) for c in chunks for p in c}
+    known.update(chip(doc_id, c.page, c.start, c.end) for c in cls)
+    if text is None:
+        text, evidence = _clause_list(doc_id, cls)
+        conf = 0.8 if cls else 0.5
+    else:
+        evidence = list(dict.fromkeys(c for c in _CHIP.findall(text) if c in known))
+    accounting = acc.report(time.perf_counter() - t0)
+
+    row = {"id": _id("gd"), "doc_id": doc_id, "title": SUMMARY_TITLE,
+           "what": text, "action": "Review flagged items.", "risk": "medium",
+           "deadline": None, "evidence": evidence, "confidence": conf}
+    db = SessionLocal()
+    try:
+        stats = replace_rows(db, Guidance, [Guidance.doc_id==doc_id, Guidance.title==SUMMARY_TITLE], [row])
+        db.commit()
     finally:
         db.close()
+    put_json(f"{doc_id}/summary.json", {"summary": text, "evidence": evidence, "llm": accounting, "chunks": infos})
+    return {"summary": True, "chunks": len(chunks), "llm": accounting, "writes": [stats.report()]}
@@ -1,2 +1,196 @@
+# backend/app/services/tables.py
+"""
+Table detection and extraction from the OCR word boxes in layout_index.json.
+
+Per page, with NumPy over the page's words (no per-word Python loop):
+
+  1. rows     words sorted by vertical centre; a new row starts where the gap
+              between consecutive centres exceeds half the median word height
+  2. cells    within a row, words sorted by x; a new cell starts where the
+              horizontal gap exceeds TABLES_CELL_GAP x the median word height
+  3. blocks   runs of consecutive rows with at least TABLES_MIN_COLS cells
+              (allowing a single-cell row inside, e.g. a wrapped cell)
+  4. columns  for each block of at least TABLES_MIN_ROWS rows, the x-axis
+              coverage of its cells; the empty gutters split the columns
+  5. accept   at least TABLES_MIN_COLS columns, most rows using two or more,
+              and short cells (at most TABLES_MAX_CELL_WORDS words on
+              average) so two-column prose isn't taken for a table
+
+Pages are read one at a time from the per-page layout artifacts OCR writes
+(`{doc_id}/layout/{page}.json`, listed in `{doc_id}/layout/manifest.json`)
+and released as soon as they are done; each page's tables are written to
+`{doc_id}/tables/{page}.json` right away, and `{doc_id}/tables.json` indexes
+them at the end. Peak memory is one page's layout, its arrays and the tables
+found on it, whatever the document's length.
+
+Documents OCR'd before the per-page artifacts existed have no manifest; for
+those the whole layout_index.json is loaded, and memory grows with the
+document.
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .ocr import manifest_key, page_key
+from .storage import get_json, put_json
+
+MIN_ROWS = int(os.getenv("TABLES_MIN_ROWS", "3"))
+MIN_COLS = int(os.getenv("TABLES_MIN_COLS", "2"))
+MAX_CELL_WORDS = float(os.getenv("TABLES_MAX_CELL_WORDS", "6"))
+CELL_GAP = float(os.getenv("TABLES_CELL_GAP", "1.5"))      # x median word height
+ROW_GAP = float(os.getenv("TABLES_ROW_GAP", "2.5"))        # max blank between table rows, x row pitch
+_MULTI_ROW_SHARE = 0.6  # share of a table's rows that must span two or more columns
+
+
+def _page_arrays(spans: List[Dict[str, Any]]) -> Optional[Tuple[np.ndarray, List[str], np.ndarray]]:
+    words = [(s["bbox"], s.get("text") or "", s["start"], s["end"]) for s in spans
+             if s.get("bbox") and (s.get("text") or "").strip()]
+    if not words:
+        return None
+    boxes = np.array([w[0] for w in words], dtype=np.float64).reshape(-1, 4)
+    x0, y0 = boxes[:, 0], boxes[:, 1]
+    geo = np.column_stack([x0, y0, x0 + boxes[:, 2], y0 + boxes[:, 3]])  # x0, y0, x1, y1
+    offsets = np.array([(w[2], w[3]) for w in words], dtype=np.int64)
+    return geo, [w[1] for w in words], offsets
+
+
+def extract_page_tables(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Tables found among one page's word spans (see module docstring)."""
+    arrays = _page_arrays(spans)
+    if arrays is None:
+        return []
+    geo, texts, offsets = arrays
+    x0, y0, x1, y1 = geo.T
+    heights = np.maximum(y1 - y0, 1.0)
+    unit = float(np.median(heights))
+
+    # 1. rows: cluster vertical centres
+    yc = (y0 + y1) / 2.0
+    by_y = np.argsort(yc, kind="stable")
+    row_sorted = np.concatenate(([0], np.cumsum(np.diff(yc[by_y]) > unit / 2.0)))
+    row = np.empty(len(yc), dtype=np.int64)
+    row[by_y] = row_sorted
+    n_rows = int(row_sorted[-1]) + 1
+
+    # 2. cells: split each row at wide horizontal gaps
+    order = np.lexsort((x0, row))
+    r, sx0, sx1 = row[order], x0[order], x1[order]
+    new_cell = np.ones(len(order), dtype=bool)
+    new_cell[1:] = (r[1:] != r[:-1]) | (sx0[1:] - sx1[:-1] > CELL_GAP * unit)
+    starts = np.flatnonzero(new_cell)
+    cell_row = r[starts]
+    cell_x0 = np.minimum.reduceat(sx0, starts)
+    cell_x1 = np.maximum.reduceat(sx1, starts)
+    cell_words = np.diff(np.append(starts, len(order)))
+    cell_of_word = np.cumsum(new_cell) - 1          # in `order` positions
+    cells_per_row = np.bincount(cell_row, minlength=n_rows)
+
+    row_top = np.full(n_rows, np.inf)
+    row_bottom = np.full(n_rows, -np.inf)
+    np.minimum.at(row_top, row, y0)
+    np.maximum.at(row_bottom, row, y1)
+    pitch = float(np.median(np.diff(row_top))) if n_rows > 1 else unit
+
+    # 3. blocks of consecutive multi-cell rows
+    multi = cells_per_row >= MIN_COLS
+    # a lone single-cell row between two multi-cell rows stays in the block
+    bridged = multi.copy()
+    if n_rows > 2:
+        bridged[1:-1] |= multi[:-2] & multi[2:]
+    gap_ok = np.ones(n_rows, dtype=bool)
+    gap_ok[1:] = row_top[1:] - row_bottom[:-1] <= ROW_GAP * pitch
+    block_start = bridged & ~(np.concatenate(([False], bridged[:-1])) & gap_ok)
+    block_id = np.where(bridged, np.cumsum(block_start) - 1, -1)
+
+    tables = []
+    for b in range(int(block_start.sum())):
+        rows_in = np.flatnonzero(block_id == b)
+        if len(rows_in) < MIN_ROWS:
+            continue
+        table = _build_table(rows_in, cell_row, cell_x0, cell_x1, cell_words, multi,
+                             order, r, cell_of_word, texts, geo, offsets)
+        if table is not None:
+            tables.append(table)
+    return tables
+
+
+def _build_table(rows_in, cell_row, cell_x0, cell_x1, cell_words, multi,
+                 order, word_row, cell_of_word, texts, geo, offsets) -> Optional[Dict[str, Any]]:
+    # word_row / cell_of_word are indexed like `order` (words sorted by row, then x)
+    lo, hi = int(rows_in[0]), int(rows_in[-1])
+    in_block = (cell_row >= lo) & (cell_row <= hi)
+    # 4. columns: gutters in the x coverage of the block's multi-cell rows
+    ref = in_block & multi[cell_row]
+    left = int(np.floor(cell_x0[in_block].min()))
+    right = int(np.ceil(cell_x1[in_block].max()))
+    cover = np.zeros(right - left + 2, dtype=np.int64)
+    np.add.at(cover, (cell_x0[ref] - left).astype(np.int64), 1)
+    np.add.at(cover, (cell_x1[ref] - left).astype(np.int64) + 1, -1)
+    covered = np.cumsum(cover)[:-1] > 0
+    edges = np.diff(np.concatenate(([0], covered.astype(np.int8), [0])))
+    col_x0 = np.flatnonzero(edges == 1) + left
+    col_x1 = np.flatnonzero(edges == -1) + left
+    n_cols = len(col_x0)
+    if n_cols < MIN_COLS:
+        return None
+
+    # 5. accept only grid-like blocks with short cells
+    block_cells = np.flatnonzero(in_block)
+    col = np.clip(np.searchsorted(col_x0, cell_x0[block_cells], side="right") - 1, 0, n_cols - 1)
+    seen = np.zeros((hi - lo + 1, n_cols), dtype=bool)
+    seen[cell_row[block_cells] - lo, col] = True
+    cols_per_row = seen.sum(axis=1)
+    if (cols_per_row >= 2).mean() < _MULTI_ROW_SHARE:
+        return None
+    if cell_words[block_cells].mean() > MAX_CELL_WORDS:
+        return None
+
+    # Cell texts: words in reading order, grouped by (row, column)
+    grid = [[[] for _ in range(n_cols)] for _ in range(hi - lo + 1)]
+    col_of_cell = np.full(len(cell_row), -1, dtype=np.int64)
+    col_of_cell[block_cells] = col
+    pos = np.flatnonzero((word_row >= lo) & (word_row <= hi))
+    word_cols = col_of_cell[cell_of_word[pos]]
+    for w, r, c in zip(order[pos].tolist(), (word_row[pos] - lo).tolist(), word_cols.tolist()):
+        grid[r][c].append(texts[w])
+
+    words = order[pos]
+    g = geo[words]
+    return {
+        "bbox": [float(g[:, 0].min()), float(g[:, 1].min()),
+                 float(g[:, 2].max() - g[:, 0].min()), float(g[:, 3].max() - g[:, 1].min())],
+        "start": int(offsets[words, 0].min()),
+        "end": int(offsets[words, 1].max()),
+        "n_rows": hi - lo + 1,
+        "n_cols": n_cols,
+        "columns": [[int(a), int(b)] for a, b in zip(col_x0, col_x1)],
+        "rows": [[" ".join(cell) for cell in r] for r in grid],
+    }
+
+
+def iter_layout_pages(doc_id: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(page number, page layout) in page order, loading one page artifact at a time."""
+    manifest = get_json(manifest_key(doc_id))
+    if manifest is None:
+        # legacy document: only the whole layout exists
+        pages = (get_json(f"{doc_id}/layout_index.json") or {}).get("pages", {})
+        for key in sorted(pages, key=int):
+            yield int(key), pages.pop(key)
+        return
+    for page in sorted(manifest.get("pages", [])):
+        yield page, get_json(page_key(doc_id, page)) or {}
+
+
 def run(doc_id: str):
-    return {"tables": 0}
+    index: Dict[str, int] = {}
+    for page, layout in iter_layout_pages(doc_id):
+        tables = extract_page_tables(layout.get("spans", []))
+        del layout
+        if tables:
+            put_json(f"{doc_id}/tables/{page}.json", {"page": page, "tables": tables})
+            index[str(page)] = len(tables)
+    put_json(f"{doc_id}/tables.json", {"pages": index, "tables": sum(index.values())})
+    return {"tables": sum(index.values()), "pages_with_tables": len(index)}
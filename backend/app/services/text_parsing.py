@@ -0,0 +1,47 @@
+# backend/app/services/text_parsing.py
+"""
+Contract-text parsing shared by the clause, deadline and summary stages.
+
+  QTY            pattern fragment for a quantity: "30", "thirty", "thirty (30)";
+                 named groups `n` (the figure or words) and `paren` (the
+                 parenthesised figure, if any). Embed it in a larger pattern
+                 and read the match with `parse_number`.
+  parse_number   the value of a QTY match
+  sentence_ends  offsets just past each sentence end in a page's text, for
+                 cutting clauses and passages at sentences (with bisect)
+"""
+from __future__ import annotations
+
+import re
+from typing import List, Optional
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9,
+    "ten": 10, "eleven": 11, "twelve": 12, "fourteen": 14, "fifteen": 15, "twenty": 20, "thirty": 30,
+    "forty": 40, "forty-five": 45, "fifty": 50, "sixty": 60, "seventy-five": 75, "ninety": 90,
+    "hundred": 100, "one hundred": 100, "one hundred twenty": 120, "one hundred eighty": 180,
+    "three hundred sixty-five": 365,
+}
+_NUM = r"(?:\d+(?:[.,]\d+)?|" + "|".join(sorted((re.escape(w) for w in NUMBER_WORDS), key=len, reverse=True)) + ")"
+# a stop followed by whitespace and something that can start a sentence
+SENTENCE_END = re.compile(r"[.;!?](?=\s+[A-Z0-9(\"“])")
+# "thirty (30) days", "30 days", "thirty days"
+QTY = rf"(?P<n>{_NUM})(?:\s*\(\s*(?P<paren>\d+)\s*\))?"
+
+
+def parse_number(m: re.Match, name: str = "n", paren: str = "paren") -> Optional[float]:
+    """Value of a QTY group; a parenthesised figure ("thirty (30)") wins over the words."""
+    if paren in m.re.groupindex and m.group(paren):
+        return float(m.group(paren))
+    raw = m.group(name)
+    if raw is None:
+        return None
+    raw = raw.lower()
+    if raw in NUMBER_WORDS:
+        return float(NUMBER_WORDS[raw])
+    return float(raw.replace(",", ""))
+
+
+def sentence_ends(text: str) -> List[int]:
+    """Offsets just past each sentence end in `text`, ascending."""
+    return [m.end() for m in SENTENCE_END.finditer(text)]
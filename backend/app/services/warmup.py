@@ -0,0 +1,98 @@
+# backend/app/services/warmup.py
+"""
+Explicit warm-up of the heavy, lazily loaded components.
+
+Nothing heavy is loaded at import time: the embedding model and the Qdrant
+client (services/qdrant.py) and the docTR predictor (services/ocr.py) are
+created on first use. With EMBED_SERVER_URL set, "embedder" checks the
+embedding server and loads the model only if the server is unreachable.
+Processes call `run()` / `start()` at startup to pay that cost before the
+first request or task instead:
+
+  - API (app/main.py lifespan): API_WARMUP, default "embedder,qdrant", in a
+    background thread so GET / answers immediately; GET /ready reports 503
+    until it finished. OCR is never loaded in the API process.
+  - Celery worker (workers/celery_app.py, per child process): WORKER_WARMUP,
+    default "ocr,embedder", before the first task.
+
+A component that fails to warm up is logged and reported; it's retried lazily
+on first use.
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+log = logging.getLogger("titan.warmup")
+
+# name -> (module, function) called to load it
+COMPONENTS: Dict[str, tuple] = {
+    "embedder": (".qdrant", "warm_up_embedder"),
+    "qdrant": (".qdrant", "ensure_collection"),
+    "ocr": (".ocr", "warm_up"),
+}
+# Components a role must never load
+FORBIDDEN = {"api": {"ocr"}}
+
+_status: Dict[str, Dict[str, Any]] = {}
+_done = threading.Event()
+_lock = threading.Lock()
+
+
+def _names(names: Union[str, Iterable[str], None]) -> list:
+    if names is None:
+        return []
+    if isinstance(names, str):
+        names = names.split(",")
+    return [n.strip() for n in names if n and n.strip()]
+
+
+def _loader(name: str) -> Callable[[], Any]:
+    module, attr = COMPONENTS[name]
+    return getattr(importlib.import_module(module, __package__), attr)
+
+
+def run(names: Union[str, Iterable[str], None], role: str = "api") -> Dict[str, Dict[str, Any]]:
+    """Load `names` (comma-separated or iterable) now; returns per-component seconds/error."""
+    for name in _names(names):
+        if name not in COMPONENTS:
+            entry: Dict[str, Any] = {"state": "unknown"}
+        elif name in FORBIDDEN.get(role, ()):
+            entry = {"state": "skipped", "error": f"not loaded in the {role} process"}
+        else:
+            t0 = time.perf_counter()
+            try:
+                _loader(name)()
+                entry = {"state": "ready"}
+            except Exception as e:
+                entry = {"state": "failed", "error": f"{type(e).__name__}: {e}"}
+                log.warning("warm-up: %s failed: %s", name, entry["error"])
+            entry["seconds"] = round(time.perf_counter() - t0, 3)
+            log.info("warm-up: %s %s in %.2fs", name, entry["state"], entry["seconds"])
+        with _lock:
+            _status[name] = entry
+    _done.set()
+    return status()
+
+
+def start(names: Union[str, Iterable[str], None], role: str = "api") -> Optional[threading.Thread]:
+    """`run()` in a daemon thread; `ready()` turns true when it's done."""
+    _done.clear()
+    if not _names(names):
+        _done.set()
+        return None
+    thread = threading.Thread(target=run, args=(names, role), name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def ready() -> bool:
+    return _done.is_set()
+
+
+def status() -> Dict[str, Dict[str, Any]]:
+    with _lock:
+        return {k: dict(v) for k, v in _status.items()}
@@ -16,6 +16,10 @@ Environment Variables:
 from __future__ import annotations
 import os
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown, celeryd_after_setup
+
+# Worker pool sizing for app/db.py; must be set before app.db is imported
+os.environ.setdefault("DB_PROFILE", "worker")
 
 broker = os.getenv("CELERY_BROKER_URL") or os.getenv("REDIS_URL", "redis://redis:6379/0")
 backend = os.getenv("CELERY_RESULT_BACKEND", broker)
@@ -31,3 +35,31 @@ celery.conf.update(
 # Import tasks to register them with the Celery worker
 # This ensures the worker knows about all the task definitions
 from ..services import pipeline  # noqa: E402, F401
+
+
+@worker_process_init.connect
+def _reset_db_pool(**_):
+    # Connections opened in the parent before the fork must not be shared
+    from ..db import engine
+    engine.dispose(close=False)
+
+
+@worker_process_init.connect
+def _warm_up(**_):
+    # Load OCR/embedding models before the first task (see services/warmup.py)
+    from ..services import warmup
+    warmup.run(os.getenv("WORKER_WARMUP", "ocr,embedder"), role="worker")
+
+
+@worker_process_shutdown.connect
+def _flush_audit(**_):
+    # Push stage timings still sitting in this process's audit buffer
+    from ..services import audit
+    audit.flush()
+
+
+@celeryd_after_setup.connect
+def _consume_node_queue(sender, instance, **_):
+    # Per-node queue for cache affinity routing (services/pipeline.NODE_AFFINITY)
+    if pipeline.NODE_AFFINITY:
+        instance.app.amqp.queues.select_add(pipeline.node_queue(sender))
@@ -0,0 +1,91 @@
+"""
+Benchmark artifact serialization: size and encode/decode time per codec.
+
+Uses a real layout_index.json when given (a file path or a doc id in storage),
+otherwise a synthetic layout shaped like docTR output (dense pages of word spans).
+
+    python scripts/bench_artifact_codecs.py --pages 400
+    python scripts/bench_artifact_codecs.py --layout /tmp/layout_index.json
+    python scripts/bench_artifact_codecs.py --doc-id D1a2b3c4d
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services import serialization
+
+
+def synthetic_layout(pages: int, words_per_page: int, seed: int = 7) -> dict:
+    rnd = random.Random(seed)
+    vocab = ["agreement", "party", "shall", "liability", "notice", "days", "fees", "the", "of",
+             "terminate", "renewal", "section", "12.3", "$1,000,000", "Customer", "Provider"]
+    layout = {"pages": {}}
+    for p in range(1, pages + 1):
+        spans, cursor = [], 0
+        for i in range(words_per_page):
+            text = rnd.choice(vocab)
+            if spans:
+                cursor += 1
+            start, cursor = cursor, cursor + len(text)
+            x, y = 80 + (i % 12) * 90, 100 + (i // 12) * 28
+            spans.append({"start": start, "end": cursor, "bbox": [x, y, 8 * len(text), 22],
+                          "text": text, "confidence": round(rnd.uniform(0.6, 1.0), 6)})
+        layout["pages"][str(p)] = {"width": 1224, "height": 1584, "spans": spans}
+    return layout
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--layout", help="path to a layout_index.json")
+    ap.add_argument("--doc-id", help="load {doc_id}/layout_index.json from storage")
+    ap.add_argument("--pages", type=int, default=300)
+    ap.add_argument("--words-per-page", type=int, default=450)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    if args.layout:
+        with open(args.layout, "rb") as f:
+            layout = serialization.loads(f.read())
+    elif args.doc_id:
+        from app.services.storage import get_json
+        layout = get_json(f"{args.doc_id}/layout_index.json")
+        if layout is None:
+            sys.exit(f"no layout_index.json for {args.doc_id}")
+    else:
+        layout = synthetic_layout(args.pages, args.words_per_page)
+
+    n_pages = len(layout.get("pages", {}))
+    print(f"layout: {n_pages} pages, "
+          f"{sum(len(p.get('spans', [])) for p in layout['pages'].values())} spans\n")
+    print(f"{'codec':<22}{'size KB':>10}{'ratio':>8}{'encode ms':>12}{'decode ms':>12}")
+
+    # Baseline: what storage did before (stdlib json + encode/decode copies)
+    legacy = json.dumps(layout).encode("utf-8")
+    enc = _time(lambda: json.dumps(layout).encode("utf-8"), args.repeat)
+    dec = _time(lambda: json.loads(legacy.decode("utf-8")), args.repeat)
+    print(f"{'stdlib json (legacy)':<22}{len(legacy) / 1024:>10.0f}{1.0:>8.2f}{enc:>12.1f}{dec:>12.1f}")
+
+    for codec, comp in serialization.available():
+        body, _ = serialization.dumps(layout, codec=codec, compression=comp)
+        assert serialization.loads(body) == layout
+        enc = _time(lambda: serialization.dumps(layout, codec=codec, compression=comp), args.repeat)
+        dec = _time(lambda: serialization.loads(body), args.repeat)
+        print(f"{codec + '+' + comp:<22}{len(body) / 1024:>10.0f}{len(legacy) / len(body):>8.2f}{enc:>12.1f}{dec:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark clause extraction (services/clauses.py) on synthetic contract text.
+
+Pages mix boilerplate prose with clause sentences of every type (about one
+clause per --density sentences). For each document size in --mb the script
+reports MB of page text per second for:
+
+  scan     the anchor automaton (clauses.MATCHER, one pass over the page)
+           plus the anchored check of each trigger at its hits
+  naive    the same triggers as separate case-insensitive regexes, one
+           pass over the page each
+  extract  the full extraction: scan, sentence regions, merging, normalizers
+
+Throughput should stay flat as documents grow (linear work in the text).
+
+    python scripts/bench_clauses.py --mb 1,4,16
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services import clauses
+
+FILLER = ("The parties acknowledge the recitals above. Each party has read this document carefully. "
+          "Capitalised terms have the meaning given in the schedule. Headings are for convenience only. "
+          "The supplier will deliver the services described in the order form. ").split(". ")
+CLAUSE_SENTENCES = [
+    "In no event shall either party's aggregate liability exceed fifty percent (50%) of the annual fees",
+    "This Agreement shall automatically renew for successive one (1) year terms unless either party gives "
+    "thirty (30) days' prior written notice",
+    "Either party may terminate for convenience upon notice of at least 60 days",
+    "Customer shall pay all invoices within forty-five (45) days of receipt",
+    "This Agreement is governed by the laws of the State of New York",
+    "Supplier shall indemnify and hold harmless Customer against third party claims",
+    "Provider will maintain uptime of 99.9% each month, failing which service credits apply",
+    "Confidential Information shall be protected for a period of five (5) years",
+    "All intellectual property in the deliverables vests in the Customer",
+]
+PAGE_CHARS = 3000
+
+
+def make_pages(mb, density, seed):
+    rnd = random.Random(seed)
+    pages, total, target = [], 0, int(mb * 1e6)
+    while total < target:
+        parts, n = [], 0
+        while n < PAGE_CHARS:
+            s = rnd.choice(CLAUSE_SENTENCES) if rnd.random() < 1 / density else rnd.choice(FILLER).strip()
+            parts.append(s + ".")
+            n += len(s) + 2
+        text = " ".join(parts)
+        pages.append(text)
+        total += len(text)
+    return pages, total
+
+
+def timed(fn, pages):
+    t0 = time.perf_counter()
+    n = fn(pages)
+    return time.perf_counter() - t0, n
+
+
+def scan(pages):
+    return sum(1 for text in pages for _ in clauses._candidates(clauses._lower(text)))
+
+
+NAIVE = [re.compile(r"\b" + pat, re.IGNORECASE) for *_, pat in clauses.TRIGGERS]
+
+
+def naive(pages):
+    return sum(1 for text in pages for rx in NAIVE for _ in rx.finditer(text))
+
+
+def extract(pages):
+    return sum(len(clauses.extract_page(i + 1, text)) for i, text in enumerate(pages))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--mb", default="1,4,16", help="document sizes in MB of page text")
+    ap.add_argument("--density", type=float, default=4, help="one clause sentence per this many sentences")
+    ap.add_argument("--seed", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{len(clauses.TRIGGERS)} trigger patterns, {PAGE_CHARS}-char pages\n")
+    print(f"{'MB':>6}{'pages':>8}{'triggers':>10}{'(naive)':>9}{'scan MB/s':>11}{'naive MB/s':>12}"
+          f"{'extract MB/s':>14}{'clauses':>9}")
+    for mb in (float(x) for x in args.mb.split(",")):
+        pages, n_chars = make_pages(mb, args.density, args.seed)
+        size = n_chars / 1e6
+        t_scan, hits = timed(scan, pages)
+        t_naive, hits_naive = timed(naive, pages)
+        t_extract, n_clauses = timed(extract, pages)
+        print(f"{size:>6.1f}{len(pages):>8}{hits:>10}{hits_naive:>9}{size / t_scan:>11.1f}{size / t_naive:>12.1f}"
+              f"{size / t_extract:>14.1f}{n_clauses:>9}")
+
+
+if __name__ == "__main__":
+    main()
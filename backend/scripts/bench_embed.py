@@ -0,0 +1,167 @@
+"""
+Benchmark embedding: per-request encoding (every process calls its own model)
+vs the micro-batching embedding server (app/embed_server.py).
+
+  - query p99: --clients concurrent callers each embedding single queries,
+  - ingest throughput: --workers concurrent callers embedding batches of
+    --ingest-batch texts (upsert_spans uses 100).
+
+Uses the real sentence-transformers model when it is installed. Otherwise (or
+with --synthetic) a cost model stands in for it: one forward pass at a time
+on the host, costing --call-ms + --text-ms per text, which is what batching
+amortizes. --url benchmarks a running server over HTTP instead of in-process.
+
+    python scripts/bench_embed.py --synthetic --clients 32 --queries 2000
+    python scripts/bench_embed.py --url http://localhost:8100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from app.services.embed_batcher import MicroBatcher
+
+DIM = 768
+
+
+def synthetic_encoder(call_ms: float, text_ms: float):
+    device = threading.Lock()
+
+    def encode(texts, **_):
+        with device:
+            time.sleep((call_ms + text_ms * len(texts)) / 1000.0)
+        return np.zeros((len(texts), DIM), dtype=np.float32)
+
+    return encode
+
+
+def real_encoder():
+    from app.services import qdrant
+    model = qdrant.get_model()
+    return lambda texts, **_: model.encode(texts, normalize_embeddings=True, batch_size=len(texts) or 1)
+
+
+def pct(samples, p):
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(p * len(s)))]
+
+
+def run_direct(encode, n_callers: int, n_calls: int, batch: int):
+    """Callers encode on their own (threads, as API/worker processes would)."""
+    latencies = []
+
+    def one(i):
+        t0 = time.perf_counter()
+        encode([f"text {i} {j}" for j in range(batch)])
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_callers) as pool:
+        list(pool.map(one, range(n_calls)))
+    return time.perf_counter() - t0, latencies
+
+
+def run_batched(encode, n_callers: int, n_calls: int, batch: int, max_batch: int, wait_ms: float):
+    latencies = []
+
+    async def go():
+        batcher = MicroBatcher(encode, max_batch=max_batch, max_wait_ms=wait_ms)
+        sem = asyncio.Semaphore(n_callers)
+
+        async def one(i):
+            async with sem:
+                t0 = time.perf_counter()
+                await batcher.embed([f"text {i} {j}" for j in range(batch)])
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n_calls)))
+        elapsed = time.perf_counter() - t0
+        stats = batcher.stats.snapshot()
+        await batcher.stop()
+        return elapsed, stats
+
+    elapsed, stats = asyncio.run(go())
+    return elapsed, latencies, stats
+
+
+def run_http(url: str, n_callers: int, n_calls: int, batch: int):
+    import httpx
+    client = httpx.Client(base_url=url, timeout=60)
+    latencies = []
+
+    def one(i):
+        t0 = time.perf_counter()
+        client.post("/embed", json={"texts": [f"text {i} {j}" for j in range(batch)]}).raise_for_status()
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_callers) as pool:
+        list(pool.map(one, range(n_calls)))
+    return time.perf_counter() - t0, latencies
+
+
+def report(label, elapsed, latencies, n_texts, extra=""):
+    print(f"{label:<24}{n_texts / elapsed:>10.0f} texts/s  p50 {statistics.median(latencies):>7.1f}ms  "
+          f"p99 {pct(latencies, 0.99):>7.1f}ms{extra}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--clients", type=int, default=32)
+    ap.add_argument("--queries", type=int, default=1000)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--ingest-batches", type=int, default=40)
+    ap.add_argument("--ingest-batch", type=int, default=100)
+    ap.add_argument("--max-batch", type=int, default=64)
+    ap.add_argument("--wait-ms", type=float, default=5.0)
+    ap.add_argument("--synthetic", action="store_true")
+    ap.add_argument("--call-ms", type=float, default=8.0, help="synthetic: fixed cost per forward pass")
+    ap.add_argument("--text-ms", type=float, default=0.6, help="synthetic: cost per text")
+    ap.add_argument("--url", help="benchmark a running embedding server over HTTP")
+    args = ap.parse_args()
+
+    if args.url:
+        elapsed, lat = run_http(args.url, args.clients, args.queries, 1)
+        report("query (server, HTTP)", elapsed, lat, args.queries)
+        elapsed, lat = run_http(args.url, args.workers, args.ingest_batches, args.ingest_batch)
+        report("ingest (server, HTTP)", elapsed, lat, args.ingest_batches * args.ingest_batch)
+        return
+
+    encode = None
+    if not args.synthetic:
+        try:
+            encode = real_encoder()
+            print("model: real (sentence-transformers)")
+        except ImportError:
+            print("sentence-transformers not installed: using the synthetic cost model")
+    if encode is None:
+        encode = synthetic_encoder(args.call_ms, args.text_ms)
+        print(f"model: synthetic ({args.call_ms}ms per pass + {args.text_ms}ms per text, one pass at a time)")
+
+    encode(["warm-up"])
+    print(f"\nqueries: {args.queries} single-text requests, {args.clients} concurrent")
+    elapsed, lat = run_direct(encode, args.clients, args.queries, 1)
+    report("per-request encode", elapsed, lat, args.queries)
+    elapsed, lat, stats = run_batched(encode, args.clients, args.queries, 1, args.max_batch, args.wait_ms)
+    report("micro-batched", elapsed, lat, args.queries, f"  ({stats['avg_batch_texts']:.1f} texts/pass)")
+
+    n_texts = args.ingest_batches * args.ingest_batch
+    print(f"\ningest: {args.ingest_batches} batches of {args.ingest_batch}, {args.workers} concurrent")
+    elapsed, lat = run_direct(encode, args.workers, args.ingest_batches, args.ingest_batch)
+    report("per-request encode", elapsed, lat, n_texts)
+    elapsed, lat, stats = run_batched(encode, args.workers, args.ingest_batches, args.ingest_batch,
+                                      args.max_batch, args.wait_ms)
+    report("micro-batched", elapsed, lat, n_texts, f"  ({stats['avg_batch_texts']:.1f} texts/pass)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+CPU throughput of the embedding backends (EMBED_BACKEND):
+
+  torch       sentence-transformers (when installed)
+  onnx fp32   the exported model.onnx
+  onnx int8   the exported model.int8.onnx (dynamic quantization)
+
+on texts shaped like our spans (--words per text), --batch texts per call,
+plus the cosine similarity of each ONNX variant to torch (or to fp32 when
+torch isn't installed).
+
+--onnx-dir is the output of app/scripts/export_onnx_embedder.py. Without an
+export (e.g. no torch on this machine to make one), --synthetic builds a
+stand-in with the same interface: an embedding table followed by --layers
+768x3072x768 feed-forward blocks, the bulk of an mpnet layer's FLOPs, which is
+enough to compare fp32 and int8 execution on this CPU.
+
+    python scripts/bench_embed_onnx.py --onnx-dir /models/embedder-onnx --texts 2000
+    python scripts/bench_embed_onnx.py --synthetic --threads 4
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from app.services.embed_onnx import OnnxEmbedder, cosine_parity
+
+WORDS = ("the supplier shall indemnify customer against all losses arising from breach of this agreement "
+         "liability cap fees paid twelve months notice terminate renewal term governing law").split()
+
+
+def build_synthetic(out_dir: str, layers: int, hidden: int = 768, ffn: int = 3072, vocab: int = 4096):
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from tokenizers import Tokenizer, models, pre_tokenizers
+
+    rnd = np.random.default_rng(0)
+    inits = [numpy_helper.from_array(rnd.normal(scale=0.02, size=(vocab, hidden)).astype(np.float32), "emb")]
+    nodes = [helper.make_node("Gather", ["emb", "input_ids"], ["h0"])]
+    for i in range(layers):
+        inits += [numpy_helper.from_array(rnd.normal(scale=0.02, size=(hidden, ffn)).astype(np.float32), f"w{i}a"),
+                  numpy_helper.from_array(rnd.normal(scale=0.02, size=(ffn, hidden)).astype(np.float32), f"w{i}b")]
+        nodes += [helper.make_node("MatMul", [f"h{i}", f"w{i}a"], [f"u{i}"]),
+                  helper.make_node("Relu", [f"u{i}"], [f"r{i}"]),
+                  helper.make_node("MatMul", [f"r{i}", f"w{i}b"], [f"d{i}"]),
+                  helper.make_node("Add", [f"h{i}", f"d{i}"],
+                                   ["last_hidden_state" if i == layers - 1 else f"h{i + 1}"])]
+    graph = helper.make_graph(
+        nodes, "synthetic",
+        [helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "sequence"]),
+         helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "sequence"])],
+        [helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "sequence", hidden])],
+        initializer=inits)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, os.path.join(out_dir, "model.onnx"))
+    quantize_dynamic(os.path.join(out_dir, "model.onnx"), os.path.join(out_dir, "model.int8.onnx"),
+                     weight_type=QuantType.QInt8)
+
+    words = ["<pad>", "<unk>"] + WORDS
+    tok = Tokenizer(models.WordLevel({w: i for i, w in enumerate(words)}, unk_token="<unk>"))
+    tok.pre_tokenizer = pre_tokenizers.Whitespace()
+    tok.save(os.path.join(out_dir, "tokenizer.json"))
+    with open(os.path.join(out_dir, "embed_config.json"), "w") as f:
+        json.dump({"pooling": "mean", "normalize": True, "max_length": 384, "dim": hidden,
+                   "pad_id": 0, "pad_token": "<pad>"}, f)
+
+
+def make_texts(n: int, words: int, rnd: random.Random):
+    return [" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(words // 2, words * 3 // 2))) for _ in range(n)]
+
+
+def throughput(encode, texts, batch: int):
+    encode(texts[:batch])  # warm-up
+    t0 = time.perf_counter()
+    out = [encode(texts[i:i + batch]) for i in range(0, len(texts), batch)]
+    return len(texts) / (time.perf_counter() - t0), np.concatenate(out)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--onnx-dir", default=os.getenv("EMBED_ONNX_DIR", ""))
+    ap.add_argument("--synthetic", action="store_true")
+    ap.add_argument("--layers", type=int, default=4, help="synthetic: feed-forward blocks")
+    ap.add_argument("--texts", type=int, default=1000)
+    ap.add_argument("--words", type=int, default=40)
+    ap.add_argument("--batch", type=int, default=32)
+    ap.add_argument("--threads", type=int, default=0, help="intra-op threads (0: all cores)")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    texts = make_texts(args.texts, args.words, random.Random(args.seed))
+    tmp = None
+    if args.synthetic or not (args.onnx_dir and os.path.isdir(args.onnx_dir)):
+        if not args.synthetic:
+            print("no exported model (--onnx-dir): using the synthetic stand-in")
+        tmp = tempfile.TemporaryDirectory()
+        build_synthetic(tmp.name, args.layers)
+        model_dir = tmp.name
+    else:
+        model_dir = args.onnx_dir
+    print(f"{args.texts} texts of ~{args.words} words, batch {args.batch}, threads {args.threads or 'all'}\n")
+
+    results = {}
+    if not tmp:
+        try:
+            import torch
+            from sentence_transformers import SentenceTransformer
+            if args.threads:
+                torch.set_num_threads(args.threads)
+            with open(os.path.join(model_dir, "embed_config.json")) as f:
+                name = json.load(f)["model"]
+            st = SentenceTransformer(name, device="cpu")
+            results["torch"] = throughput(
+                lambda t: st.encode(t, normalize_embeddings=True, batch_size=args.batch), texts, args.batch)
+        except ImportError:
+            print("sentence-transformers not installed: skipping torch")
+    for label, quantized in (("onnx fp32", False), ("onnx int8", True)):
+        model = OnnxEmbedder(model_dir, quantized=quantized, threads=args.threads)
+        results[label] = throughput(lambda t: model.encode(t, batch_size=args.batch), texts, args.batch)
+
+    reference_label = "torch" if "torch" in results else "onnx fp32"
+    reference = results[reference_label][1]
+    base = results[reference_label][0]
+    print(f"{'backend':<12}{'texts/s':>10}{'speed-up':>10}{'min cos':>10}{'mean cos':>10}   (vs {reference_label})")
+    for label, (rate, vectors) in results.items():
+        cos = cosine_parity(reference, vectors)
+        print(f"{label:<12}{rate:>10.0f}{rate / base:>9.2f}x{min(cos):>10.4f}{sum(cos) / len(cos):>10.4f}")
+    if tmp:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Load test: concurrent ingest throughput and event-loop responsiveness.
+
+Compares the old request path (blocking storage calls inside `async def`)
+with the async storage path (services.async_storage). While uploads run, a
+probe hits GET / every few milliseconds; with blocking uploads the probe's
+tail latency grows to the length of an upload.
+
+In-process mode (default) uses the local storage backend with a simulated
+upstream bandwidth, so it needs no MinIO:
+
+    python scripts/bench_ingest_concurrency.py --uploads 32 --concurrency 8 --size-mb 4
+
+Against a running API (real MinIO/Celery), only the "current" path is measured:
+
+    python scripts/bench_ingest_concurrency.py --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import io
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+
+
+def _build_app(mode: str, bandwidth_mb_s: float):
+    from fastapi import FastAPI, File, UploadFile
+    from app.services import storage, async_storage
+
+    # Simulate network transfer time on the blocking backend call
+    backend_upload = storage._backend.upload
+
+    def slow_upload(key, fileobj, content_type):
+        data = fileobj.read()
+        time.sleep(len(data) / (bandwidth_mb_s * 1024 * 1024))
+        backend_upload(key, io.BytesIO(data), content_type)
+
+    storage._backend.upload = slow_upload  # type: ignore[method-assign]
+
+    app = FastAPI()
+
+    @app.get("/")
+    def health():
+        return {"ok": True}
+
+    if mode == "blocking":
+        @app.post("/ingest")
+        async def ingest_blocking(file: UploadFile = File(...)):
+            storage.ensure_bucket()
+            storage.put_stream(f"bench/{time.monotonic_ns()}.pdf", file.file)
+            return {"ok": True}
+    else:
+        @app.post("/ingest")
+        async def ingest_async(file: UploadFile = File(...)):
+            await async_storage.ensure_bucket()
+            await async_storage.put_stream(f"bench/{time.monotonic_ns()}.pdf", file.file)
+            return {"ok": True}
+
+    return app
+
+
+async def _run(client: httpx.AsyncClient, uploads: int, concurrency: int, payload: bytes):
+    sem = asyncio.Semaphore(concurrency)
+    probe_ms: list[float] = []
+    done = asyncio.Event()
+
+    async def one_upload(i: int):
+        async with sem:
+            r = await client.post("/ingest", files={"file": (f"doc{i}.pdf", payload, "application/pdf")})
+            r.raise_for_status()
+
+    async def probe():
+        while not done.is_set():
+            t0 = time.perf_counter()
+            await client.get("/")
+            probe_ms.append((time.perf_counter() - t0) * 1000)
+            await asyncio.sleep(0.005)
+
+    probe_task = asyncio.create_task(probe())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one_upload(i) for i in range(uploads)))
+    elapsed = time.perf_counter() - t0
+    done.set()
+    await probe_task
+
+    probe_ms.sort()
+    p99 = probe_ms[min(len(probe_ms) - 1, int(len(probe_ms) * 0.99))] if probe_ms else 0.0
+    return {
+        "uploads_per_s": uploads / elapsed,
+        "elapsed_s": elapsed,
+        "probe_n": len(probe_ms),
+        "probe_p50_ms": statistics.median(probe_ms) if probe_ms else 0.0,
+        "probe_p99_ms": p99,
+    }
+
+
+def _print(label: str, r: dict):
+    print(f"{label:<10} {r['uploads_per_s']:>9.2f} uploads/s  {r['elapsed_s']:>7.2f}s  "
+          f"probe p50 {r['probe_p50_ms']:>8.2f} ms  p99 {r['probe_p99_ms']:>8.2f} ms  (n={r['probe_n']})")
+
+
+async def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", help="benchmark a running API instead of in-process apps")
+    ap.add_argument("--uploads", type=int, default=32)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--size-mb", type=float, default=4.0)
+    ap.add_argument("--bandwidth-mb-s", type=float, default=100.0,
+                    help="simulated storage bandwidth (in-process mode)")
+    args = ap.parse_args()
+
+    payload = os.urandom(int(args.size_mb * 1024 * 1024))
+
+    if args.url:
+        headers = {"x-api-key": os.environ["API_KEY"]} if os.getenv("API_KEY") else {}
+        async with httpx.AsyncClient(base_url=args.url, headers=headers, timeout=300) as client:
+            _print("current", await _run(client, args.uploads, args.concurrency, payload))
+        return
+
+    tmp = tempfile.mkdtemp(prefix="titan-bench-")
+    os.environ["STORAGE_BACKEND"] = "local"
+    os.environ["STORAGE_ROOT"] = tmp
+
+    for mode in ("blocking", "async"):
+        app = _build_app(mode, args.bandwidth_mb_s)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            _print(mode, await _run(client, args.uploads, args.concurrency, payload))
+        # Drop the instance-level slow_upload wrapper before the next mode
+        from app.services import storage
+        del storage._backend.upload
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,219 @@
+"""
+OCR backend benchmark: pages per second and word accuracy of each predictor
+configuration (services/ocr.build_predictor) on a fixed set of PDFs.
+
+The fixture set is generated once, deterministically (--seed), into
+--fixtures: contract-like pages in a few layouts (dense two-column body text,
+small-print footnotes, a table, a near-empty signature page, an A1 drawing
+with small labels), each PDF with a .json of its ground-truth words per page.
+Pages are rendered the way ocr.run renders them (ocr.plan_render).
+
+Word accuracy is the share of ground-truth words recognized on the right page
+(bag-of-words, case-sensitive, punctuation stripped); "extra" counts predicted
+words that match nothing.
+
+Configurations are backend:det_arch:reco_arch[:int8], e.g.
+
+    python scripts/bench_ocr.py
+    python scripts/bench_ocr.py --threads 4 --configs \\
+        torch:db_resnet50:crnn_vgg16_bn,onnx:db_mobilenet_v3_large:crnn_mobilenet_v3_small:int8
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pypdfium2 as pdfium
+from PIL import Image, ImageDraw, ImageFont
+
+from app.services import ocr
+
+DEFAULT_CONFIGS = ",".join([
+    "torch:db_resnet50:crnn_vgg16_bn",
+    "torch:db_mobilenet_v3_large:crnn_mobilenet_v3_small",
+    "torch:db_mobilenet_v3_large:crnn_mobilenet_v3_small:int8",
+    "onnx:db_resnet50:crnn_vgg16_bn",
+    "onnx:db_mobilenet_v3_large:crnn_mobilenet_v3_small",
+    "onnx:db_mobilenet_v3_large:crnn_mobilenet_v3_small:int8",
+])
+
+VOCAB = ("agreement supplier customer shall liability indemnify terminate notice renewal period fees "
+         "services confidential information party parties breach written consent governing law england "
+         "payment invoice thirty ninety days months annual aggregate cap exceed damages warranty").split()
+PAGE = (1240, 1754)  # A4 at 150 dpi: font sizes below are pixels, 23px = 11pt
+SHEET = (3508, 4967)  # A1 at 150 dpi
+_WORD = re.compile(r"[A-Za-z0-9]+")
+
+
+def _font(size):
+    for name in ("DejaVuSans.ttf", "LiberationSans-Regular.ttf", "Arial.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def _draw_words(draw, rnd, box, size, words_out):
+    x0, y0, x1, y1 = box
+    font = _font(size)
+    space = draw.textlength(" ", font=font)
+    x, y = x0, y0
+    while y + size * 1.3 < y1:
+        word = rnd.choice(VOCAB)
+        if rnd.random() < 0.1:
+            word = word.capitalize()
+        w = draw.textlength(word, font=font)
+        if x + w > x1:
+            x, y = x0, y + size * 1.4
+            continue
+        draw.text((x, y), word, fill=0, font=font)
+        words_out.append(word)
+        x += w + space
+
+
+def _page(kind, rnd):
+    img = Image.new("L", SHEET if kind == "drawing" else PAGE, 255)
+    draw = ImageDraw.Draw(img)
+    words = []
+    if kind == "dense":
+        _draw_words(draw, rnd, (80, 90, 600, 1660), 23, words)
+        _draw_words(draw, rnd, (640, 90, 1160, 1660), 23, words)
+    elif kind == "footnotes":
+        _draw_words(draw, rnd, (80, 90, 1160, 900), 25, words)
+        _draw_words(draw, rnd, (80, 1000, 1160, 1660), 15, words)
+    elif kind == "table":
+        font = _font(19)
+        for r in range(25):
+            for c in range(5):
+                x, y = 90 + c * 215, 120 + r * 58
+                draw.rectangle((x - 8, y - 10, x + 207, y + 48), outline=0)
+                word = rnd.choice(VOCAB) if c else str(rnd.randint(1, 9999))
+                draw.text((x, y + 8), word, fill=0, font=font)
+                words.append(word)
+    elif kind == "drawing":
+        font = _font(17)
+        for _ in range(60):
+            x, y = rnd.randint(100, SHEET[0] - 500), rnd.randint(100, SHEET[1] - 300)
+            draw.rectangle((x, y, x + rnd.randint(150, 400), y + rnd.randint(80, 200)), outline=0, width=3)
+        for _ in range(40):
+            word = rnd.choice(VOCAB)
+            draw.text((rnd.randint(100, SHEET[0] - 300), rnd.randint(100, SHEET[1] - 100)), word, fill=0,
+                      font=font)
+            words.append(word)
+    else:  # signature page
+        _draw_words(draw, rnd, (80, 90, 1160, 200), 23, words)
+        for y in (700, 1100):
+            draw.line((120, y, 560, y), fill=0, width=2)
+            draw.text((120, y + 12), "Authorised signatory", fill=0, font=_font(16))
+            words += ["Authorised", "signatory"]
+    return img, words
+
+
+def make_fixtures(out_dir, n_docs, seed):
+    os.makedirs(out_dir, exist_ok=True)
+    rnd = random.Random(seed)
+    kinds = ["dense", "footnotes", "table", "signature", "drawing"]
+    for d in range(n_docs):
+        pages, truth = [], []
+        for p in range(4):
+            img, words = _page(kinds[(d + p) % len(kinds)], rnd)
+            pages.append(img)
+            truth.append(words)
+        pages[0].save(os.path.join(out_dir, f"doc{d:02d}.pdf"), save_all=True, append_images=pages[1:],
+                      resolution=150.0)
+        with open(os.path.join(out_dir, f"doc{d:02d}.json"), "w") as f:
+            json.dump({"pages": truth}, f)
+
+
+def load_fixtures(fixtures):
+    docs = []
+    for name in sorted(os.listdir(fixtures)):
+        if name.endswith(".pdf"):
+            with open(os.path.join(fixtures, name[:-4] + ".json")) as f:
+                docs.append((os.path.join(fixtures, name), json.load(f)["pages"]))
+    return docs
+
+
+def render_pages(path):
+    pdf = pdfium.PdfDocument(path)
+    try:
+        for i in range(len(pdf)):
+            page = pdf.get_page(i)
+            plan = ocr.plan_render(page)
+            yield ocr.render_page(page, plan["scale"], plan["grayscale"])
+            page.close()
+    finally:
+        pdf.close()
+
+
+def word_score(truth, predicted):
+    want = Counter(w for t in truth for w in _WORD.findall(t))
+    got = Counter(w for t in predicted for w in _WORD.findall(t))
+    matched = sum((want & got).values())
+    return matched, sum(want.values()), sum((got - want).values())
+
+
+def run_config(spec, docs, threads):
+    backend, det, reco, *flags = spec.split(":")
+    t0 = time.perf_counter()
+    predictor = ocr.build_predictor(backend=backend, det_arch=det, reco_arch=reco, int8="int8" in flags,
+                                    threads=threads)
+    load_s = time.perf_counter() - t0
+    predictor([next(render_pages(docs[0][0]))])  # warm-up: first call allocates
+    pages = matched = total = extra = 0
+    ocr_s = 0.0
+    for path, truth in docs:
+        for page_np, words in zip(render_pages(path), truth):
+            t0 = time.perf_counter()
+            result = predictor([page_np])
+            ocr_s += time.perf_counter() - t0
+            spans = ocr.page_spans_from(result.pages[0], page_np.shape[1], page_np.shape[0])
+            m, t, e = word_score(words, [s["text"] for s in spans])
+            matched, total, extra, pages = matched + m, total + t, extra + e, pages + 1
+    return {"config": spec, "load_s": load_s, "pages": pages, "pages_per_s": pages / ocr_s,
+            "word_accuracy": matched / total if total else 0.0, "extra_words": extra}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--fixtures", default=os.path.join(os.path.dirname(__file__), "fixtures", "ocr"))
+    ap.add_argument("--docs", type=int, default=6, help="PDFs to generate when --fixtures is empty")
+    ap.add_argument("--seed", type=int, default=11)
+    ap.add_argument("--configs", default=DEFAULT_CONFIGS)
+    ap.add_argument("--threads", type=int, default=0, help="intra-op threads (0: library default)")
+    ap.add_argument("--out", help="append a JSON line with the results")
+    args = ap.parse_args()
+
+    if not os.path.isdir(args.fixtures) or not any(n.endswith(".pdf") for n in os.listdir(args.fixtures)):
+        make_fixtures(args.fixtures, args.docs, args.seed)
+        print(f"generated {args.docs} fixture PDFs in {args.fixtures}")
+    docs = load_fixtures(args.fixtures)
+    n_pages = sum(len(t) for _, t in docs)
+    print(f"{len(docs)} PDFs, {n_pages} pages, threads {args.threads or 'default'}\n")
+
+    print(f"{'configuration':<58}{'load':>7}{'pages/s':>9}{'word acc':>10}{'extra':>7}")
+    results = []
+    for spec in args.configs.split(","):
+        try:
+            r = run_config(spec, docs, args.threads)
+        except ImportError as e:
+            print(f"{spec:<58}  skipped: {e}")
+            continue
+        results.append(r)
+        print(f"{spec:<58}{r['load_s']:>6.1f}s{r['pages_per_s']:>9.2f}{r['word_accuracy']:>9.1%}"
+              f"{r['extra_words']:>7}")
+
+    if args.out and results:
+        with open(args.out, "a") as f:
+            f.write(json.dumps({"ts": time.time(), "threads": args.threads, "results": results}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Load test for the read routes: asyncio engine (the routes as shipped) vs the
+previous sync handlers, which FastAPI runs on its threadpool.
+
+Seeds a throwaway database (same corpus as bench_routes.py), then fires
+--requests requests per route with --concurrency in flight through an
+in-process ASGI client and reports requests/s and tail latency for both.
+The sync baseline reuses the routes' own query/response helpers, so only the
+execution model differs.
+
+    python scripts/bench_read_async.py --docs 500 --requests 2000 --concurrency 64
+    python scripts/bench_read_async.py --url postgresql+psycopg://...  # empty database
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db import Base, async_pool_waits, async_url, make_async_engine, make_engine, pool_waits
+from app.deps import async_db_dep
+from app.models import Guidance as GModel
+from app.routes import clauses as r_clauses, deadlines as r_deadlines, guidance as r_guidance
+from app.services.guidance import deadlines_to_ics
+
+from bench_routes import seed
+
+ROUTES = {
+    "clauses": "/docs/{doc_id}/clauses",
+    "guidance": "/docs/{doc_id}/guidance",
+    "deadlines.ics": "/docs/{doc_id}/deadlines.ics",
+}
+
+
+def sync_app(SessionLocal) -> FastAPI:
+    """The read routes as sync handlers on the sync engine (the pre-async path)."""
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    router = APIRouter(prefix="/docs")
+
+    @router.get("/{doc_id}/clauses")
+    def get_clauses(doc_id: str, db: Session = Depends(get_db)):
+        return [r_clauses._clause_out(c) for c in db.scalars(r_clauses._clauses_query(doc_id)).all()]
+
+    @router.get("/{doc_id}/guidance")
+    def get_guidance(doc_id: str, db: Session = Depends(get_db)):
+        rows = db.scalars(select(GModel).where(GModel.doc_id == doc_id)).all()
+        chips = {g.id: r_guidance._parse_chip(doc_id, g.evidence or []) for g in rows}
+        spans = {c for c in chips.values() if c is not None}
+        resolved = r_guidance._first_per_span(db.execute(r_guidance._spans_query(doc_id, spans))) if spans else {}
+        return r_guidance._guidance_items(doc_id, rows, chips, resolved)
+
+    @router.get("/{doc_id}/deadlines.ics", response_class=PlainTextResponse)
+    def deadlines_ics(doc_id: str, db: Session = Depends(get_db)):
+        payload = [{"id": d.id, "title": d.title, "due_at": d.due_at}
+                   for d in db.execute(r_deadlines._deadlines_query(doc_id)).all()]
+        return PlainTextResponse(content=deadlines_to_ics(doc_id, payload), media_type="text/calendar")
+
+    api = FastAPI()
+    api.include_router(router)
+    return api
+
+
+def async_app(AsyncSessionLocal) -> FastAPI:
+    async def _db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    api = FastAPI()
+    for r in (r_clauses, r_guidance, r_deadlines):
+        api.include_router(r.router)
+    api.dependency_overrides[async_db_dep] = _db
+    return api
+
+
+async def load(api: FastAPI, path: str, doc_ids, n_requests: int, concurrency: int):
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int):
+            async with sem:
+                t0 = time.perf_counter()
+                resp = await client.get(path.format(doc_id=doc_ids[i % len(doc_ids)]))
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+                assert resp.status_code == 200, (path, resp.status_code)
+
+        await one(0)  # warm-up: pool connections, route compilation
+        latencies.clear()
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n_requests)))
+        elapsed = time.perf_counter() - t0
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+    return n_requests / elapsed, pct(0.50), pct(0.95), pct(0.99)
+
+
+async def run(args, url: str, doc_ids):
+    engine = make_engine(url, profile="api")
+    async_engine = make_async_engine(async_url(url), profile="api")
+    apps = {
+        "sync": sync_app(sessionmaker(bind=engine, autoflush=False)),
+        "async": async_app(async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)),
+    }
+    try:
+        print(f"{'route':<15}{'mode':<7}{'req/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'pool wait':>12}")
+        for name, path in ROUTES.items():
+            for mode, api in apps.items():
+                waits = async_pool_waits if mode == "async" else pool_waits
+                waits.reset()
+                rps, p50, p95, p99 = await load(api, path, doc_ids, args.requests, args.concurrency)
+                wait = waits.snapshot()["avg_wait_ms"]
+                print(f"{name:<15}{mode:<7}{rps:>9.0f}{p50:>8.1f}ms{p95:>8.1f}ms{p99:>8.1f}ms{wait:>10.1f}ms")
+    finally:
+        await async_engine.dispose()
+        engine.dispose()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--docs", type=int, default=500)
+    ap.add_argument("--clauses", type=int, default=50, help="clauses per document")
+    ap.add_argument("--requests", type=int, default=2000, help="requests per route and mode")
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--url", help="empty database to use (default: temporary SQLite file)")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+    logging.getLogger("titan.db").setLevel(logging.ERROR)  # slow-checkout warnings: reported as "pool wait"
+
+    tmp = None
+    url = args.url
+    if not url:
+        tmp = tempfile.TemporaryDirectory()
+        url = "sqlite:///" + os.path.join(tmp.name, "bench.db")
+    try:
+        engine = create_engine(url)
+        Base.metadata.create_all(bind=engine)
+        seed(sessionmaker(bind=engine, autoflush=False), args.docs, args.clauses, random.Random(args.seed))
+        engine.dispose()
+        print(f"seeded {args.docs} docs / {args.docs * args.clauses} clauses ({url}); "
+              f"{args.requests} requests per route, {args.concurrency} in flight")
+        asyncio.run(run(args, url, [f"D{d:06d}" for d in range(args.docs)]))
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
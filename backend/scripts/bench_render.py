@@ -0,0 +1,106 @@
+"""
+Page rendering benchmark: adaptive per-page scale (OCR_RENDER=adaptive,
+services/ocr.plan_render) against the fixed 2x colour rendering.
+
+Each mode runs in a fresh interpreter over the bench_ocr.py fixture set and
+reports pages/s, megapixels rendered, peak RSS and, when an OCR backend is
+installed (--ocr), OCR pages/s and word accuracy. --pages lists the scale
+chosen for every page.
+
+    python scripts/bench_render.py
+    python scripts/bench_render.py --ocr --pages
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+MODES = ("fixed", "adaptive")
+
+
+def child(fixtures: str, with_ocr: bool) -> dict:
+    import pypdfium2 as pdfium
+
+    from app.services import ocr
+    from scripts.bench_ocr import load_fixtures, word_score
+
+    predictor = ocr.build_predictor() if with_ocr else None
+    pages, render_s, ocr_s, pixels, matched, total = [], 0.0, 0.0, 0, 0, 0
+    for path, truth in load_fixtures(fixtures):
+        pdf = pdfium.PdfDocument(path)
+        for i, words in enumerate(truth):
+            page = pdf.get_page(i)
+            t0 = time.perf_counter()
+            plan = ocr.plan_render(page)
+            page_np = ocr.render_page(page, plan["scale"], plan["grayscale"])
+            render_s += time.perf_counter() - t0
+            pixels += page_np.shape[0] * page_np.shape[1]
+            pages.append({"doc": os.path.basename(path), "page": i + 1, **plan})
+            if predictor is not None:
+                t0 = time.perf_counter()
+                result = predictor([page_np])
+                ocr_s += time.perf_counter() - t0
+                spans = ocr.page_spans_from(result.pages[0], page_np.shape[1], page_np.shape[0])
+                m, t, _ = word_score(words, [s["text"] for s in spans])
+                matched, total = matched + m, total + t
+            del page_np
+            page.close()
+        pdf.close()
+    return {"pages": pages, "render_s": render_s, "ocr_s": ocr_s, "mpx": pixels / 1e6,
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+            "word_accuracy": matched / total if total else None}
+
+
+def run_mode(mode: str, fixtures: str, with_ocr: bool) -> dict:
+    env = {**os.environ, "OCR_RENDER": mode, "PYTHONPATH": BACKEND}
+    args = [sys.executable, os.path.abspath(__file__), "--child", "--fixtures", fixtures]
+    if with_ocr:
+        args.append("--ocr")
+    out = subprocess.run(args, cwd=BACKEND, env=env, capture_output=True, text=True)
+    if out.returncode:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1])
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--fixtures", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "ocr"))
+    ap.add_argument("--docs", type=int, default=6, help="PDFs to generate when --fixtures is empty")
+    ap.add_argument("--seed", type=int, default=11)
+    ap.add_argument("--ocr", action="store_true", help="also run the configured OCR predictor")
+    ap.add_argument("--pages", action="store_true", help="print the plan chosen for each page")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.fixtures, args.ocr)))
+        return
+
+    from scripts.bench_ocr import make_fixtures
+    if not os.path.isdir(args.fixtures) or not any(n.endswith(".pdf") for n in os.listdir(args.fixtures)):
+        make_fixtures(args.fixtures, args.docs, args.seed)
+        print(f"generated {args.docs} fixture PDFs in {args.fixtures}")
+
+    results = {mode: run_mode(mode, args.fixtures, args.ocr) for mode in MODES}
+    n = len(results["fixed"]["pages"])
+    print(f"{n} pages\n")
+    print(f"{'mode':<10}{'render pages/s':>15}{'Mpx':>9}{'peak RSS':>10}{'OCR pages/s':>13}{'word acc':>10}")
+    for mode, r in results.items():
+        ocr_rate = f"{n / r['ocr_s']:.2f}" if r["ocr_s"] else "-"
+        acc = f"{r['word_accuracy']:.1%}" if r["word_accuracy"] is not None else "-"
+        print(f"{mode:<10}{n / r['render_s']:>15.1f}{r['mpx']:>9.0f}{r['peak_rss_mb']:>8.0f}MB"
+              f"{ocr_rate:>13}{acc:>10}")
+    if args.pages:
+        print(f"\n{'page':<14}{'fixed':>8}{'adaptive':>10}  grayscale")
+        for f, a in zip(results["fixed"]["pages"], results["adaptive"]["pages"]):
+            print(f"{f['doc'] + ':' + str(f['page']):<14}{f['scale']:>8}{a['scale']:>10}  {a['grayscale']}")
+
+
+if __name__ == "__main__":
+    main()
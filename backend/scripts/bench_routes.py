@@ -0,0 +1,176 @@
+"""
+Benchmark per-document route latency before and after the hot-path index
+migration (alembic revision 2026_10_19_hot_path_indexes).
+
+Builds a throwaway database at the previous revision, seeds a synthetic corpus
+(documents x clauses / guidance / deadlines / policy fires / audit rows) with
+bulk inserts, times the read routes through TestClient, upgrades to head and
+times them again.
+
+    python scripts/bench_routes.py --docs 2000 --clauses 50
+    python scripts/bench_routes.py --url postgresql+psycopg://...  # empty database
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from alembic import command
+from alembic.config import Config
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.db import async_url, make_async_engine
+from app.deps import async_db_dep, db_dep
+from app.models import Audit, Clause, Deadline, Document, Guidance, PolicyFire
+from app.routes import clauses as r_clauses, deadlines as r_deadlines, guidance as r_guidance, status as r_status
+from app.schemas.clause import ClauseTypeEnum
+
+BEFORE = "2026_10_19_audit_rule_versions"
+TYPES = [t.value for t in ClauseTypeEnum]
+ROUTES = {
+    "clauses": "/docs/{doc_id}/clauses",
+    "guidance": "/docs/{doc_id}/guidance",
+    "deadlines.ics": "/docs/{doc_id}/deadlines.ics",
+    "status": "/docs/{doc_id}/status",
+}
+CHUNK = 5_000
+
+
+def _bulk(db, model, rows):
+    for i in range(0, len(rows), CHUNK):
+        db.execute(insert(model), rows[i:i + CHUNK])
+
+
+def seed(Session, n_docs: int, n_clauses: int, rnd: random.Random) -> None:
+    now = datetime.utcnow()
+    db = Session()
+    try:
+        _bulk(db, Document, [{"doc_id": f"D{d:06d}", "title": f"doc {d}", "status": "done", "created_at": now}
+                             for d in range(n_docs)])
+        clauses, guidance, deadlines, fires, audit = [], [], [], [], []
+        for d in range(n_docs):
+            doc_id = f"D{d:06d}"
+            for i in range(n_clauses):
+                cid = f"{doc_id}-c{i}"
+                page, start = 1 + i // 10, (i % 10) * 200
+                clauses.append({"id": cid, "doc_id": doc_id, "type": rnd.choice(TYPES), "page": page,
+                                "start": start, "end": start + 150, "text": "...", "confidence": 0.9,
+                                "normalized": {"notice_days": rnd.randint(0, 120)}})
+                if i % 2 == 0:
+                    guidance.append({"id": f"{doc_id}-g{i}", "doc_id": doc_id, "title": f"g{i}", "what": "...",
+                                     "risk": "", "evidence": [f"{doc_id}:{page}:{start}-{start + 150}"],
+                                     "confidence": 0.7})
+                if i % 3 == 0:
+                    fires.append({"id": f"{doc_id}-f{i}", "rule_id": f"R{i % 40}", "doc_id": doc_id,
+                                  "clause_id": cid, "severity": "high", "message": ""})
+                if i % 10 == 0:
+                    deadlines.append({"id": f"{doc_id}-d{i}", "doc_id": doc_id, "title": f"d{i}",
+                                      "due_at": now + timedelta(days=rnd.randint(1, 365)),
+                                      "source_clause_id": cid})
+            for stage in ("ingest", "ocr", "layout", "clauses", "summarizer"):
+                audit.append({"doc_id": doc_id, "stage": stage, "input": {}, "output": {}, "created_at": now,
+                              "status": "ok", "started_at": now, "finished_at": now, "duration_ms": 10.0,
+                              "input_bytes": 0, "output_bytes": 0})
+        for model, rows in ((Clause, clauses), (Guidance, guidance), (Deadline, deadlines),
+                            (PolicyFire, fires), (Audit, audit)):
+            _bulk(db, model, rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+def measure(client: TestClient, doc_ids, repeat: int):
+    out = {}
+    for name, path in ROUTES.items():
+        samples = []
+        for _ in range(repeat):
+            for doc_id in doc_ids:
+                t0 = time.perf_counter()
+                resp = client.get(path.format(doc_id=doc_id))
+                samples.append((time.perf_counter() - t0) * 1000.0)
+                assert resp.status_code == 200, (path, resp.status_code)
+        samples.sort()
+        out[name] = (statistics.median(samples), samples[int(0.95 * (len(samples) - 1))])
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--docs", type=int, default=2000)
+    ap.add_argument("--clauses", type=int, default=50, help="clauses per document")
+    ap.add_argument("--sample", type=int, default=50, help="documents queried per route")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--url", help="empty database to use (default: temporary SQLite file)")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    tmp = None
+    url = args.url
+    if not url:
+        tmp = tempfile.TemporaryDirectory()
+        url = "sqlite:///" + os.path.join(tmp.name, "bench.db")
+    cfg = Config(os.path.join(os.path.dirname(__file__), "..", "alembic.ini"))
+    cfg.set_main_option("sqlalchemy.url", url)
+
+    rnd = random.Random(args.seed)
+    engine = create_engine(url, connect_args={"check_same_thread": False} if url.startswith("sqlite") else {})
+    Session = sessionmaker(bind=engine, autoflush=False)
+    try:
+        command.upgrade(cfg, BEFORE)
+        t0 = time.perf_counter()
+        seed(Session, args.docs, args.clauses, rnd)
+        n_rows = args.docs * args.clauses
+        print(f"seeded {args.docs} docs / {n_rows} clauses in {time.perf_counter() - t0:.1f}s ({url})")
+
+        api = FastAPI()
+        for r in (r_clauses, r_guidance, r_deadlines, r_status):
+            api.include_router(r.router)
+
+        def _db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        async_engine = make_async_engine(async_url(url))
+        AsyncSession = async_sessionmaker(bind=async_engine)
+
+        async def _async_db():
+            async with AsyncSession() as db:
+                yield db
+
+        api.dependency_overrides[db_dep] = _db
+        api.dependency_overrides[async_db_dep] = _async_db
+        doc_ids = [f"D{d:06d}" for d in rnd.sample(range(args.docs), min(args.sample, args.docs))]
+
+        with TestClient(api) as client:
+            before = measure(client, doc_ids, args.repeat)
+            t0 = time.perf_counter()
+            command.upgrade(cfg, "head")
+            print(f"upgrade to head (index build): {time.perf_counter() - t0:.1f}s")
+            after = measure(client, doc_ids, args.repeat)
+            client.portal.call(async_engine.dispose)
+
+        print(f"{'route':<15}{'p50 before':>12}{'p95 before':>12}{'p50 after':>12}{'p95 after':>12}{'speedup':>9}")
+        for name in ROUTES:
+            (b50, b95), (a50, a95) = before[name], after[name]
+            print(f"{name:<15}{b50:>10.2f}ms{b95:>10.2f}ms{a50:>10.2f}ms{a95:>10.2f}ms{b50 / a50:>8.1f}x")
+    finally:
+        engine.dispose()
+        if tmp is not None:
+            tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Startup benchmark: import time, time to first GET / and resident memory of a
+fresh API process (app.main) and a fresh worker process (Celery app), plus
+which heavy modules each one loaded.
+
+Each measurement runs in a new interpreter. --warmup also times the warm-up
+hook (services/warmup.py) for the given components. --out appends one JSON
+line per run, so numbers can be tracked across commits.
+
+    python scripts/bench_startup.py --repeat 5
+    python scripts/bench_startup.py --warmup embedder --out startup.jsonl
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HEAVY = ["torch", "doctr", "sentence_transformers", "qdrant_client", "transformers"]
+
+# Runs in the child interpreter; prints one JSON object
+PROBE = r'''
+import json, os, sys, time
+t0 = time.perf_counter()
+if ROLE == "api":
+    import app.main
+    t_import = time.perf_counter() - t0
+    from fastapi.testclient import TestClient
+    client = TestClient(app.main.app)
+    t1 = time.perf_counter()
+    assert client.get("/").status_code == 200
+    t_first = t_import + time.perf_counter() - t1
+else:
+    import app.workers.celery_app
+    t_import = t_first = time.perf_counter() - t0
+warm = {}
+if WARMUP:
+    from app.services import warmup
+    t2 = time.perf_counter()
+    warm = warmup.run(WARMUP, role=ROLE)
+    warm["total_seconds"] = round(time.perf_counter() - t2, 3)
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+print(json.dumps({"import_s": t_import, "first_request_s": t_first, "rss_mb": rss_mb(),
+                  "heavy": [m for m in HEAVY if m in sys.modules], "warmup": warm}))
+'''
+
+
+def probe(role: str, warmup: str, db_url: str) -> dict:
+    env = {**os.environ, "DATABASE_URL": db_url, "API_WARMUP": "", "WORKER_WARMUP": "",
+           "PYTHONPATH": BACKEND}
+    code = f"ROLE={role!r}\nWARMUP={warmup!r}\nHEAVY={HEAVY!r}\n" + PROBE
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, env=env,
+                         capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process_s"] = time.perf_counter() - t0
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--warmup", default="", help="components to warm up, e.g. embedder,qdrant")
+    ap.add_argument("--out", help="append a JSON line with the results")
+    args = ap.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = "sqlite:///" + os.path.join(tmp, "startup.db")
+        for role in ("api", "worker"):
+            runs = [probe(role, args.warmup, db_url) for _ in range(args.repeat)]
+            results[role] = {
+                "import_s": statistics.median(r["import_s"] for r in runs),
+                "first_request_s": statistics.median(r["first_request_s"] for r in runs),
+                "process_s": statistics.median(r["process_s"] for r in runs),
+                "rss_mb": statistics.median(r["rss_mb"] for r in runs),
+                "heavy": runs[-1]["heavy"],
+                "warmup": runs[-1]["warmup"],
+            }
+
+    print(f"{'process':<8}{'import':>9}{'first GET /':>13}{'process':>10}{'RSS':>10}  heavy modules")
+    for role, r in results.items():
+        first = f"{r['first_request_s']:.2f}s" if role == "api" else "-"
+        print(f"{role:<8}{r['import_s']:>8.2f}s{first:>13}{r['process_s']:>9.2f}s{r['rss_mb']:>8.0f}MB  "
+              f"{', '.join(r['heavy']) or '(none)'}")
+        if r["warmup"]:
+            print(f"         warm-up: {json.dumps(r['warmup'])}")
+
+    if args.out:
+        with open(args.out, "a") as f:
+            f.write(json.dumps({"ts": time.time(), "warmup": args.warmup, **results}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
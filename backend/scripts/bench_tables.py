@@ -0,0 +1,113 @@
+"""
+Benchmark the tables stage (services/tables.py) on synthetic dense tables.
+
+Each page holds --tables tables of --rows x --cols cells (1-3 words each)
+between paragraphs of prose, as OCR word spans. The stage runs against an
+in-memory store holding the serialized artifacts OCR writes, for each page
+count in --pages, reading either
+
+  pages   the per-page layout artifacts (layout/manifest.json + layout/N.json)
+  index   the whole layout_index.json (documents OCR'd before page artifacts)
+
+and reports pages/s, words/s and the stage's peak memory (tracemalloc),
+including decoding its input. With page artifacts the peak stays flat as
+documents grow; with the whole index it grows with the document.
+
+    python scripts/bench_tables.py --pages 50,200,800
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services import tables
+
+WORDS = "fee cap notice days supplier customer service level credit annual total hosting support".split()
+
+
+def make_page(rnd, n_tables, rows, cols):
+    spans, cursor, y = [], 0, 40
+
+    def word(x, text):
+        nonlocal cursor
+        spans.append({"start": cursor, "end": cursor + len(text), "bbox": [x, y, 9 * len(text), 14],
+                      "text": text, "confidence": 0.9})
+        cursor += len(text) + 1
+        return 9 * len(text) + 8
+
+    for _ in range(n_tables):
+        for _ in range(3):  # paragraph
+            x = 40
+            while x < 1100:
+                x += word(x, rnd.choice(WORDS))
+            y += 20
+        y += 20
+        col_w = 1100 // cols
+        for _ in range(rows):
+            for c in range(cols):
+                x = 40 + c * col_w
+                for _ in range(rnd.randint(1, 3)):
+                    if x < 40 + (c + 1) * col_w - 100:
+                        x += word(x, rnd.choice(WORDS))
+            y += 22
+        y += 30
+    return {"width": 1200, "height": y + 40, "spans": spans}
+
+
+def run_once(n_pages, mode, args):
+    rnd = random.Random(args.seed)
+    template = [make_page(rnd, args.tables, args.rows, args.cols) for _ in range(min(n_pages, 20))]
+    pages = {str(i + 1): template[i % len(template)] for i in range(n_pages)}
+    n_words = sum(len(p["spans"]) for p in pages.values())
+    # serialized like storage holds them; decoding happens inside the stage, as with get_json
+    if mode == "pages":
+        store = {f"BENCH/layout/{n}.json": json.dumps(p).encode() for n, p in pages.items()}
+        store["BENCH/layout/manifest.json"] = json.dumps({"pages": [int(n) for n in pages]}).encode()
+    else:
+        store = {"BENCH/layout_index.json": json.dumps({"pages": pages}).encode()}
+    del pages
+    written = {"bytes": 0}
+
+    def get_json(key):
+        body = store.get(key)
+        return None if body is None else json.loads(body)
+
+    def put_json(key, data):
+        written["bytes"] += len(repr(data))  # stand-in for the upload; nothing kept
+
+    with patch.object(tables, "get_json", get_json), patch.object(tables, "put_json", put_json):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        out = tables.run("BENCH")
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return out, elapsed, peak, n_words, written["bytes"]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pages", default="50,200,800")
+    ap.add_argument("--tables", type=int, default=2, help="tables per page")
+    ap.add_argument("--rows", type=int, default=25)
+    ap.add_argument("--cols", type=int, default=6)
+    ap.add_argument("--seed", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{args.tables} tables of {args.rows}x{args.cols} per page\n")
+    print(f"{'input':>6}{'pages':>7}{'tables':>8}{'pages/s':>10}{'words/s':>11}{'peak mem':>11}{'output':>10}")
+    for mode in ("pages", "index"):
+        for n in (int(x) for x in args.pages.split(",")):
+            out, elapsed, peak, n_words, out_bytes = run_once(n, mode, args)
+            print(f"{mode:>6}{n:>7}{out['tables']:>8}{n / elapsed:>10.0f}{n_words / elapsed:>11.0f}"
+                  f"{peak / 1e6:>9.1f}MB{out_bytes / 1e6:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
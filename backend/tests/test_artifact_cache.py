@@ -0,0 +1,72 @@
+import unittest
+import io
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from app.services import artifact_cache, storage
+
+
+class TestArtifactCache(unittest.TestCase):
+    def setUp(self):
+        src = tempfile.TemporaryDirectory()
+        cache = tempfile.TemporaryDirectory()
+        self.addCleanup(src.cleanup)
+        self.addCleanup(cache.cleanup)
+        self.backend = storage.LocalBackend(src.name)
+        patcher = patch.object(artifact_cache, "CACHE_DIR", cache.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.fetches = []
+        real_fetch = self.backend.fetch
+
+        def fetch(key, if_none_match):
+            status, body, etag = real_fetch(key, if_none_match)
+            self.fetches.append(status)
+            return status, body, etag
+        self.fetch = fetch
+
+    def test_hit_revalidates_without_body(self):
+        self.backend.put("D1/layout_index.json", b"v1", "application/json")
+        self.assertEqual(artifact_cache.get("D1/layout_index.json", self.fetch), b"v1")
+        self.assertEqual(artifact_cache.get("D1/layout_index.json", self.fetch), b"v1")
+        self.assertEqual(self.fetches, ["ok", "not_modified"])
+
+    def test_changed_object_is_refetched(self):
+        self.backend.put("D1/a.json", b"v1", "application/json")
+        artifact_cache.get("D1/a.json", self.fetch)
+        time.sleep(0.01)
+        self.backend.put("D1/a.json", b"v22", "application/json")
+        self.assertEqual(artifact_cache.get("D1/a.json", self.fetch), b"v22")
+
+    def test_missing(self):
+        self.assertIsNone(artifact_cache.get("D1/nope.json", self.fetch))
+
+    def test_lru_eviction(self):
+        with patch.object(artifact_cache, "MAX_BYTES", 250):
+            for i, key in enumerate(("a", "b", "c")):
+                self.backend.put(key, bytes(100), "application/octet-stream")
+                artifact_cache.get(key, self.fetch)
+                if key == "b":
+                    # Touch "a" so "b" becomes least recently used
+                    artifact_cache.get("a", self.fetch)
+                time.sleep(0.01)
+        cached = {k for k in ("a", "b", "c") if os.path.exists(artifact_cache._paths(k)[0])}
+        self.assertEqual(cached, {"a", "c"})
+
+    def test_open_file_streams_to_disk(self):
+        self.backend.upload("D1/original.pdf", io.BytesIO(b"%PDF" + bytes(5000)), "application/pdf")
+        with artifact_cache.open_file("D1/original.pdf", self.backend.fetch_to_file) as f:
+            self.assertEqual(f.read(4), b"%PDF")
+        with artifact_cache.open_file("D1/original.pdf", self.backend.fetch_to_file) as f:
+            self.assertEqual(len(f.read()), 5004)
+
+
+if __name__ == '__main__':
+    unittest.main()
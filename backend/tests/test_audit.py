@@ -0,0 +1,103 @@
+import unittest
+import os
+import sys
+import time
+from unittest.mock import patch
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import Base
+from app.deps import db_dep
+from app.models import Document, Audit
+from app.routes import status as r_status
+from app.services import audit
+
+
+class TestStageAudit(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", poolclass=StaticPool,
+                               connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        self.Session = sessionmaker(bind=engine, autoflush=False)
+        patcher = patch.object(audit, "SessionLocal", self.Session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        audit._buffer.clear()
+
+        db = self.Session()
+        db.add(Document(doc_id="D1", title="a.pdf", status="uploaded"))
+        db.commit()
+        db.close()
+
+        api = FastAPI()
+        api.include_router(r_status.router)
+        api.dependency_overrides[db_dep] = lambda: self.Session()
+        self.client = TestClient(api)
+
+    def test_stage_rows_are_batched_until_complete(self):
+        with patch.object(audit, "_BATCH_SIZE", 100), patch.object(audit, "_FLUSH_SECONDS", 3600):
+            for name in ("ocr", "clauses"):
+                with audit.stage("D1", name) as rec:
+                    audit.track_io("in", 10)
+                    audit.track_io("out", 4)
+                    rec.output = {"ok": True}
+            db = self.Session()
+            self.assertEqual(db.query(Audit).count(), 0)
+            self.assertEqual(db.get(Document, "D1").status, "clauses")
+            db.close()
+
+            audit.complete("D1")
+
+        body = self.client.get("/docs/D1/status").json()
+        self.assertEqual(body["status"], "completed")
+        self.assertEqual([s["stage"] for s in body["stages"]], ["ocr", "clauses"])
+        self.assertEqual(body["stages"][0]["input_bytes"], 10)
+        self.assertEqual(body["stages"][0]["output_bytes"], 4)
+
+    def test_idle_process_flushes_old_rows(self):
+        with patch.object(audit, "_BATCH_SIZE", 100), patch.object(audit, "_FLUSH_SECONDS", 0.2):
+            with audit.stage("D1", "ocr"):
+                pass
+            self.assertEqual(audit.pending(), 1)
+            deadline = time.monotonic() + 5
+            while audit.pending() and time.monotonic() < deadline:  # no further stage, no complete()
+                time.sleep(0.05)
+        self.assertEqual(audit.pending(), 0)
+        self.assertEqual([s["stage"] for s in self.client.get("/docs/D1/status").json()["stages"]], ["ocr"])
+
+    def test_failed_stage_is_flushed_and_marks_document(self):
+        with self.assertRaises(ValueError):
+            with audit.stage("D1", "ocr"):
+                raise ValueError("boom")
+        self.assertEqual(audit.pending(), 0)
+        body = self.client.get("/docs/D1/status").json()
+        self.assertEqual(body["status"], "failed")
+        self.assertEqual(body["stages"][0]["status"], "error")
+
+    def test_latency_histogram(self):
+        db = self.Session()
+        for ms in (50, 400, 400, 7000):
+            db.add(Audit(doc_id="D1", stage="ocr", input={}, output={}, status="ok", duration_ms=ms))
+        db.commit()
+        db.close()
+
+        [ocr] = self.client.get("/stats/stage-latency").json()
+        counts = {b["upper_ms"]: b["count"] for b in ocr["buckets"]}
+        self.assertEqual(ocr["count"], 4)
+        self.assertEqual(counts[100.0], 1)
+        self.assertEqual(counts[500.0], 2)
+        self.assertEqual(counts[10000.0], 1)
+
+    def test_status_unknown_doc(self):
+        self.assertEqual(self.client.get("/docs/nope/status").status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
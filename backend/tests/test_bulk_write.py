@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import Base
+from app.models import Clause, Document, Guidance, PolicyFire
+from app.services import guidance, summarizer
+from app.services.bulk_write import with_defaults
+
+
+class TestBulkWrites(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", poolclass=StaticPool,
+                               connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        self.Session = sessionmaker(bind=engine, autoflush=False)
+        for mod in (guidance, summarizer):
+            patcher = patch.object(mod, "SessionLocal", self.Session)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        db = self.Session()
+        db.add(Document(doc_id="D1"))
+        for i in range(300):
+            db.add(Clause(id=f"cl{i:03d}", doc_id="D1", type="renewal", page=1 + i // 10,
+                          start=i, end=i + 5, confidence=0.9, normalized={}))
+        db.add(PolicyFire(id="pf1", rule_id="R1", doc_id="D1", clause_id="cl007", severity="high", message=""))
+        db.commit()
+        db.close()
+
+        self.statements = []
+        event.listen(engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, params, ctx, many: self.statements.append((statement, many)))
+
+    def test_compose_replaces_guidance_set_based(self):
+        guidance.compose("D1")
+        self.statements.clear()
+        result = guidance.compose("D1")
+
+        inserts = [(s, many) for s, many in self.statements if s.startswith("INSERT")]
+        self.assertEqual(inserts, [(inserts[0][0], True)])  # one executemany
+        self.assertEqual(sum(s.startswith("DELETE") for s, _ in self.statements), 1)
+        (writes,) = result["writes"]
+        self.assertEqual((writes["deleted"], writes["inserted"], writes["method"]), (300, 300, "executemany"))
+
+        db = self.Session()
+        self.addCleanup(db.close)
+        self.assertEqual(db.query(Guidance).count(), 300)
+        self.assertEqual(db.query(Guidance).filter(Guidance.evidence == ["D1:1:7-12"]).one().risk, "high")
+
+    def test_summary_replaces_its_own_row(self):
+        # no layout in storage: the summary is the clause list, no LLM call
+        with patch.object(summarizer, "get_json", return_value=None), patch.object(summarizer, "put_json"):
+            summarizer.run("D1")
+            summarizer.run("D1")
+        db = self.Session()
+        self.addCleanup(db.close)
+        (g,) = db.query(Guidance).all()
+        self.assertEqual(g.evidence, ["D1:1:0-5"])
+        self.assertEqual(g.what.count("\n- "), 8)
+
+    def test_compose_keeps_the_summary(self):
+        with patch.object(summarizer, "get_json", return_value=None), patch.object(summarizer, "put_json"):
+            summarizer.run("D1")
+        guidance.compose("D1")
+        db = self.Session()
+        self.addCleanup(db.close)
+        self.assertEqual(db.query(Guidance).filter(Guidance.title == summarizer.SUMMARY_TITLE).count(), 1)
+        self.assertEqual(db.query(Guidance).count(), 301)
+
+    def test_with_defaults_fills_python_side_defaults(self):
+        (row,) = with_defaults(Guidance.__table__, [{"doc_id": "D1", "title": "t", "what": "w"}])
+        self.assertTrue(row["id"].startswith("gd_"))
+        self.assertEqual((row["risk"], row["evidence"], row["confidence"]), ("low", [], 0.8))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import Base
+from app.models import Clause, Document
+from app.services import clauses
+
+CONTRACT = (
+    "12. Limitation of Liability. In no event shall either party's aggregate liability exceed fifty percent "
+    "(50%) of the annual fees paid hereunder. This Agreement shall automatically renew for successive one (1) "
+    "year terms unless either party gives thirty (30) days' prior written notice of non-renewal. Either party "
+    "may terminate for convenience upon notice of at least 60 days. Customer shall pay all invoices within "
+    "forty-five (45) days of receipt. This Agreement is governed by the laws of the State of New York, without "
+    "regard to conflicts. Provider will maintain uptime of 99.9% each month."
+)
+
+
+def spans_for(text):
+    spans, cursor = [], 0
+    for word in text.split(" "):
+        spans.append({"start": cursor, "end": cursor + len(word), "bbox": [0, 0, 1, 1], "text": word,
+                      "confidence": 0.9})
+        cursor += len(word) + 1
+    return spans
+
+
+class TestClauses(unittest.TestCase):
+    def test_page_text_follows_span_offsets(self):
+        spans = spans_for("Net 30 days")
+        spans[1]["start"], spans[1]["end"] = 6, 8  # a wider gap in the OCR offsets is kept
+        spans[2]["start"], spans[2]["end"] = 9, 13
+        self.assertEqual(clauses.page_text(spans), "Net   30 days")
+
+    def test_extracts_and_normalizes_each_type(self):
+        found = {c["type"]: c for c in clauses.extract_page(3, clauses.page_text(spans_for(CONTRACT)))}
+        self.assertEqual(found["limitation_of_liability"]["normalized"], {"cap_ratio_to_annual_fees": 0.5})
+        self.assertEqual(found["renewal"]["normalized"],
+                         {"auto_renew": True, "renewal_term_months": 12, "notice_days": 30})
+        self.assertEqual(found["termination"]["normalized"], {"for_convenience": True, "notice_days": 60})
+        self.assertEqual(found["payment"]["normalized"], {"payment_days": 45})
+        self.assertEqual(found["governing_law"]["normalized"], {"jurisdiction": "New York"})
+        self.assertEqual(found["sla"]["normalized"], {"uptime_pct": 99.9})
+        # offsets index the page text; heading and body sentence form one region
+        lol = found["limitation_of_liability"]
+        self.assertEqual(lol["page"], 3)
+        self.assertEqual(CONTRACT[lol["start"]:lol["end"]], lol["text"])
+        self.assertTrue(lol["text"].startswith("Limitation of Liability."))
+        self.assertTrue(lol["text"].endswith("paid hereunder."))
+
+    def test_cap_variants(self):
+        norm = clauses.NORMALIZERS[clauses.ClauseTypeEnum.limitation_of_liability]
+        self.assertEqual(norm("liability shall not exceed two (2) times the annual fees")["cap_ratio_to_annual_fees"], 2.0)
+        self.assertEqual(norm("shall not exceed the fees paid in the six (6) months before the claim")
+                         ["cap_ratio_to_annual_fees"], 0.5)
+        self.assertEqual(norm("capped at EUR 2 million"), {"cap_amount": 2_000_000.0, "cap_currency": "EUR"})
+
+    def test_run_replaces_document_clauses(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            db.add(Document(doc_id="D1", title="a.pdf"))
+            db.commit()
+        layout = {"pages": {"1": {"spans": spans_for(CONTRACT)}, "2": {"spans": []}}}
+        with patch.object(clauses, "SessionLocal", Session), patch.object(clauses, "get_json", return_value=layout):
+            clauses.run("D1")
+            out = clauses.run("D1")  # re-running replaces, not appends
+        self.assertEqual(out["clauses"], 6)
+        self.assertEqual(out["by_type"]["renewal"], 1)
+        with Session() as db:
+            rows = db.scalars(select(Clause).where(Clause.doc_id == "D1")).all()
+        self.assertEqual(len(rows), 6)
+        self.assertEqual({r.page for r in rows}, {1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from sqlalchemy import text
+
+from app import db
+
+
+class TestEngineConfig(unittest.TestCase):
+    def test_profiles_and_env_overrides(self):
+        env = {"DB_POOL_SIZE": "7", "DB_WORKER_POOL_SIZE": "1", "DB_MAX_OVERFLOW": "0"}
+        with patch.dict(os.environ, env):
+            self.assertEqual(db.pool_settings("api")["pool_size"], 7)
+            self.assertEqual(db.pool_settings("worker")["pool_size"], 1)
+            self.assertEqual(db.pool_settings("worker")["max_overflow"], 0)
+        self.assertEqual(db.pool_settings("worker")["pool_size"], 2)
+
+    def test_sqlite_file_uses_wal_and_timed_pool(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        with patch.dict(os.environ, {"DB_POOL_SIZE": "1", "DB_MAX_OVERFLOW": "0"}):
+            engine = db.make_engine("sqlite:///" + os.path.join(tmp.name, "t.db"), profile="api")
+        self.addCleanup(engine.dispose)
+        self.assertIsInstance(engine.pool, db.TimedQueuePool)
+        with engine.connect() as conn:
+            self.assertEqual(conn.exec_driver_sql("PRAGMA journal_mode").scalar(), "wal")
+
+        # Two threads, one connection: the second checkout waits for the first
+        db.pool_waits.reset()
+
+        def hold():
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                time.sleep(0.1)
+
+        threads = [threading.Thread(target=hold) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = db.pool_waits.snapshot()
+        self.assertEqual((stats["checkouts"], stats["timeouts"]), (2, 0))
+        self.assertGreaterEqual(stats["max_wait_ms"], 50)
+
+    def test_async_engine_has_its_own_pool_and_stats(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        url = "sqlite:///" + os.path.join(tmp.name, "t.db")
+        api, api_async = db.pool_settings("api"), db.pool_settings("api_async")
+        self.assertLessEqual(api["pool_size"] + api["max_overflow"] + api_async["pool_size"]
+                             + api_async["max_overflow"], 40)
+        engine = db.make_async_engine(db.async_url(url), profile="api")
+        self.assertIsInstance(engine.sync_engine.pool, db.TimedAsyncQueuePool)
+        self.assertEqual(engine.sync_engine.pool.size(), api_async["pool_size"])
+
+        async def query():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            await engine.dispose()
+
+        db.pool_waits.reset()
+        db.async_pool_waits.reset()
+        asyncio.run(query())
+        self.assertEqual((db.pool_waits.snapshot()["checkouts"], db.async_pool_waits.snapshot()["checkouts"]), (0, 1))
+        with patch.object(db, "_async_engine", engine):
+            status = db.pool_status()
+        self.assertEqual(status["async_pool"]["pool"], "TimedAsyncQueuePool")
+        self.assertEqual((status["checkouts"], status["async_pool"]["checkouts"]), (0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import os
+import sys
+from datetime import date, datetime
+from unittest.mock import patch
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import Base
+from app.models import Clause, Deadline, Document
+from app.services import deadlines
+
+NOW = datetime(2026, 10, 19)
+RENEWAL = ("This Agreement is effective as of January 15, 2024 for an initial term of two (2) years and shall "
+           "automatically renew for successive one (1) year terms unless either party gives ninety (90) days' "
+           "written notice prior to renewal.")
+
+
+def clause(cid, ctype, text, **normalized):
+    return {"id": cid, "type": ctype, "text": text, "normalized": normalized}
+
+
+def parse(text):
+    return deadlines.parse_date(deadlines.DATE.search(text.lower()))
+
+
+class TestDeadlines(unittest.TestCase):
+    def test_date_formats(self):
+        self.assertEqual(parse("on January 5, 2025"), date(2025, 1, 5))
+        self.assertEqual(parse("the 5th day of Sept. 2025"), date(2025, 9, 5))
+        self.assertEqual(parse("as of 2025-01-05"), date(2025, 1, 5))
+        self.assertEqual(parse("by 01/05/2025"), date(2025, 1, 5))
+        with patch.object(deadlines, "DATE_ORDER", "DMY"):
+            self.assertEqual(parse("by 01/05/2025"), date(2025, 5, 1))
+        self.assertIsNone(parse("February 30, 2025"))
+
+    def test_renewal_window_rolls_to_next_term(self):
+        rows = deadlines.extract_deadlines(
+            [clause("c1", "renewal", RENEWAL, auto_renew=True, renewal_term_months=12, notice_days=90)], now=NOW)
+        self.assertEqual([(r["title"], r["due_at"].date(), r["source_clause_id"]) for r in rows], [
+            ("Renewal notice deadline", date(2026, 10, 17), "c1"),  # 90 days before the renewal date
+            ("Renewal date", date(2027, 1, 15), "c1"),              # 2026-01-15 rolled forward one year
+        ])
+
+    def test_relative_and_absolute_deadlines(self):
+        rows = deadlines.extract_deadlines([
+            clause("c1", "indemnity", "Supplier shall deliver its insurance certificate within thirty (30) days "
+                                      "of the Effective Date."),
+            clause("c2", "payment", "Invoices are payable within 45 days of receipt; the setup fee is due no "
+                                    "later than March 31, 2024."),
+            clause("c3", "renewal", "The initial term of 6 months ends on 2024-08-01.", notice_days=30),
+        ], reference=datetime(2024, 2, 1), now=NOW)
+        got = {(r["title"], r["due_at"].date(), r["source_clause_id"]) for r in rows}
+        self.assertEqual(got, {
+            ("Indemnity deadline", date(2024, 3, 2), "c1"),        # upload date + 30 days
+            ("Payment deadline", date(2024, 3, 31), "c2"),         # "within 45 days of receipt" has no date
+            ("Term ends", date(2024, 8, 1), "c3"),                 # explicit end wins over 6 months
+            ("Renewal notice deadline", date(2024, 7, 2), "c3"),
+        })
+
+    def test_run_batch_replaces_per_document(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            for doc_id in ("D1", "D2"):
+                db.add(Document(doc_id=doc_id, created_at=datetime(2024, 2, 1)))
+                db.add(Clause(id=f"{doc_id}-c1", doc_id=doc_id, type="renewal", page=1, start=0, end=len(RENEWAL),
+                              text=RENEWAL, confidence=0.9,
+                              normalized={"auto_renew": True, "renewal_term_months": 12, "notice_days": 90}))
+            db.add(Deadline(doc_id="D1", title="stale", due_at=NOW))
+            db.commit()
+            n, stats = deadlines.run_batch(db, ["D1", "D2"], now=NOW)
+            db.commit()
+            self.assertEqual((n, stats.deleted), (4, 1))
+        with patch.object(deadlines, "SessionLocal", Session):
+            out = deadlines.run("D2")
+        self.assertEqual(out["deadlines"], 2)
+        with Session() as db:
+            rows = db.execute(select(Deadline.doc_id, Deadline.title, Deadline.source_clause_id)
+                              .order_by(Deadline.doc_id, Deadline.due_at)).all()
+        self.assertEqual([tuple(r) for r in rows][:2], [("D1", "Renewal notice deadline", "D1-c1"),
+                                                        ("D1", "Renewal date", "D1-c1")])
+        self.assertEqual(len(rows), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+import numpy as np
+
+HAVE_ORT = all(importlib.util.find_spec(m) for m in ("onnxruntime", "tokenizers", "onnx"))
+HAVE_ST = importlib.util.find_spec("sentence_transformers") is not None
+ONNX_DIR = os.getenv("EMBED_ONNX_DIR", "")
+
+VOCAB = ["<pad>", "<unk>", "the", "supplier", "shall", "terminate", "notice", "days", "liability", "cap"]
+DIM = 8
+
+
+def build_tiny_model(out_dir, seed=0):
+    """Embedding lookup + projection with the exported model's interface, plus its int8 variant."""
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from tokenizers import Tokenizer, models, pre_tokenizers
+
+    rnd = np.random.default_rng(seed)
+    emb = rnd.normal(size=(len(VOCAB), 16)).astype(np.float32)
+    proj = rnd.normal(size=(16, DIM)).astype(np.float32)
+    graph = helper.make_graph(
+        [helper.make_node("Gather", ["emb", "input_ids"], ["tok"]),
+         helper.make_node("MatMul", ["tok", "proj"], ["last_hidden_state"])],
+        "tiny",
+        [helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "sequence"]),
+         helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "sequence"])],
+        [helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "sequence", DIM])],
+        initializer=[numpy_helper.from_array(emb, "emb"), numpy_helper.from_array(proj, "proj")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, os.path.join(out_dir, "model.onnx"))
+    quantize_dynamic(os.path.join(out_dir, "model.onnx"), os.path.join(out_dir, "model.int8.onnx"),
+                     weight_type=QuantType.QInt8)
+
+    tok = Tokenizer(models.WordLevel({w: i for i, w in enumerate(VOCAB)}, unk_token="<unk>"))
+    tok.pre_tokenizer = pre_tokenizers.Whitespace()
+    tok.save(os.path.join(out_dir, "tokenizer.json"))
+    with open(os.path.join(out_dir, "embed_config.json"), "w") as f:
+        json.dump({"pooling": "mean", "normalize": True, "max_length": 6, "dim": DIM,
+                   "pad_id": 0, "pad_token": "<pad>"}, f)
+    return emb @ proj
+
+
+@unittest.skipUnless(HAVE_ORT, "onnxruntime/tokenizers/onnx not installed")
+class TestOnnxEmbedder(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.table = build_tiny_model(cls.tmp.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def expected(self, text):
+        ids = [VOCAB.index(w) if w in VOCAB else 1 for w in text.split()][:6]
+        v = self.table[ids].mean(axis=0)
+        return v / np.linalg.norm(v)
+
+    def test_mean_pooling_truncation_and_order(self):
+        from app.services.embed_onnx import OnnxEmbedder
+        model = OnnxEmbedder(self.tmp.name, quantized=False)
+        texts = ["the supplier shall terminate", "cap",
+                 "the liability cap days notice shall terminate the supplier", "unknown words here"]
+        out = model.encode(texts, batch_size=2)
+        self.assertEqual(out.dtype, np.float16)
+        self.assertEqual(out.shape, (4, DIM))
+        for text, vec in zip(texts, out):  # padding never leaks into the mean; rows stay in input order
+            np.testing.assert_allclose(vec.astype(np.float32), self.expected(text), atol=2e-3)
+        self.assertEqual(model.encode([]).shape, (0, DIM))
+
+    def test_int8_parity(self):
+        from app.services.embed_onnx import OnnxEmbedder, cosine_parity
+        texts = ["the supplier shall terminate", "notice days", "liability cap", "the cap"]
+        fp32 = OnnxEmbedder(self.tmp.name, quantized=False, dtype=np.float32).encode(texts)
+        int8 = OnnxEmbedder(self.tmp.name, quantized=True).encode(texts)
+        self.assertGreaterEqual(min(cosine_parity(fp32, int8)), 0.99)
+
+    def test_selected_by_config(self):
+        from unittest.mock import patch
+        from app.services import embed_onnx, qdrant
+        with patch.object(qdrant, "EMBED_BACKEND", "onnx"), patch.object(qdrant, "_model", None), \
+                patch.object(embed_onnx, "ONNX_DIR", self.tmp.name), \
+                patch.object(qdrant, "EMBED_SERVER_URL", ""):
+            vec = qdrant.embed(["the supplier"])
+            self.assertIsInstance(qdrant._model, embed_onnx.OnnxEmbedder)
+        self.assertEqual(len(vec[0]), DIM)
+
+
+@unittest.skipUnless(HAVE_ORT and HAVE_ST and ONNX_DIR and os.path.isdir(ONNX_DIR),
+                     "needs sentence-transformers and an exported model in EMBED_ONNX_DIR")
+class TestOnnxParityWithTorch(unittest.TestCase):
+    def test_cosine_parity(self):
+        from sentence_transformers import SentenceTransformer
+        from app.scripts.export_onnx_embedder import SAMPLES
+        from app.services.embed_onnx import OnnxEmbedder, cosine_parity
+        model = OnnxEmbedder(ONNX_DIR)
+        reference = SentenceTransformer(model.config["model"], device="cpu").encode(SAMPLES, normalize_embeddings=True)
+        self.assertGreaterEqual(min(cosine_parity(reference, model.encode(SAMPLES))), 0.99)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import asyncio
+import os
+import sys
+from unittest.mock import patch
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.embed_server import create_app
+from app.services import qdrant
+from app.services.embed_batcher import MicroBatcher
+
+
+class FakeModel:
+    """Deterministic 2-d 'embedding' per text; records the batch sizes it saw."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, **_):
+        self.calls.append(len(texts))
+        return np.array([[float(len(t)), float(ord(t[0]))] for t in texts], dtype=np.float32)
+
+
+class TestEmbedBatching(unittest.TestCase):
+    def test_concurrent_requests_share_batches(self):
+        model = FakeModel()
+        texts = [chr(65 + i % 26) * (1 + i) for i in range(40)]
+
+        async def go():
+            batcher = MicroBatcher(model.encode, max_batch=16, max_wait_ms=20)
+            try:
+                return await asyncio.gather(*(batcher.embed([t]) for t in texts))
+            finally:
+                await batcher.stop()
+
+        results = asyncio.run(go())
+        self.assertLessEqual(max(model.calls), 16)
+        self.assertLess(len(model.calls), len(texts) // 2)  # far fewer model calls than requests
+        for t, vec in zip(texts, results):
+            np.testing.assert_array_equal(vec, FakeModel().encode([t]))
+
+    def test_server_and_client(self):
+        model = FakeModel()
+        with TestClient(create_app(model.encode)) as server:
+            resp = server.post("/embed", json={"texts": ["ab", "c"]})
+            self.assertEqual(resp.headers["X-Embedding-Shape"], "2,2")
+            # services/qdrant.embed goes through the server (TestClient is an httpx.Client)
+            with patch.object(qdrant, "EMBED_SERVER_URL", "http://testserver"), \
+                    patch.object(qdrant, "_http", server), \
+                    patch.object(qdrant, "get_model", side_effect=AssertionError("model loaded in-process")):
+                self.assertEqual(qdrant.embed(["ab", "c"]), [[2.0, 97.0], [1.0, 99.0]])
+            self.assertEqual(server.get("/health").json()["batching"]["texts"], 4)
+
+    def test_float16_vectors_stay_float16(self):
+        model = FakeModel()
+        encode = lambda texts: model.encode(texts).astype(np.float16)  # as the ONNX backend returns
+        with TestClient(create_app(encode)) as server:
+            resp = server.post("/embed", json={"texts": ["ab"]})
+            self.assertEqual(resp.headers["X-Embedding-Dtype"], "<f2")
+            self.assertEqual(len(resp.content), 2 * 2)
+            with patch.object(qdrant, "EMBED_SERVER_URL", "http://testserver"), \
+                    patch.object(qdrant, "_http", server):
+                self.assertEqual(qdrant.embed(["ab"]), [[2.0, 97.0]])
+
+    def test_client_falls_back_in_process(self):
+        model = FakeModel()
+        with patch.object(qdrant, "EMBED_SERVER_URL", "http://127.0.0.1:9"), \
+                patch.object(qdrant, "_http", None), \
+                patch.object(qdrant, "_server_down_until", 0.0), \
+                patch.object(qdrant, "get_model", return_value=model):
+            self.assertEqual(qdrant.embed(["ab"]), [[2.0, 97.0]])
+            self.assertGreater(qdrant._server_down_until, 0.0)
+            self.assertEqual(qdrant.embed(["c"]), [[1.0, 99.0]])  # no retry while marked down
+            self.assertEqual(model.calls, [1, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
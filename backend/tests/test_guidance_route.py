@@ -0,0 +1,78 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.db import Base
+from app.deps import async_db_dep
+from app.models import Clause, Document, Guidance, PolicyFire
+from app.routes import guidance as r_guidance
+
+
+class TestGuidanceRoute(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "t.db")
+        engine = create_engine(f"sqlite:///{path}")
+        self.addCleanup(engine.dispose)
+        Base.metadata.create_all(bind=engine)
+        self.Session = sessionmaker(bind=engine, autoflush=False)
+
+        db = self.Session()
+        db.add_all([Document(doc_id="D1"), Document(doc_id="D2")])
+        for i in range(200):
+            db.add(Clause(id=f"cl{i:03d}", doc_id="D1", type="renewal", page=1 + i // 10,
+                          start=i * 10, end=i * 10 + 5, confidence=0.9, normalized={}))
+            if i % 2 == 0:
+                db.add(PolicyFire(id=f"pf{i:03d}", rule_id=f"R{i}", doc_id="D1", clause_id=f"cl{i:03d}",
+                                  severity="high", message=""))
+            evidence = [f"D1:{1 + i // 10}:{i * 10}-{i * 10 + 5}"]
+            if i % 50 == 1:
+                evidence = [f"D2:1:{i * 10}-{i * 10 + 5}"]  # other document: ignored
+            db.add(Guidance(id=f"gd{i:03d}", doc_id="D1", title=f"g{i}", what="...",
+                            risk="" if i % 4 == 0 else "low", evidence=evidence, confidence=0.7))
+        db.commit()
+        db.close()
+
+        # The route reads through the asyncio engine; NullPool: TestClient runs its own event loop
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+        AsyncSession = async_sessionmaker(bind=async_engine)
+        self.statements = []
+        event.listen(async_engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *a: self.statements.append(statement))
+
+        async def _db():
+            async with AsyncSession() as db:
+                yield db
+
+        api = FastAPI()
+        api.include_router(r_guidance.router)
+        api.dependency_overrides[async_db_dep] = _db
+        self.client = TestClient(api)
+
+    def test_guidance_uses_two_queries(self):
+        items = self.client.get("/docs/D1/guidance").json()
+        self.assertEqual(len(items), 200)
+        self.assertEqual(len(self.statements), 2)
+
+        by_id = {it["id"]: it for it in items}
+        self.assertEqual(by_id["gd000"]["policy_rule"], "R0")
+        self.assertEqual(by_id["gd000"]["risk"], "high")  # no stored risk: fire severity
+        self.assertEqual(by_id["gd002"]["risk"], "low")
+        self.assertIsNone(by_id["gd003"]["policy_rule"])  # clause without fire
+        self.assertIsNone(by_id["gd051"]["policy_rule"])  # chip from another document
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect
+
+from app.db import Base
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.url = "sqlite:///" + os.path.join(tmp.name, "mig.db")
+        self.cfg = Config(os.path.join(os.getcwd(), "backend", "alembic.ini"))
+        self.cfg.set_main_option("sqlalchemy.url", self.url)
+
+    def _schema(self):
+        engine = create_engine(self.url)
+        try:
+            insp = inspect(engine)
+            tables = set(insp.get_table_names()) - {"alembic_version"}
+            indexes = {(t, ix["name"]) for t in tables for ix in insp.get_indexes(t)}
+            return tables, indexes
+        finally:
+            engine.dispose()
+
+    def test_head_matches_models(self):
+        command.upgrade(self.cfg, "head")
+        tables, indexes = self._schema()
+        self.assertEqual(tables, set(Base.metadata.tables))
+        expected = {(t.name, ix.name) for t in Base.metadata.tables.values() for ix in t.indexes}
+        self.assertEqual(indexes, expected)
+
+        command.downgrade(self.cfg, "base")
+        self.assertEqual(self._schema(), (set(), set()))
+
+    def test_indexes_apply_to_create_all_database(self):
+        # Databases created before migrations existed: stamp the baseline, then upgrade
+        engine = create_engine(self.url)
+        Base.metadata.create_all(bind=engine)
+        engine.dispose()
+        command.stamp(self.cfg, "2026_10_19_audit_rule_versions")
+        command.upgrade(self.cfg, "head")
+        self.assertIn(("policy_fires", "ix_policy_fires_rule_doc"), self._schema()[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import io
+import os
+import sys
+from types import SimpleNamespace as NS
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+import numpy as np
+import pypdfium2 as pdfium
+from unittest.mock import patch
+from PIL import Image, ImageDraw
+
+from app.services import ocr
+
+
+def pdf_page(size=(1240, 1754), bar_height=0, colour=0, dpi=150.0):
+    """One-page PDF; bar_height > 0 draws 'text lines' that many pixels tall."""
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    y = 100
+    while bar_height and y + bar_height < size[1] - 100:
+        draw.rectangle((100, y, size[0] - 100, y + bar_height - 1), fill=colour)
+        y += bar_height * 2
+    buf = io.BytesIO()
+    img.save(buf, format="PDF", resolution=dpi)
+    return pdfium.PdfDocument(buf.getvalue())
+
+
+def word(value, geometry, confidence=0.9):
+    return NS(value=value, geometry=geometry, confidence=np.float32(confidence))
+
+
+class TestOcrSpans(unittest.TestCase):
+    def test_page_spans_from_prediction(self):
+        page = NS(blocks=[NS(lines=[
+            NS(words=[word("Fees", ((0.1, 0.1), (0.2, 0.15))), word(" ", ((0.2, 0.1), (0.21, 0.15)))]),
+            NS(words=[word("payable", ((0.125, 0.25), (0.375, 0.5)))]),
+        ])])
+        spans = ocr.page_spans_from(page, 1000, 2000)
+        self.assertEqual([(s["text"], s["start"], s["end"]) for s in spans], [("Fees", 0, 4), ("payable", 5, 12)])
+        self.assertEqual(spans[1]["bbox"], [125, 500, 250, 500])
+        self.assertIs(type(spans[0]["confidence"]), float)  # JSON-serializable whatever the backend returns
+
+    def test_plan_render_scales_to_text_size(self):
+        small = ocr.plan_render(pdf_page(bar_height=10)[0])   # ~5pt lines
+        large = ocr.plan_render(pdf_page(bar_height=30)[0])   # ~14pt lines
+        self.assertGreater(small["scale"], large["scale"])
+        self.assertAlmostEqual(large["scale"], ocr.OCR_TARGET_LINE_PX / (30 * 72 / 150), delta=0.15)
+        self.assertEqual(ocr.plan_render(pdf_page()[0])["scale"], ocr.OCR_MIN_SCALE)  # blank page
+        self.assertFalse(large["grayscale"])  # small render: colour is faster
+
+    def test_plan_render_pixel_budget_and_grayscale(self):
+        sheet = pdf_page(size=(2339, 3311), bar_height=3, dpi=50.0)[0]  # A0, ~4pt labels
+        plan = ocr.plan_render(sheet)
+        width, height = sheet.get_size()
+        self.assertLessEqual(width * height * plan["scale"] ** 2, ocr.OCR_MAX_PIXELS * 1.001)
+        self.assertTrue(plan["grayscale"])
+        self.assertEqual(ocr.render_page(sheet, 0.25, plan["grayscale"]).shape[2], 3)
+        self.assertFalse(ocr.plan_render(pdf_page(size=(2339, 3311), bar_height=3, colour=(200, 0, 0), dpi=50.0)[0])
+                         ["grayscale"])
+        with patch.object(ocr, "OCR_RENDER", "fixed"):
+            self.assertEqual(ocr.plan_render(sheet), {"scale": ocr.OCR_FIXED_SCALE, "grayscale": False})
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            ocr.build_predictor(backend="tesseract")
+
+
+if __name__ == '__main__':
+    unittest.main()
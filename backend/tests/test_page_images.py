@@ -0,0 +1,113 @@
+import unittest
+import io
+import os
+import sys
+from unittest.mock import patch
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+import pypdfium2 as pdfium
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.routes import pages as r_pages
+from app.services import ocr, page_images
+
+
+class _NetworkStream(io.BytesIO):
+    """A non-file stream (like storage's ranged reader) that records reads made under the pdfium lock."""
+    locked_reads = 0
+
+    def read(self, *args):
+        _NetworkStream.locked_reads += page_images._pdfium_lock.locked()
+        return super().read(*args)
+
+    def readinto(self, b):
+        _NetworkStream.locked_reads += page_images._pdfium_lock.locked()
+        return super().readinto(b)
+
+
+def _pdf_bytes(pages: int) -> bytes:
+    pdf = pdfium.PdfDocument.new()
+    for _ in range(pages):
+        pdf.new_page(612, 792)
+    buf = io.BytesIO()
+    pdf.save(buf)
+    pdf.close()
+    return buf.getvalue()
+
+
+class TestPageImages(unittest.TestCase):
+    def setUp(self):
+        page_images.cache.clear()
+        page_images._page_counts.clear()
+        _NetworkStream.locked_reads = 0
+        self.pdf = _pdf_bytes(3)
+        self.opened = []
+
+        def open_pdf_stream(doc_id):
+            self.opened.append(doc_id)
+            return _NetworkStream(self.pdf) if doc_id == "D1" else None
+
+        self.render = patch.object(page_images, "render_jpeg", wraps=page_images.render_jpeg).start()
+        patcher = patch.object(ocr, "open_pdf_stream", side_effect=open_pdf_stream)
+        patcher.start()
+        self.addCleanup(patch.stopall)
+        api = FastAPI()
+        api.include_router(r_pages.router)
+        self.client = TestClient(api)
+
+    def test_render_headers_and_cache(self):
+        resp = self.client.get("/docs/D1/pages/2?size=thumb")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers["content-type"], "image/jpeg")
+        self.assertEqual(resp.headers["cache-control"], page_images.CACHE_CONTROL)
+        self.assertEqual(max(Image.open(io.BytesIO(resp.content)).size), 256)
+
+        again = self.client.get("/docs/D1/pages/2?size=thumb")
+        self.assertEqual(again.content, resp.content)
+        self.assertEqual(self.render.call_count, 1)  # second request from the render cache
+        self.assertEqual(self.opened, ["D1", "D1"])  # ... after checking the original still exists
+        self.assertEqual(_NetworkStream.locked_reads, 0)  # spooled before taking the pdfium lock
+        self.assertNotEqual(self.client.get("/docs/D1/pages/2").headers["etag"], resp.headers["etag"])
+
+    def test_conditional_request(self):
+        tag = self.client.get("/docs/D1/pages/1").headers["etag"]
+        page_images.cache.clear()
+        resp = self.client.get("/docs/D1/pages/1", headers={"If-None-Match": f'"other", W/{tag}'})
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.headers["etag"], tag)
+        self.assertEqual(self.render.call_count, 1)  # revalidation renders nothing
+        page_images._page_counts.clear()
+        self.assertEqual(self.client.get("/docs/D1/pages/1", headers={"If-None-Match": tag}).status_code, 304)
+        self.assertEqual(_NetworkStream.locked_reads, 0)
+
+    def test_conditional_request_for_missing_page(self):
+        for doc_id, n in (("D2", 1), ("D1", 4)):  # deleted document, page out of range
+            tag = page_images.etag(doc_id, n, "preview")
+            resp = self.client.get(f"/docs/{doc_id}/pages/{n}", headers={"If-None-Match": tag})
+            self.assertEqual(resp.status_code, 404)
+
+    def test_not_found_and_bad_size(self):
+        self.assertEqual(self.client.get("/docs/D1/pages/4").status_code, 404)
+        self.assertEqual(self.client.get("/docs/D2/pages/1").status_code, 404)
+        self.assertEqual(self.client.get("/docs/D1/pages/0").status_code, 422)
+        self.assertEqual(self.client.get("/docs/D1/pages/1?size=huge").status_code, 422)
+
+    def test_cache_is_bounded(self):
+        cache = page_images.RenderCache(max_bytes=10)
+        cache.put(("D1", 1, "thumb"), b"aaaa")
+        cache.put(("D1", 2, "thumb"), b"bbbb")
+        cache.get(("D1", 1, "thumb"))
+        cache.put(("D1", 3, "thumb"), b"cccc")  # evicts page 2, the least recently used
+        self.assertIsNone(cache.get(("D1", 2, "thumb")))
+        self.assertEqual(cache.get(("D1", 1, "thumb")), b"aaaa")
+        self.assertEqual(cache.stats()["bytes"], 8)
+        cache.put(("D1", 4, "full"), b"x" * 11)  # larger than the whole cache: not kept
+        self.assertIsNone(cache.get(("D1", 4, "full")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app import db as app_db
+from app.db import Base
+from app.deps import async_db_dep
+from app.models import Clause, Deadline, Document
+from app.routes import clauses as r_clauses, deadlines as r_deadlines
+
+
+class TestAsyncReadRoutes(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        url = "sqlite:///" + os.path.join(tmp.name, "t.db")
+        engine = create_engine(url)
+        self.addCleanup(engine.dispose)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        db.add(Document(doc_id="D1"))
+        db.add(Clause(id="cl1", doc_id="D1", type="renewal", page=2, start=5, end=9, text="Renews.",
+                      confidence=0.9, normalized={"notice_days": 30}))
+        db.add(Deadline(id="dl1", doc_id="D1", title="Notice", due_at=datetime(2026, 1, 2, 3, 4, 5)))
+        db.commit()
+        db.close()
+
+        self.assertEqual(app_db.async_url(url), url.replace("sqlite://", "sqlite+aiosqlite://"))
+        async_engine = app_db.make_async_engine(app_db.async_url(url), profile="api")
+        AsyncSession = async_sessionmaker(bind=async_engine)
+
+        async def _db():
+            async with AsyncSession() as session:
+                yield session
+
+        api = FastAPI()
+        api.include_router(r_clauses.router)
+        api.include_router(r_deadlines.router)
+        api.dependency_overrides[async_db_dep] = _db
+        # One event loop for the client's lifetime, so pooled connections stay on it
+        self.client = TestClient(api)
+        self.client.__enter__()
+        self.addCleanup(self.client.__exit__, None, None, None)
+        self.addCleanup(lambda: self.client.portal.call(async_engine.dispose))
+
+    def test_clauses(self):
+        (c,) = self.client.get("/docs/D1/clauses").json()
+        self.assertEqual((c["id"], c["type"], c["text_span"]["page"]), ("cl1", "renewal", 2))
+        self.assertEqual(self.client.get("/docs/D2/clauses").json(), [])
+
+    def test_deadlines_ics(self):
+        body = self.client.get("/docs/D1/deadlines.ics").text
+        self.assertIn("UID:dl1@titan-guidance", body)
+        self.assertIn("DTSTART:20260102T030405Z", body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from app.services.rules import evaluate_rules_yaml
+from app.services import rule_compiler
+from app.services.rule_compiler import compile_rules, evaluate_compiled, load_compiled
+from app.services.rules_bulk import ClauseTable, evaluate_bulk
+
+SPEC = {"rules": [
+    {"id": "cap", "when": {"clause.type": "limitation_of_liability",
+                           "clause.normalized.cap_ratio_to_annual_fees": "< 1.0"},
+     "then": {"severity": "high", "message": "cap"}},
+    {"id": "notice", "when": {"clause.type": "renewal", "clause.normalized.notice_days": "<= 30"},
+     "then": {"severity": "medium"}},
+    {"id": "any_law", "when": {"any": [{"clause.normalized.law": "== 'NY'"}, {"clause.normalized.law": "DE"}]}},
+    {"id": "all_conf", "when": {"all": [{"clause.confidence": ">= 0.5"}, {"clause.text": "!= ''"}]}},
+    {"id": "not_type", "when": {"clause.type": "!= payment", "clause.normalized.amount": "> 100"}},
+    {"id": "date", "when": {"clause.normalized.effective": ">= 2024-06-01"}},
+    {"id": "list_idx", "when": {"clause.normalized.parties.1": "Acme"}},
+    {"id": "numeric_str", "when": {"clause.normalized.amount": "< '50'"}},
+    {"id": "empty_any", "when": {"any": []}},
+    {"id": "match_all"},
+    {"id": "bad_root", "when": {"type": "renewal"}},
+]}
+
+TYPES = ["limitation_of_liability", "renewal", "payment", "termination", None]
+
+
+def _random_clause(rnd: random.Random, i: int) -> dict:
+    norm = {}
+    if rnd.random() < 0.7:
+        norm["cap_ratio_to_annual_fees"] = rnd.choice([0.5, 1, 1.0, 2, "0.75", "abc", None])
+    if rnd.random() < 0.7:
+        norm["notice_days"] = rnd.choice([15, 30, 45, "30", "x", 2 ** 60])
+    if rnd.random() < 0.5:
+        norm["law"] = rnd.choice(["NY", "DE", "CA", 1])
+    if rnd.random() < 0.5:
+        norm["amount"] = rnd.choice([10, 150, "20", "200", "n/a", 99.5])
+    if rnd.random() < 0.4:
+        norm["effective"] = rnd.choice(["2024-01-01", "2025-02-03", datetime(2024, 7, 1),
+                                         datetime(2024, 7, 1, tzinfo=timezone.utc), 5])
+    if rnd.random() < 0.3:
+        norm["parties"] = rnd.choice([["Foo", "Acme"], ["Acme"], "Acme"])
+    return {"id": f"cl{i}", "doc_id": "D1", "type": rnd.choice(TYPES), "page": 1, "start": 0, "end": 1,
+            "text": rnd.choice(["", "text"]), "confidence": rnd.choice([0.2, 0.5, 0.9]), "normalized": norm}
+
+
+class TestRuleCompiler(unittest.TestCase):
+    def test_matches_reference_evaluator(self):
+        rnd = random.Random(1234)
+        clauses = [_random_clause(rnd, i) for i in range(500)]
+        expected = evaluate_rules_yaml(SPEC, clauses, "D1")
+        self.assertEqual(evaluate_compiled(compile_rules(SPEC), clauses, "D1"), expected)
+        self.assertTrue(expected)
+
+    def test_bulk_matches_reference_evaluator(self):
+        rnd = random.Random(99)
+        clauses = [_random_clause(rnd, i) for i in range(500)]
+        expected = evaluate_rules_yaml(SPEC, clauses, "D1")
+        result = evaluate_bulk(compile_rules(SPEC), ClauseTable.from_dicts(clauses))
+        self.assertEqual(result.fires("D1"), expected)
+        # Multi-document tables take doc_id from each clause
+        self.assertEqual(result.fires(), expected)
+
+    def test_type_guard_is_indexed(self):
+        rs = compile_rules(SPEC)
+        self.assertEqual([r.rule_id for r in rs.by_type["renewal"]], ["notice"])
+        self.assertNotIn("not_type", [r.rule_id for rules in rs.by_type.values() for r in rules])
+
+    def test_file_cache_reuses_until_content_changes(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False) as f:
+            f.write("rules:\n  - id: a\n    when: {clause.type: renewal}\n")
+        self.addCleanup(os.unlink, f.name)
+        self.addCleanup(rule_compiler._cache.clear)
+
+        first = load_compiled(f.name)
+        self.assertIs(load_compiled(f.name), first)
+
+        time.sleep(0.01)
+        with open(f.name, "w") as g:
+            g.write("rules:\n  - id: b\n    when: {clause.type: renewal}\n")
+        second = load_compiled(f.name)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.rules[0].rule_id, "b")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import os
+import sys
+import tempfile
+import time
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from app.services.rule_registry import RuleRegistry
+
+
+def _write(path: str, rule_id: str) -> None:
+    with open(path, "w") as f:
+        f.write(f"rules:\n  - id: {rule_id}\n    when: {{clause.type: renewal}}\n")
+
+
+class TestRuleRegistry(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.default = os.path.join(tmp.name, "rules.yaml")
+        self.tenants = os.path.join(tmp.name, "tenants")
+        os.makedirs(self.tenants)
+        _write(self.default, "base")
+        _write(os.path.join(self.tenants, "acme.yaml"), "acme_only")
+        # Long poll interval: the watcher thread exists but tests drive refresh()
+        self.registry = RuleRegistry(self.default, self.tenants, reload_seconds=3600)
+        self.addCleanup(self.registry.stop)
+
+    def test_tenant_resolution(self):
+        self.assertEqual(self.registry.for_tenant().rules[0].rule_id, "base")
+        self.assertEqual(self.registry.for_tenant("acme").rules[0].rule_id, "acme_only")
+        self.assertEqual(self.registry.for_tenant("other").rules[0].rule_id, "base")
+        self.assertEqual(self.registry.for_tenant("../acme").rules[0].rule_id, "base")
+
+    def test_lookup_is_cached_until_refresh(self):
+        first = self.registry.for_tenant()
+        time.sleep(0.01)
+        _write(self.default, "edited")
+        self.assertIs(self.registry.for_tenant(), first)
+
+        self.registry.refresh()
+        self.assertEqual(self.registry.for_tenant().rules[0].rule_id, "edited")
+        (entry,) = [e for e in self.registry.active() if e["path"] == self.default]
+        self.assertEqual((entry["version"], entry["error"]), (2, None))
+
+    def test_broken_file_keeps_last_good_version(self):
+        good = self.registry.for_tenant()
+        time.sleep(0.01)
+        with open(self.default, "w") as f:
+            f.write("rules: [unclosed\n")
+        self.registry.refresh()
+        self.assertIs(self.registry.for_tenant(), good)
+        (entry,) = [e for e in self.registry.active() if e["path"] == self.default]
+        self.assertEqual(entry["version"], 1)
+        self.assertIsNotNone(entry["error"])
+
+    def test_tenant_cache_is_bounded(self):
+        registry = RuleRegistry(self.default, self.tenants, reload_seconds=3600, max_files=4)
+        self.addCleanup(registry.stop)
+        registry.for_tenant("acme")
+        for i in range(50):
+            registry.for_tenant(f"random-{i}")
+            registry.for_tenant("acme")  # recently used: survives
+        self.assertEqual(len(registry._tenants), 4)
+        self.assertIn("acme", registry._tenants)
+        registry.refresh()
+        self.assertEqual(len(registry._tenants), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import os
+import random
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import Base
+from app.deps import db_dep
+from app.models import Clause, Document, PolicyFire
+from app.routes import rules as r_rules
+from app.services import rule_registry
+from app.services.rules import evaluate_rules_yaml
+from app.services.rule_compiler import compile_rules
+from app.services.rule_sql import find_fires, load_clause_dicts, translate
+
+SPEC = {"rules": [
+    {"id": "cap", "when": {"clause.type": "limitation_of_liability",
+                           "clause.normalized.cap_ratio_to_annual_fees": "< 1.0"},
+     "then": {"severity": "high", "message": "cap"}},
+    {"id": "notice_eq", "when": {"clause.normalized.notice_days": "== 30"}},
+    {"id": "notice_ne", "when": {"clause.normalized.notice_days": "!= 30"}},
+    {"id": "law", "when": {"any": [{"clause.normalized.law": "== 'NY'"}, {"clause.normalized.law": "DE"}]}},
+    {"id": "law_order", "when": {"clause.normalized.law": ">= CA"}},
+    {"id": "all_conf", "when": {"all": [{"clause.confidence": ">= 0.5"}, {"clause.text": "!= ''"}]}},
+    {"id": "not_type", "when": {"clause.type": "!= payment", "clause.page": "> 1"}},
+    {"id": "flag", "when": {"clause.normalized.auto_renew": True}},
+    {"id": "nullish", "when": {"clause.normalized.amount": None}},
+    {"id": "iso_eq", "when": {"clause.normalized.effective": "== 2024-06-01"}},
+    {"id": "nested", "when": {"clause.normalized.fee.currency": "USD"}},
+    {"id": "empty_any", "when": {"any": []}},
+    {"id": "match_all"},
+    {"id": "bad_root", "when": {"type": "renewal"}},
+    # Not exactly expressible in SQL: candidates re-checked in Python
+    {"id": "amount_order", "when": {"clause.normalized.amount": "< 50"}},
+    {"id": "list_idx", "when": {"clause.normalized.parties.1": "Acme"}},
+    {"id": "iso_order", "when": {"clause.normalized.effective": ">= 2024-06-01"}},
+]}
+RECHECKED = {"cap", "amount_order", "list_idx", "iso_order"}
+
+TYPES = ["limitation_of_liability", "renewal", "payment", "termination"]
+
+
+def _random_clause(rnd: random.Random, i: int) -> Clause:
+    norm = {}
+    if rnd.random() < 0.7:
+        norm["cap_ratio_to_annual_fees"] = rnd.choice([0.5, 1, 1.0, 2, "0.75", "abc", None, True])
+    if rnd.random() < 0.7:
+        norm["notice_days"] = rnd.choice([15, 30, 30.0, 45, "30", "x", False])
+    if rnd.random() < 0.5:
+        norm["law"] = rnd.choice(["NY", "DE", "CA", "ca", "Zürich", 1, ["NY"]])
+    if rnd.random() < 0.5:
+        norm["amount"] = rnd.choice([10, 150, "20", "200", "n/a", 99.5, None, {"v": 1}])
+    if rnd.random() < 0.4:
+        norm["effective"] = rnd.choice(["2024-01-01", "2025-02-03", "2024-06-01", 5])
+    if rnd.random() < 0.3:
+        norm["parties"] = rnd.choice([["Foo", "Acme"], ["Acme"], "Acme"])
+    if rnd.random() < 0.3:
+        norm["auto_renew"] = rnd.choice([True, False, 1, "true"])
+    if rnd.random() < 0.3:
+        norm["fee"] = rnd.choice([{"currency": "USD"}, {"currency": "EUR"}, "USD"])
+    return Clause(id=f"cl{i:04d}", doc_id="D1", type=rnd.choice(TYPES), page=rnd.randint(1, 3),
+                  start=rnd.randint(0, 5), end=10, text=rnd.choice(["", "text", None]),
+                  confidence=rnd.choice([0.2, 0.5, 0.9]), normalized=norm)
+
+
+class TestRuleSql(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", poolclass=StaticPool,
+                               connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        self.Session = sessionmaker(bind=engine, autoflush=False)
+        db = self.Session()
+        db.add(Document(doc_id="D1", title="a.pdf"))
+        rnd = random.Random(7)
+        db.add_all([_random_clause(rnd, i) for i in range(400)])
+        db.commit()
+        db.close()
+
+    def test_translation_exactness(self):
+        inexact = {r.rule_id for r, _, exact in translate(compile_rules(SPEC), "sqlite") if not exact}
+        self.assertEqual(inexact, RECHECKED)
+        self.assertIsNone(translate(compile_rules(SPEC), "mssql"))
+
+    def test_matches_reference_evaluator(self):
+        db = self.Session()
+        self.addCleanup(db.close)
+        expected = evaluate_rules_yaml(SPEC, load_clause_dicts(db, "D1"), "D1")
+        got = find_fires(db, compile_rules(SPEC), "D1")
+        self.assertEqual(got, expected)
+        self.assertTrue({f["rule_id"] for f in got} >= {"cap", "law", "flag", "nested", "amount_order"})
+
+    def test_validate_bulk_inserts_fires(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False) as f:
+            f.write("rules:\n  - id: renewal\n    when: {clause.type: renewal}\n")
+        self.addCleanup(os.unlink, f.name)
+
+        api = FastAPI()
+        api.include_router(r_rules.router)
+        api.dependency_overrides[db_dep] = lambda: self.Session()
+        registry = rule_registry.RuleRegistry(default_path=f.name, reload_seconds=0)
+        with patch.object(rule_registry, "registry", registry):
+            client = TestClient(api)
+            client.post("/rules/validate", params={"doc_id": "D1"})
+            body = client.post("/rules/validate", params={"doc_id": "D1"}).json()  # replaces, no duplicates
+
+        db = self.Session()
+        self.addCleanup(db.close)
+        n_renewal = db.query(Clause).filter(Clause.type == "renewal").count()
+        self.assertEqual(len(body["fires"]), n_renewal)
+        self.assertEqual(db.query(PolicyFire).count(), n_renewal)
+        self.assertEqual((body["writes"][0]["deleted"], body["writes"][0]["inserted"]), (n_renewal, n_renewal))
+
+
+if __name__ == '__main__':
+    unittest.main()
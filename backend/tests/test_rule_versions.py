@@ -0,0 +1,147 @@
+import unittest
+import os
+import sys
+from datetime import date
+from unittest.mock import patch
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import Base
+from app.models import Clause, Document, PolicyFire, RuleRollout
+from app.services import rule_versions
+from app.services.rules import evaluate_rules_yaml
+from app.services.rule_sql import load_clause_dicts
+
+V1 = {"rules": [
+    {"id": "a", "when": {"clause.type": "renewal"}},
+    {"id": "b", "when": {"clause.normalized.notice_days": "< 30"}},
+    {"id": "c", "when": {"clause.type": "payment"}},
+]}
+V2 = {"rules": [
+    {"id": "a", "when": {"clause.type": "renewal"}},                    # unchanged
+    {"id": "b", "when": {"clause.normalized.notice_days": "< 60"}},     # changed
+    {"id": "d", "when": {"clause.confidence": ">= 0.9"}},               # added; c removed
+]}
+
+
+class TestRuleRollouts(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", poolclass=StaticPool,
+                               connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        self.Session = sessionmaker(bind=engine, autoflush=False)
+        rule_versions._compiled.clear()  # keyed by rollout id, which restarts with every database
+        patcher = patch.object(rule_versions, "SessionLocal", self.Session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        db = self.Session()
+        for d in range(5):
+            doc_id = f"D{d}"
+            db.add(Document(doc_id=doc_id))
+            for i, (ctype, days) in enumerate([("renewal", 15), ("renewal", 45), ("payment", 90)]):
+                db.add(Clause(id=f"{doc_id}-{i}", doc_id=doc_id, type=ctype, page=1, start=i, end=i + 1,
+                              confidence=0.9 if i == d % 3 else 0.5, normalized={"notice_days": days}))
+        db.commit()
+        db.close()
+
+    def _rollout(self, spec):
+        db = self.Session()
+        try:
+            rollout, batches = rule_versions.start_rollout(db, spec, batch_docs=2)
+            for batch in batches:
+                rule_versions.run_batch(rollout.id, batch)
+            return rollout.id if rollout else None, len(batches)
+        finally:
+            db.close()
+
+    def _fires(self):
+        db = self.Session()
+        try:
+            return {(f.rule_id, f.clause_id): f.id for f in db.query(PolicyFire)}
+        finally:
+            db.close()
+
+    def _expected(self, spec):
+        db = self.Session()
+        try:
+            return {(f["rule_id"], f["clause_id"])
+                    for d in range(5)
+                    for f in evaluate_rules_yaml(spec, load_clause_dicts(db, f"D{d}"), f"D{d}")}
+        finally:
+            db.close()
+
+    def test_incremental_rollout(self):
+        first, n_batches = self._rollout(V1)
+        self.assertEqual(n_batches, 3)
+        before = self._fires()
+        self.assertEqual(set(before), self._expected(V1))
+
+        second, _ = self._rollout(V2)
+        after = self._fires()
+        self.assertEqual(set(after), self._expected(V2))
+        # Unchanged rule "a" was not re-evaluated: its rows survive as-is
+        self.assertEqual({k: v for k, v in after.items() if k[0] == "a"},
+                         {k: v for k, v in before.items() if k[0] == "a"})
+
+        db = self.Session()
+        self.addCleanup(db.close)
+        ro = db.get(RuleRollout, second)
+        self.assertEqual((ro.added, ro.changed, ro.removed), (["d"], ["b"], ["c"]))
+        report = rule_versions.progress(ro)
+        self.assertEqual((report["status"], report["done_docs"], report["percent"]), ("done", 5, 100.0))
+        self.assertEqual(report["clauses_evaluated"], 15)
+        self.assertEqual(report["fires_deleted"], 5 + 5)  # c everywhere + old b fires
+
+    def test_same_spec_is_a_no_op(self):
+        self._rollout(V1)
+        reordered = {"rules": [dict(reversed(list(r.items()))) for r in V1["rules"]]}
+        self.assertEqual(self._rollout(reordered), (None, 0))
+
+    def test_redelivered_batch_is_counted_once(self):
+        db = self.Session()
+        self.addCleanup(db.close)
+        rollout, batches = rule_versions.start_rollout(db, V1, batch_docs=2)
+        for batch in batches + [batches[0], list(reversed(batches[1]))]:
+            rule_versions.run_batch(rollout.id, batch)
+        self.assertTrue(rule_versions.run_batch(rollout.id, batches[0])["duplicate"])
+        db.expire_all()
+        report = rule_versions.progress(db.get(RuleRollout, rollout.id))
+        self.assertEqual((report["done_docs"], report["clauses_evaluated"]), (5, 15))
+        self.assertEqual(report["fires_inserted"], len(self._expected(V1)))
+        self.assertEqual(set(self._fires()), self._expected(V1))
+
+    def test_spec_with_yaml_dates_is_stored(self):
+        db = self.Session()
+        self.addCleanup(db.close)
+        db.add(Clause(id="D0-9", doc_id="D0", type="renewal", page=1, start=9, end=10, confidence=0.9,
+                      normalized={"start": "2026-01-01"}))
+        db.commit()
+        # a YAML date constant never equals the JSON string in the clause, as in evaluate_rules_yaml
+        spec = {"rules": [{"id": "e", "when": {"clause.normalized.start": date(2026, 1, 1)}},
+                          {"id": "s", "when": {"clause.normalized.start": "2026-01-01"}}]}
+        self._rollout(spec)
+        self.assertEqual(rule_versions.current_version(db).spec["rules"][0]["when"],
+                         {"clause.normalized.start": {"$date": "2026-01-01"}})
+        self.assertEqual(set(self._fires()), self._expected(spec))
+        self.assertEqual({r for r, _ in self._fires()}, {"s"})
+        with self.assertRaises(ValueError):
+            rule_versions.start_rollout(db, {"rules": [{"id": "x", "when": {"clause.type": {"a", "b"}}}]})
+
+    def test_integer_rule_ids(self):
+        self._rollout({"rules": [{"id": 7, "when": {"clause.type": "renewal"}}]})
+        with patch.object(rule_versions, "replace_rows", wraps=rule_versions.replace_rows) as write:
+            self._rollout({"rules": [{"id": 7, "when": {"clause.type": "payment"}}]})  # changed
+        # SQLite would coerce 7 to "7"; PostgreSQL compares the filter against what was inserted
+        self.assertEqual({type(r["rule_id"]) for c in write.call_args_list for r in c.args[3]}, {str})
+        fires = self._fires()
+        self.assertEqual({r for r, _ in fires}, {"7"})
+        self.assertEqual(len(fires), 5)  # one payment clause per document, renewal fires replaced
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+import json
+import os
+import sys
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from app.services import serialization
+
+LAYOUT = {"pages": {"1": {"width": 800, "height": 1100,
+                          "spans": [{"start": 0, "end": 5, "bbox": [1, 2, 3, 4], "text": "Héllo", "confidence": 0.93}]}}}
+
+
+class TestSerialization(unittest.TestCase):
+    def test_roundtrip_all_available_codecs(self):
+        for codec, comp in serialization.available():
+            with self.subTest(codec=codec, compression=comp):
+                body, ctype = serialization.dumps(LAYOUT, codec=codec, compression=comp)
+                self.assertEqual(serialization.loads(body), LAYOUT)
+                self.assertEqual(body.startswith(serialization.MAGIC), (codec, comp) != ("json", "none"))
+
+    def test_plain_json_stays_plain(self):
+        body, ctype = serialization.dumps(LAYOUT, codec="json", compression="none")
+        self.assertEqual(ctype, "application/json")
+        self.assertEqual(json.loads(body), LAYOUT)
+
+    def test_reads_legacy_stdlib_artifacts(self):
+        legacy = json.dumps(LAYOUT).encode("utf-8")
+        self.assertEqual(serialization.loads(legacy), LAYOUT)
+
+    def test_rejects_unknown_header(self):
+        with self.assertRaises(ValueError):
+            serialization.loads(serialization.MAGIC + bytes((9, 1, 0)) + b"{}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from app.services import warmup
+
+HEAVY = ["torch", "doctr", "sentence_transformers", "qdrant_client"]
+
+
+class TestStartup(unittest.TestCase):
+    def test_api_import_loads_no_models(self):
+        # Fresh interpreter: other tests may have imported anything already
+        backend = os.path.join(os.getcwd(), "backend")
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, "DATABASE_URL": "sqlite:///" + os.path.join(tmp, "t.db"),
+                   "API_WARMUP": "", "PYTHONPATH": backend}
+            code = (
+                "import json, sys\n"
+                "import app.main\n"
+                "from fastapi.testclient import TestClient\n"
+                "with TestClient(app.main.app) as c:\n"
+                "    codes = [c.get('/').status_code, c.get('/ready').status_code]\n"
+                f"print(json.dumps({{'codes': codes, 'heavy': [m for m in {HEAVY!r} if m in sys.modules]}}))\n"
+            )
+            out = subprocess.run([sys.executable, "-c", code], cwd=backend, env=env,
+                                 capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        self.assertEqual(result, {"codes": [200, 200], "heavy": []})
+
+    def test_api_never_warms_ocr(self):
+        status = warmup.run("ocr,bogus", role="api")
+        self.assertEqual(status["ocr"]["state"], "skipped")
+        self.assertEqual(status["bogus"]["state"], "unknown")
+        self.assertNotIn("doctr", sys.modules)
+
+
+if __name__ == '__main__':
+    unittest.main()
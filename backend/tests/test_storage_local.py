@@ -0,0 +1,91 @@
+import unittest
+import io
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+import pypdfium2 as pdfium
+
+from app.services import storage
+
+
+def _pdf_bytes(pages: int) -> bytes:
+    pdf = pdfium.PdfDocument.new()
+    for _ in range(pages):
+        pdf.new_page(612, 792)
+    buf = io.BytesIO()
+    pdf.save(buf)
+    pdf.close()
+    return buf.getvalue()
+
+
+class TestLocalBackend(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.backend = storage.LocalBackend(self.tmp.name)
+
+    def test_roundtrip_and_missing(self):
+        self.backend.put("D1/a.json", b'{"x": 1}', "application/json")
+        self.assertEqual(self.backend.get("D1/a.json"), b'{"x": 1}')
+        self.assertEqual(self.backend.size("D1/a.json"), 8)
+        self.assertIsNone(self.backend.get("D1/missing.json"))
+        self.assertIsNone(self.backend.open("D1/missing.json"))
+
+    def test_upload_stream(self):
+        self.backend.upload("D1/original.pdf", io.BytesIO(b"x" * 3000), "application/pdf")
+        with self.backend.open("D1/original.pdf") as f:
+            self.assertEqual(len(f.read()), 3000)
+
+    def test_put_stream_is_accounted(self):
+        with patch.object(storage, "_backend", self.backend), patch.object(storage, "track_io") as track:
+            storage.put_stream("D1/original.pdf", io.BytesIO(b"x" * 3000), "application/pdf")
+        track.assert_called_once_with("out", 3000)
+        self.assertEqual(self.backend.size("D1/original.pdf"), 3000)
+
+    def test_rejects_keys_outside_root(self):
+        with self.assertRaises(ValueError):
+            self.backend.put("../escape.txt", b"", "text/plain")
+
+
+class TestRangedReader(unittest.TestCase):
+    def _reader(self, data: bytes, block: int = 7, blocks: int = 2):
+        calls = []
+
+        def fetch(start, end):
+            calls.append((start, end))
+            return data[start:end + 1]
+
+        return storage.RangedReader(fetch, len(data), block_size=block, max_blocks=blocks), calls
+
+    def test_random_access_matches_source(self):
+        data = bytes(range(256)) * 3
+        r, _ = self._reader(data)
+        for pos, n in [(0, 5), (700, 100), (13, 40), (767, 10), (300, 1)]:
+            r.seek(pos)
+            self.assertEqual(r.read(n), data[pos:pos + n])
+        r.seek(-4, io.SEEK_END)
+        self.assertEqual(r.read(), data[-4:])
+
+    def test_blocks_are_reused(self):
+        r, calls = self._reader(b"abcdefghijklmnopqrstuvwxyz", block=10)
+        r.read(3)
+        r.seek(1)
+        r.read(5)
+        self.assertEqual(calls, [(0, 9)])
+
+    def test_pdfium_opens_stream_without_full_copy(self):
+        data = _pdf_bytes(3)
+        r, calls = self._reader(data, block=1024, blocks=4)
+        pdf = pdfium.PdfDocument(io.BufferedReader(r))
+        self.assertEqual(len(pdf), 3)
+        pdf.close()
+        self.assertTrue(all(end - start < 1024 for start, end in calls))
+
+
+if __name__ == '__main__':
+    unittest.main()
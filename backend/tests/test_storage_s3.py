@@ -0,0 +1,80 @@
+import unittest
+import io
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+import boto3
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+from app.services import artifact_cache, storage
+
+BODY = b"0123456789"
+ETAG = '"v1"'
+
+
+def _body(data: bytes) -> StreamingBody:
+    return StreamingBody(io.BytesIO(data), len(data))
+
+
+class TestS3Backend(unittest.TestCase):
+    """S3Backend against a stubbed client: request parameters are validated against the S3 API model."""
+
+    def setUp(self):
+        client = boto3.client("s3", region_name="us-east-1", aws_access_key_id="x", aws_secret_access_key="x")
+        self.stub = Stubber(client)
+        self.stub.activate()
+        self.addCleanup(self.stub.deactivate)
+        cache = tempfile.TemporaryDirectory()
+        self.addCleanup(cache.cleanup)
+        # 4-byte parts fetched one at a time, so the stubbed responses are consumed in order
+        for p in (patch.object(storage, "_backend", storage.S3Backend(client, "docs")),
+                  patch.object(storage, "_cached", True),
+                  patch.object(storage, "_PART_SIZE", 4),
+                  patch.object(storage, "_MAX_CONCURRENCY", 1),
+                  patch.object(artifact_cache, "CACHE_DIR", cache.name)):
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _expect_parts(self, etag=ETAG):
+        for start, end in ((0, 3), (4, 7), (8, 9)):
+            self.stub.add_response(
+                "get_object", {"Body": _body(BODY[start:end + 1]), "ETag": etag},
+                {"Bucket": "docs", "Key": "D1/original.pdf", "Range": f"bytes={start}-{end}", "IfMatch": etag})
+
+    def test_open_stream_downloads_ranges_through_the_cache(self):
+        self.stub.add_response("head_object", {"ETag": ETAG, "ContentLength": len(BODY)},
+                               {"Bucket": "docs", "Key": "D1/original.pdf"})
+        self._expect_parts()
+        with storage.open_stream("D1/original.pdf") as f:
+            self.assertEqual(f.read(), BODY)
+        self.stub.add_response("head_object", {"ETag": ETAG, "ContentLength": len(BODY)},
+                               {"Bucket": "docs", "Key": "D1/original.pdf"})
+        with storage.open_stream("D1/original.pdf") as f:  # unchanged: HEAD only
+            self.assertEqual(f.read(), BODY)
+        self.stub.assert_no_pending_responses()
+
+    def test_large_get_bytes(self):
+        self.stub.add_response("get_object", {"Body": _body(BODY), "ETag": ETAG, "ContentLength": len(BODY)},
+                               {"Bucket": "docs", "Key": "D1/original.pdf"})
+        self._expect_parts()
+        self.assertEqual(storage.get_bytes("D1/original.pdf"), BODY)
+        self.stub.assert_no_pending_responses()
+
+    def test_object_replaced_mid_download(self):
+        self.stub.add_response("head_object", {"ETag": ETAG, "ContentLength": len(BODY)},
+                               {"Bucket": "docs", "Key": "D1/original.pdf"})
+        self.stub.add_response("get_object", {"Body": _body(BODY[:4]), "ETag": ETAG})
+        self.stub.add_client_error("get_object", service_error_code="PreconditionFailed", http_status_code=412)
+        with self.assertRaises(ClientError):
+            storage.open_stream("D1/original.pdf")
+
+
+if __name__ == '__main__':
+    unittest.main()
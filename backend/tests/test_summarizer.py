@@ -0,0 +1,127 @@
+import unittest
+import asyncio
+import os
+import re
+import sys
+from unittest.mock import patch
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import Base
+from app.models import Clause, Document, Guidance
+from app.services import summarizer
+
+TAG = re.compile(r"\[P\d+\]")
+
+
+def spans_for(text):
+    spans, cursor = [], 0
+    for word in text.split(" "):
+        spans.append({"start": cursor, "end": cursor + len(word), "bbox": [0, 0, 1, 1], "text": word,
+                      "confidence": 0.9})
+        cursor += len(word) + 1
+    return spans
+
+
+def layout(n_pages):
+    pages = {}
+    for i in range(1, n_pages + 1):
+        text = " ".join(f"Section {i}.{j} requires the supplier to act within {j} days." for j in range(1, 13))
+        pages[str(i)] = {"spans": spans_for(text)}
+    return {"pages": pages}
+
+
+class FakeLLM:
+    """Stands in for llm.chat_with_citations: cites what it is given, reports usage, tracks concurrency."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+        self.in_flight = self.peak = 0
+
+    async def __call__(self, system, prompt, usage=None):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        self.calls.append("map" if system == summarizer.MAP_SYSTEM else "reduce")
+        if self.fail:
+            raise RuntimeError("OPENROUTER_API_KEY not configured in environment")
+        usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + len(prompt) // 4
+        usage["completion_tokens"] = usage.get("completion_tokens", 0) + 20
+        if system == summarizer.MAP_SYSTEM:
+            return "- Supplier deadlines " + "".join(TAG.findall(prompt)[:2]), 0.8
+        chips = re.findall(r"\[[^\[\]]+\]", prompt)
+        return f"- Overall: supplier deadlines {''.join(chips[:3])} [D1:9:0-1]", 0.8
+
+
+class TestSummarizer(unittest.TestCase):
+    def setUp(self):
+        self.store = {"D1/layout_index.json": layout(6)}
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+        with self.Session() as db:
+            db.add(Document(doc_id="D1"))
+            db.add(Clause(id="c1", doc_id="D1", type="renewal", page=1, start=0, end=20, text="...",
+                          confidence=0.9, normalized={"notice_days": 30}))
+            db.commit()
+        for p in (patch.object(summarizer, "SessionLocal", self.Session),
+                  patch.object(summarizer, "get_json", side_effect=self.store.get),
+                  patch.object(summarizer, "put_json", side_effect=self.store.__setitem__),
+                  patch.object(summarizer, "CHUNK_CHARS", 1500),
+                  patch.object(summarizer, "CONCURRENCY", 2)):
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_passages_cut_at_sentences(self):
+        text = "First sentence here. Second one is a bit longer. Third."
+        parts = list(summarizer.split_page(4, text, limit=30))
+        self.assertEqual([p.text for p in parts], ["First sentence here.", "Second one is a bit longer.", "Third."])
+        self.assertTrue(all(text[p.start:p.end] == p.text and p.page == 4 for p in parts))
+
+    def test_map_reduce_with_cache(self):
+        fake = FakeLLM()
+        with patch.object(summarizer.llm, "chat_with_citations", fake):
+            out = summarizer.run("D1")
+        n_chunks = out["chunks"]
+        self.assertGreater(n_chunks, 2)
+        self.assertEqual(fake.calls.count("map"), n_chunks)
+        self.assertEqual(fake.calls[-1], "reduce")
+        self.assertLessEqual(fake.peak, 2)
+        self.assertEqual(out["llm"]["calls"], len(fake.calls))
+        self.assertGreater(out["llm"]["prompt_tokens"], 0)
+        self.assertEqual(out["llm"]["cached"], 0)
+
+        with self.Session() as db:
+            g = db.scalars(select(Guidance).where(Guidance.doc_id == "D1")).one()
+        self.assertTrue(g.what.startswith("- Overall"))
+        self.assertTrue(g.evidence and all(c.startswith("D1:") for c in g.evidence))
+        self.assertNotIn("D1:9:0-1", g.evidence)  # cited chip that matches no passage
+        self.assertEqual(self.store["D1/summary.json"]["llm"]["calls"], len(fake.calls))
+
+        again = FakeLLM()
+        with patch.object(summarizer.llm, "chat_with_citations", again):
+            out2 = summarizer.run("D1")
+        self.assertEqual(again.calls, [])
+        self.assertEqual(out2["llm"]["cached"], len(fake.calls))
+        self.assertEqual(out2["llm"]["tokens_saved_by_cache"],
+                         out["llm"]["prompt_tokens"] + out["llm"]["completion_tokens"])
+
+    def test_falls_back_to_clause_list(self):
+        with patch.object(summarizer.llm, "chat_with_citations", FakeLLM(fail=True)):
+            out = summarizer.run("D1")
+        self.assertEqual(out["llm"]["errors"], out["chunks"])
+        with self.Session() as db:
+            g = db.scalars(select(Guidance).where(Guidance.doc_id == "D1")).one()
+        self.assertEqual(g.what, "Key terms:\n- renewal: see [D1:1:0-20]")
+        self.assertEqual(g.evidence, ["D1:1:0-20"])
+
+
+if __name__ == '__main__':
+    unittest.main()
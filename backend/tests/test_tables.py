@@ -0,0 +1,93 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from app.services import tables
+
+
+class PageBuilder:
+    """Word spans laid out like OCR output: bbox [x, y, w, h], offsets within the page text."""
+
+    def __init__(self):
+        self.spans = []
+        self.cursor = 0
+
+    def word(self, x, y, text, w=None, h=12):
+        self.spans.append({"start": self.cursor, "end": self.cursor + len(text),
+                           "bbox": [x, y, w or 7 * len(text), h], "text": text, "confidence": 0.9})
+        self.cursor += len(text) + 1
+
+    def prose(self, x, y, lines, words_per_line):
+        for i in range(lines):
+            for j in range(words_per_line):
+                self.word(x + j * 46, y + i * 18, "word", w=40)
+
+
+def table_page():
+    p = PageBuilder()
+    p.prose(20, 20, 4, 12)
+    for i, (item, fee) in enumerate([("Hosting", "1,200"), ("Support", "800"), ("Licences", "4,500"),
+                                      ("Training", "300")]):
+        y = 120 + i * 20
+        p.word(20, y, item)
+        p.word(200, y, "per")
+        p.word(228, y, "year")
+        p.word(400, y, fee)
+    p.prose(20, 230, 2, 12)
+    return p.spans
+
+
+class TestTables(unittest.TestCase):
+    def test_detects_grid_among_prose(self):
+        [table] = tables.extract_page_tables(table_page())
+        self.assertEqual((table["n_rows"], table["n_cols"]), (4, 3))
+        self.assertEqual(table["rows"][0], ["Hosting", "per year", "1,200"])
+        self.assertEqual(table["rows"][3], ["Training", "per year", "300"])
+        self.assertEqual(table["bbox"][:2], [20.0, 120.0])
+        self.assertLess(table["start"], table["end"])
+
+    def test_two_column_prose_is_not_a_table(self):
+        p = PageBuilder()
+        p.prose(20, 20, 20, 9)
+        p.prose(460, 20, 20, 9)
+        self.assertEqual(tables.extract_page_tables(p.spans), [])
+        self.assertEqual(tables.extract_page_tables([]), [])
+
+    def test_run_streams_page_artifacts(self):
+        store = {"D1/layout/manifest.json": {"pages": [1, 2, 3]}, "D1/layout/1.json": {"spans": table_page()},
+                 "D1/layout/2.json": {"spans": []}, "D1/layout/3.json": {"spans": table_page()}}
+        events = []
+
+        def get_json(key):
+            events.append(("get", key))
+            return store.get(key)
+
+        def put_json(key, data):
+            events.append(("put", key))
+
+        with patch.object(tables, "get_json", get_json), patch.object(tables, "put_json", put_json):
+            out = tables.run("D1")
+        self.assertEqual(out, {"tables": 2, "pages_with_tables": 2})
+        # one page read at a time, its tables written before the next page is read
+        self.assertEqual(events, [("get", "D1/layout/manifest.json"), ("get", "D1/layout/1.json"),
+                                  ("put", "D1/tables/1.json"), ("get", "D1/layout/2.json"),
+                                  ("get", "D1/layout/3.json"), ("put", "D1/tables/3.json"),
+                                  ("put", "D1/tables.json")])
+
+    def test_run_falls_back_to_layout_index(self):
+        layout = {"pages": {"1": {"spans": table_page()}, "2": {"spans": []}}}
+        store = {"D1/layout_index.json": layout}
+        written = []
+        with patch.object(tables, "get_json", side_effect=store.get), \
+                patch.object(tables, "put_json", lambda key, data: written.append(key)):
+            out = tables.run("D1")
+        self.assertEqual(out, {"tables": 1, "pages_with_tables": 1})
+        self.assertEqual(written, ["D1/tables/1.json", "D1/tables.json"])
+
+
+if __name__ == '__main__':
+    unittest.main()
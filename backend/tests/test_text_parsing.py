@@ -0,0 +1,26 @@
+import unittest
+import os
+import re
+import sys
+
+# Add backend to sys.path so we can import app
+sys.path.insert(0, os.path.join(os.getcwd(), "backend"))
+
+from app.services.text_parsing import QTY, parse_number, sentence_ends
+
+DAYS = re.compile(rf"{QTY}\s*days", re.IGNORECASE)
+
+
+class TestTextParsing(unittest.TestCase):
+    def test_quantities(self):
+        got = [parse_number(m) for m in DAYS.finditer(
+            "within 30 days, Thirty days, thirty (45) days, one hundred twenty days or 1,000 days")]
+        self.assertEqual(got, [30.0, 30.0, 45.0, 120.0, 1000.0])
+
+    def test_sentence_ends(self):
+        text = 'Fees are net 30. Term: 2 years; "Renewal" applies. see sec. below! (a) ends here.'
+        self.assertEqual([text[:i].split()[-1] for i in sentence_ends(text)],
+                         ["30.", "years;", "below!"])  # "applies. see" goes on in lowercase
+
+if __name__ == '__main__':
+    unittest.main()